@@ -27,9 +27,14 @@ class BlockchainConfig:
     difficulty: int = 2
     target_block_time: int = 10  # seconds
     max_transactions_per_block: int = 100
+    max_block_bytes: int = 1000000  # tổng kích thước giao dịch mỗi block
     mining_reward: float = 10.0
     min_transaction_amount: float = 0.01
     max_transaction_amount: float = 1000000.0
+    full_verification_interval: int = 3600  # seconds, 0 = chỉ chạy khi được yêu cầu
+    mempool_max_transactions: int = 5000
+    mempool_max_bytes: int = 5242880  # 5MB
+    ed25519_activation_height: int = 0  # block từ chiều cao này bắt buộc chữ ký Ed25519
 
 @dataclass
 class ConsensusConfig:
@@ -37,7 +42,10 @@ class ConsensusConfig:
     algorithm: str = "pow"  # "pow" or "pos"
     pos_minimum_stake: float = 100.0
     difficulty_adjustment_blocks: int = 10
-    max_mining_threads: int = 1
+    max_mining_threads: int = 1  # 0 = dùng toàn bộ CPU
+    signature_verify_workers: int = 1  # 0 = dùng toàn bộ CPU
+    signature_cache_size: int = 100000  # số chữ ký đã xác minh được nhớ
+    chain_verify_workers: int = 0  # 0 = dùng toàn bộ CPU
 
 @dataclass
 class StorageConfig:
@@ -45,6 +53,12 @@ class StorageConfig:
     data_directory: str = "./data"
     blockchain_file: str = "blockchain.json"
     wallets_file: str = "wallets.json"
+    backend: str = "log"  # "log" (block log) hoặc "sqlite"
+    sqlite_file: str = "blockchain.db"  # trong data_directory
+    block_log_directory: str = "blocks"  # trong data_directory
+    block_log_segment_size: int = 16777216  # 16MB
+    mempool_file: str = "mempool.json"  # trong data_directory
+    block_cache_size: int = 1024  # số block giữ trong bộ nhớ khi đọc chain từ bộ lưu trữ
     auto_save: bool = True
     backup_interval: int = 3600  # seconds
 
@@ -101,12 +115,21 @@ class Config:
         # Blockchain config
         self.blockchain.difficulty = int(os.getenv("MINING_DIFFICULTY", str(self.blockchain.difficulty)))
         self.blockchain.mining_reward = float(os.getenv("MINING_REWARD", str(self.blockchain.mining_reward)))
+        self.blockchain.max_block_bytes = int(os.getenv("MAX_BLOCK_BYTES", str(self.blockchain.max_block_bytes)))
+        self.blockchain.mempool_max_transactions = int(os.getenv("MEMPOOL_MAX_TRANSACTIONS", str(self.blockchain.mempool_max_transactions)))
+        self.blockchain.mempool_max_bytes = int(os.getenv("MEMPOOL_MAX_BYTES", str(self.blockchain.mempool_max_bytes)))
+        self.blockchain.ed25519_activation_height = int(os.getenv("ED25519_ACTIVATION_HEIGHT", str(self.blockchain.ed25519_activation_height)))
         
         # Consensus config
         self.consensus.algorithm = os.getenv("CONSENSUS_ALGORITHM", self.consensus.algorithm)
+        self.consensus.max_mining_threads = int(os.getenv("MINING_THREADS", str(self.consensus.max_mining_threads)))
+        self.consensus.signature_verify_workers = int(os.getenv("VERIFY_WORKERS", str(self.consensus.signature_verify_workers)))
+        self.consensus.chain_verify_workers = int(os.getenv("CHAIN_VERIFY_WORKERS", str(self.consensus.chain_verify_workers)))
         
         # Storage config
         self.storage.data_directory = os.getenv("DATA_DIRECTORY", self.storage.data_directory)
+        self.storage.backend = os.getenv("STORAGE_BACKEND", self.storage.backend)
+        self.storage.block_cache_size = int(os.getenv("BLOCK_CACHE_SIZE", str(self.storage.block_cache_size)))
     
     def _validate_config(self):
         """Validate cấu hình"""
@@ -122,10 +145,48 @@ class Config:
         if not (1 <= self.blockchain.difficulty <= 10):
             raise ValueError(f"Invalid difficulty: {self.blockchain.difficulty}")
         
+        # Validate block / mempool limits (một chỗ dành cho giao dịch thưởng)
+        if self.blockchain.max_transactions_per_block < 2:
+            raise ValueError(f"Invalid max transactions per block: {self.blockchain.max_transactions_per_block}")
+        
+        if self.storage.backend not in ["log", "sqlite"]:
+            raise ValueError(f"Invalid storage backend: {self.storage.backend}")
+        
+        if self.storage.block_log_segment_size < 4096:
+            raise ValueError(f"Invalid block log segment size: {self.storage.block_log_segment_size}")
+        
+        if self.storage.block_cache_size < 1:
+            raise ValueError(f"Invalid block cache size: {self.storage.block_cache_size}")
+        
+        if self.blockchain.ed25519_activation_height < 0:
+            raise ValueError(f"Invalid Ed25519 activation height: {self.blockchain.ed25519_activation_height}")
+        
+        if self.blockchain.max_block_bytes < 1024:
+            raise ValueError(f"Invalid max block bytes: {self.blockchain.max_block_bytes}")
+        
+        if self.blockchain.mempool_max_transactions < 1:
+            raise ValueError(f"Invalid mempool max transactions: {self.blockchain.mempool_max_transactions}")
+        
+        if self.blockchain.mempool_max_bytes < 1:
+            raise ValueError(f"Invalid mempool max bytes: {self.blockchain.mempool_max_bytes}")
+        
         # Validate consensus algorithm
         if self.consensus.algorithm not in ["pow", "pos"]:
             raise ValueError(f"Invalid consensus algorithm: {self.consensus.algorithm}")
         
+        # Validate mining threads
+        if self.consensus.max_mining_threads < 0:
+            raise ValueError(f"Invalid mining threads: {self.consensus.max_mining_threads}")
+        
+        if self.consensus.signature_verify_workers < 0:
+            raise ValueError(f"Invalid signature verify workers: {self.consensus.signature_verify_workers}")
+        
+        if self.consensus.signature_cache_size < 1:
+            raise ValueError(f"Invalid signature cache size: {self.consensus.signature_cache_size}")
+        
+        if self.consensus.chain_verify_workers < 0:
+            raise ValueError(f"Invalid chain verify workers: {self.consensus.chain_verify_workers}")
+        
         # Create directories if needed
         os.makedirs(self.storage.data_directory, exist_ok=True)
         os.makedirs(os.path.dirname(self.logging.file_path), exist_ok=True)
@@ -196,6 +257,26 @@ class Config:
         except Exception as e:
             print(f"Failed to save config to {config_file}: {e}")
     
+    def get_block_log_path(self) -> str:
+        """Lấy đường dẫn thư mục block log"""
+        return os.path.join(self.storage.data_directory, self.storage.block_log_directory)
+    
+    def get_block_store_path(self) -> str:
+        """Lấy đường dẫn của backend lưu block đang dùng"""
+        if self.storage.backend == "sqlite":
+            return os.path.join(self.storage.data_directory, self.storage.sqlite_file)
+        return self.get_block_log_path()
+    
+    def get_block_store_options(self) -> Dict[str, Any]:
+        """Tham số khởi tạo cho backend lưu block đang dùng"""
+        if self.storage.backend == "log":
+            return {'segment_size': self.storage.block_log_segment_size}
+        return {}
+    
+    def get_mempool_file_path(self) -> str:
+        """Lấy đường dẫn file mempool"""
+        return os.path.join(self.storage.data_directory, self.storage.mempool_file)
+    
     def get_blockchain_file_path(self) -> str:
         """Lấy đường dẫn file blockchain"""
         return os.path.join(self.storage.data_directory, self.storage.blockchain_file)
@@ -238,14 +319,23 @@ class Config:
         print(f"  Target Block Time: {self.blockchain.target_block_time}s")
         print(f"  Mining Reward: {self.blockchain.mining_reward}")
         print(f"  Max Transactions/Block: {self.blockchain.max_transactions_per_block}")
+        print(f"  Max Block Size: {self.blockchain.max_block_bytes} bytes")
+        print(f"  Mempool Limit: {self.blockchain.mempool_max_transactions} txs / {self.blockchain.mempool_max_bytes} bytes")
+        print(f"  Ed25519 Activation Height: {self.blockchain.ed25519_activation_height}")
         
         print("\nConsensus:")
         print(f"  Algorithm: {self.consensus.algorithm.upper()}")
         if self.consensus.algorithm == "pos":
             print(f"  Minimum Stake: {self.consensus.pos_minimum_stake}")
+        else:
+            print(f"  Mining Threads: {self.consensus.max_mining_threads or 'auto'}")
+            print(f"  Signature Verify Workers: {self.consensus.signature_verify_workers or 'auto'}")
+            print(f"  Chain Verify Workers: {self.consensus.chain_verify_workers or 'auto'}")
         
         print("\nStorage:")
         print(f"  Data Directory: {self.storage.data_directory}")
+        print(f"  Backend: {self.storage.backend} ({self.get_block_store_path()})")
+        print(f"  Block Cache Size: {self.storage.block_cache_size}")
         print(f"  Auto Save: {self.storage.auto_save}")
         
         print("="*60)
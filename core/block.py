@@ -9,9 +9,197 @@ Dependencies: core/transaction.py, utils/crypto.py
 import hashlib
 import json
 import time
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from .transaction import Transaction
+from .merkle import MerkleTree, verify_merkle_proof
+from .difficulty import difficulty_to_target, bits_to_target, normalize_target, target_to_difficulty
+
+def calculate_header_hash(index: int, timestamp: float, previous_hash: str, merkle_root: str, nonce: int) -> str:
+    """
+    Tính hash SHA-256 của header block từ các trường rời
+
+    Dùng chung cho Block.calculate_hash và các worker khai thác (core/mining.py),
+    để hai nơi luôn cho ra cùng một hash.
+
+    Returns:
+        str: Hash của header dưới dạng hex
+    """
+    block_string = json.dumps({
+        'index': index,
+        'timestamp': str(timestamp),
+        'previous_hash': previous_hash,
+        'merkle_root': merkle_root,
+        'nonce': nonce
+    }, sort_keys=True)
+    
+    return hashlib.sha256(block_string.encode()).hexdigest()
+
+def verify_inclusion_proof(proof: Dict[str, Any]) -> bool:
+    """
+    Xác minh offline rằng giao dịch nằm trong block (SPV)
+    
+    Kiểm tra hash header, Proof of Work của header và Merkle branch từ giao dịch
+    đến merkle_root của header. Không kiểm tra block có thuộc chuỗi dài nhất hay không.
+    
+    Args:
+        proof: Kết quả của Block.get_merkle_proof (hoặc GET /proof)
+        
+    Returns:
+        bool: True nếu proof hợp lệ
+    """
+    try:
+        header = proof['header']
+        header_hash = calculate_header_hash(
+            header['index'], header['timestamp'], header['previous_hash'],
+            header['merkle_root'], header['nonce']
+        )
+        if header_hash != header['hash']:
+            return False
+        
+        if header.get('bits') is not None:
+            target = bits_to_target(header['bits'])
+        else:
+            target = difficulty_to_target(header['difficulty'])
+        if int(header_hash, 16) >= target:
+            return False
+        
+        return verify_merkle_proof(proof['transaction_hash'], proof['branch'], header['merkle_root'])
+    except (KeyError, TypeError, ValueError):
+        return False
+
+# Sai số cho phép khi so sánh giá trị giao dịch thưởng với phần thưởng + phí (float)
+REWARD_TOLERANCE = 1e-9
+
+@dataclass(frozen=True)
+class BlockRules:
+    """
+    Quy tắc đồng thuận về nội dung block (ngoài hash, Proof of Work và chữ ký)
+    
+    Attributes:
+        mining_reward (float): Phần thưởng khai thác; giao dịch thưởng tối đa bằng
+            phần thưởng cộng tổng phí của các giao dịch trong block
+        max_transactions (int): Số giao dịch tối đa mỗi block (gồm giao dịch thưởng)
+        max_bytes (int): Tổng kích thước giao dịch tối đa mỗi block (gồm giao dịch thưởng)
+    """
+    mining_reward: float
+    max_transactions: int
+    max_bytes: int
+    
+    def validation_error(self, block: 'Block', height: Optional[int] = None) -> Optional[str]:
+        """
+        Kiểm tra giới hạn kích thước và giao dịch thưởng của block
+        
+        Args:
+            block: Block cần kiểm tra
+            height: Chiều cao thực của block trong chain; chỉ genesis (height 0) được
+                bỏ qua, index do block tự khai không được dùng
+        
+        Returns:
+            Optional[str]: Lý do không hợp lệ, None nếu hợp lệ
+        """
+        if height == 0:
+            return None
+        
+        transactions = block.transactions
+        if len(transactions) > self.max_transactions:
+            return "too many transactions"
+        if sum(tx.size for tx in transactions) > self.max_bytes:
+            return "block too large"
+        
+        rewards = [tx for tx in transactions if tx.sender is None]
+        if len(rewards) != 1:
+            return "block must contain exactly one reward transaction"
+        try:
+            fees = sum(tx.fee for tx in transactions if tx.sender is not None)
+            if not 0 <= rewards[0].amount <= self.mining_reward + fees + REWARD_TOLERANCE:
+                return "reward exceeds mining reward plus fees"
+        except TypeError:
+            return "invalid reward or fee amount"
+        return None
+
+class BlockHeaderTemplate:
+    """
+    Header block được mã hóa sẵn cho vòng lặp nonce
+    
+    Chuỗi JSON của header (sort_keys) có dạng prefix + str(nonce) + suffix, nên các
+    trường cố định chỉ cần mã hóa một lần. SHA-256 của prefix (midstate) được tính
+    trước và sao chép cho mỗi nonce. Hash thu được trùng với calculate_header_hash.
+    
+    Attributes:
+        prefix (bytes): Phần header trước nonce
+        suffix (bytes): Phần header sau nonce
+    """
+    
+    def __init__(self, index: int, timestamp: float, previous_hash: str, merkle_root: str):
+        """
+        Mã hóa các trường cố định của header
+        
+        Args:
+            index: Chỉ số block
+            timestamp: Thời gian tạo block
+            previous_hash: Hash của block trước
+            merkle_root: Merkle root
+        """
+        self.fields = (index, timestamp, previous_hash, merkle_root)
+        # Thứ tự khóa theo sort_keys: index, merkle_root, nonce, previous_hash, timestamp
+        self.prefix = (
+            '{"index": ' + json.dumps(index) +
+            ', "merkle_root": ' + json.dumps(merkle_root) +
+            ', "nonce": '
+        ).encode()
+        self.suffix = (
+            ', "previous_hash": ' + json.dumps(previous_hash) +
+            ', "timestamp": ' + json.dumps(str(timestamp)) + '}'
+        ).encode()
+        self._midstate = hashlib.sha256(self.prefix)
+    
+    @classmethod
+    def from_block(cls, block: 'Block') -> 'BlockHeaderTemplate':
+        """Tạo template từ header hiện tại của block"""
+        return cls(block.index, block.timestamp, block.previous_hash, block.merkle_root)
+    
+    def __reduce__(self):
+        # Đối tượng hashlib không pickle được; worker process tự dựng lại midstate
+        return (self.__class__, self.fields)
+    
+    def hash_nonce(self, nonce: int) -> str:
+        """
+        Tính hash header với nonce cho trước
+        
+        Returns:
+            str: Hash dưới dạng hex
+        """
+        sha = self._midstate.copy()
+        sha.update(b'%d' % nonce + self.suffix)
+        return sha.hexdigest()
+    
+    def search(self, start: int, stop: int, target: int) -> Tuple[Optional[int], Optional[str], int]:
+        """
+        Thử tuần tự các nonce trong [start, stop)
+        
+        Args:
+            start: Nonce đầu tiên
+            stop: Nonce kết thúc (không bao gồm)
+            target: Target 256-bit, hash hợp lệ khi int(hash) < target
+            
+        Returns:
+            Tuple: (nonce, hash, attempts) - nonce/hash là None nếu không tìm thấy
+        """
+        # digest < target  <=>  digest <= target - 1 (so sánh bytes big-endian cùng độ dài)
+        limit = min(target - 1, (1 << 256) - 1).to_bytes(32, 'big')
+        copy_midstate = self._midstate.copy
+        suffix = self.suffix
+        
+        for nonce in range(start, stop):
+            sha = copy_midstate()
+            sha.update(b'%d' % nonce + suffix)
+            digest = sha.digest()
+            if digest <= limit:
+                return nonce, digest.hex(), nonce - start + 1
+        
+        return None, None, stop - start
 
 class Block:
     """
@@ -23,9 +211,11 @@ class Block:
         timestamp (str): Thời gian tạo block
         previous_hash (str): Hash của block trước đó
         merkle_root (str): Root của Merkle tree
+        merkle_tree (MerkleTree): Merkle tree lưu sẵn các tầng của danh sách giao dịch
         nonce (int): Số dùng trong proof of work
         hash (str): Hash của block hiện tại
-        difficulty (int): Độ khó của block
+        difficulty (int): Độ khó của block (số chữ số hex 0, làm tròn xuống)
+        bits (Optional[int]): Target 256-bit dạng compact; None với block cũ chỉ có difficulty
     """
     
     def __init__(self, index: int, transactions: List[Transaction], previous_hash: str):
@@ -41,10 +231,12 @@ class Block:
         self.transactions = transactions
         self.timestamp = time.time()
         self.previous_hash = previous_hash
+        self.merkle_tree = MerkleTree.from_digests([tx.hash_digest for tx in transactions])
         self.merkle_root = self.calculate_merkle_root()
         self.nonce = 0
         self.hash = self.calculate_hash()
         self.difficulty = 0
+        self.bits: Optional[int] = None
     
     def calculate_hash(self) -> str:
         """
@@ -53,61 +245,93 @@ class Block:
         Returns:
             str: Hash của block dưới dạng hex
         """
-        block_string = json.dumps({
-            'index': self.index,
-            'timestamp': str(self.timestamp),
-            'previous_hash': self.previous_hash,
-            'merkle_root': self.merkle_root,
-            'nonce': self.nonce
-        }, sort_keys=True)
+        return calculate_header_hash(self.index, self.timestamp, self.previous_hash, self.merkle_root, self.nonce)
+    
+    @property
+    def target(self) -> int:
+        """Target 256-bit của block: hash hợp lệ khi int(hash, 16) < target"""
+        if self.bits is not None:
+            return bits_to_target(self.bits)
+        return difficulty_to_target(self.difficulty)
+    
+    def set_target(self, target: int):
+        """
+        Gán target cho block (làm tròn về dạng compact)
         
-        return hashlib.sha256(block_string.encode()).hexdigest()
+        Args:
+            target: Target 256-bit
+        """
+        self.bits, target = normalize_target(target)
+        self.difficulty = int(target_to_difficulty(target))
+    
+    def meets_target(self) -> bool:
+        """Kiểm tra Proof of Work: so sánh hash dạng số nguyên với target"""
+        return int(self.hash, 16) < self.target
+    
+    def header_template(self) -> BlockHeaderTemplate:
+        """Tạo header template để khai thác (chỉ nonce thay đổi)"""
+        return BlockHeaderTemplate.from_block(self)
     
     def calculate_merkle_root(self) -> str:
         """
-        Tính toán Merkle root từ danh sách giao dịch
+        Lấy Merkle root của danh sách giao dịch từ cây đã lưu sẵn
+        
+        Các lá của cây được so với digest hiện tại của từng giao dịch (O(n), không
+        hash lại); cây chỉ được dựng lại nếu danh sách giao dịch bị thay đổi trực
+        tiếp (không qua add_transaction), kể cả khi một giao dịch bị thay tại chỗ.
         
         Returns:
             str: Merkle root hash
         """
-        if not self.transactions:
-            return hashlib.sha256("".encode()).hexdigest()
-        
-        # Lấy hash của tất cả giao dịch
-        transaction_hashes = [tx.transaction_hash for tx in self.transactions]
+        digests = [tx.hash_digest for tx in self.transactions]
+        if self.merkle_tree.levels[0] != digests:
+            self.merkle_tree = MerkleTree.from_digests(digests)
+        return self.merkle_tree.root
+    
+    def rebuild_merkle_tree(self):
+        """Dựng lại toàn bộ Merkle tree từ danh sách giao dịch (O(n))"""
+        self.merkle_tree = MerkleTree.from_digests([tx.hash_digest for tx in self.transactions])
+    
+    def add_transaction(self, transaction: Transaction) -> str:
+        """
+        Thêm giao dịch vào block template, cập nhật Merkle root trong O(log n)
         
-        # Tính Merkle tree
-        while len(transaction_hashes) > 1:
-            next_level = []
-            
-            # Nếu số lẻ, duplicate hash cuối
-            if len(transaction_hashes) % 2 != 0:
-                transaction_hashes.append(transaction_hashes[-1])
-            
-            # Tính hash cho từng cặp
-            for i in range(0, len(transaction_hashes), 2):
-                combined = transaction_hashes[i] + transaction_hashes[i + 1]
-                next_level.append(hashlib.sha256(combined.encode()).hexdigest())
+        Args:
+            transaction: Giao dịch cần thêm
             
-            transaction_hashes = next_level
-        
-        return transaction_hashes[0]
+        Returns:
+            str: Merkle root mới
+        """
+        self.transactions.append(transaction)
+        self.merkle_root = self.merkle_tree.append_digest(transaction.hash_digest)
+        self.hash = self.calculate_hash()
+        return self.merkle_root
     
-    def mine_block(self, difficulty: int):
+    def mine_block(self, difficulty: Optional[int] = None, max_workers: int = 1, cancel_token=None):
         """
         Khai thác block với độ khó được chỉ định (Proof of Work)
         
         Args:
-            difficulty: Số lượng số 0 đầu tiên trong hash
+            difficulty: Số lượng số 0 đầu tiên trong hash; None để dùng target (bits) đã gán
+            max_workers: Số process khai thác song song (0 = số CPU)
+            cancel_token: CancelToken để dừng khai thác giữa chừng (optional)
+            
+        Returns:
+            Optional[MiningResult]: Kết quả khai thác, None nếu bị huỷ
         """
-        self.difficulty = difficulty
-        target = "0" * difficulty
+        from .mining import ParallelMiner
         
-        while not self.hash.startswith(target):
-            self.nonce += 1
-            self.hash = self.calculate_hash()
+        if difficulty is not None:
+            self.difficulty = difficulty
+            self.bits = None
+        result = ParallelMiner(max_workers).mine(self, self.target, cancel_token)
+        if result is None:
+            return None
+        self.nonce = result.nonce
+        self.hash = result.hash
         
         print(f"Block mined: {self.hash} / Đã đào xong khối: {self.hash}")
+        return result
     
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -123,26 +347,91 @@ class Block:
             'merkle_root': self.merkle_root,
             'nonce': self.nonce,
             'difficulty': self.difficulty,
+            'bits': self.bits,
             'hash': self.hash,
             'transactions': [tx.to_dict() for tx in self.transactions]
         }
     
-    def is_valid(self, previous_block: Optional['Block'] = None) -> bool:
+    def header_dict(self) -> Dict[str, Any]:
+        """
+        Header của block (không kèm giao dịch)
+        
+        Returns:
+            Dict: Các trường header và hash
+        """
+        return {
+            'index': self.index,
+            'timestamp': self.timestamp,
+            'previous_hash': self.previous_hash,
+            'merkle_root': self.merkle_root,
+            'nonce': self.nonce,
+            'difficulty': self.difficulty,
+            'bits': self.bits,
+            'hash': self.hash
+        }
+    
+    def get_merkle_proof(self, transaction_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Sinh Merkle inclusion proof cho một giao dịch trong block
+        
+        Args:
+            transaction_hash: Hash giao dịch cần chứng minh
+            
+        Returns:
+            Optional[Dict]: Header, vị trí và Merkle branch; None nếu giao dịch không có trong block
+        """
+        self.calculate_merkle_root()  # Dựng lại cây nếu danh sách giao dịch đã đổi
+        try:
+            position = self.merkle_tree.index_of(transaction_hash)
+        except ValueError:
+            return None
+        
+        return {
+            'transaction_hash': transaction_hash,
+            'position': position,
+            'branch': self.merkle_tree.get_proof(position),
+            'header': self.header_dict()
+        }
+    
+    def verify_transactions(self, verifier=None, height: Optional[int] = None):
+        """
+        Xác minh mọi giao dịch trong block qua pipeline chữ ký
+        
+        Args:
+            verifier: SignatureVerifier dùng chung (mặc định: xác minh tuần tự)
+            height: Chiều cao thực của block trong chain (None = bắt buộc Ed25519)
+            
+        Returns:
+            VerificationReport: Kết quả kèm lý do cho từng giao dịch không hợp lệ
+        """
+        from .verification import SignatureVerifier
+        return (verifier or SignatureVerifier()).verify_block(self, height)
+    
+    def is_valid(self, previous_block: Optional['Block'] = None, verifier=None,
+                 rules: Optional[BlockRules] = None, height: Optional[int] = None) -> bool:
         """
         Kiểm tra tính hợp lệ của block
         
         Args:
             previous_block: Block trước đó để kiểm tra liên kết
+            verifier: SignatureVerifier dùng để xác minh chữ ký (song song)
+            rules: Giới hạn kích thước và giao dịch thưởng (None = không kiểm tra)
+            height: Chiều cao thực của block trong chain; index của block phải bằng nó
+                (None = không rõ, chữ ký luôn phải là Ed25519)
             
         Returns:
             bool: True nếu block hợp lệ
         """
+        # 0. Index do block tự khai phải đúng vị trí của nó trong chain
+        if height is not None and self.index != height:
+            return False
+        
         # 1. Kiểm tra hash của chính nó có đúng không
         if self.hash != self.calculate_hash():
             return False
             
         # 2. Kiểm tra Proof of Work
-        if not self.hash.startswith("0" * self.difficulty):
+        if not self.meets_target():
             return False
         
         # 3. Kiểm tra liên kết với block trước
@@ -153,12 +442,12 @@ class Block:
         if self.merkle_root != self.calculate_merkle_root():
             return False
         
-        # 5. Kiểm tra tính hợp lệ của tất cả giao dịch
-        for transaction in self.transactions:
-            if not transaction.is_valid():
-                return False
+        # 5. Kiểm tra giới hạn kích thước và giao dịch thưởng
+        if rules is not None and rules.validation_error(self, height) is not None:
+            return False
         
-        return True
+        # 6. Kiểm tra tính hợp lệ của tất cả giao dịch
+        return self.verify_transactions(verifier, height).valid
     
     def __str__(self) -> str:
         """String representation của block"""
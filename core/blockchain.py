@@ -7,27 +7,87 @@ Dependencies: core/block.py, core/transaction.py
 """
 
 import json
+import time
+import threading
 from typing import List, Dict, Any, Optional
-from .block import Block
+from .block import Block, BlockRules
+from .chain_view import LazyChain, StoreHistoryIndex, StoreLookupIndex, StoreStateIndex
 from .transaction import Transaction
+from .mining import MiningJob
+from .telemetry import MiningTelemetry
+from .difficulty import DifficultyRetargeter, difficulty_to_target
+from .state import StateIndex
+from .indexes import AddressHistoryIndex, ChainLookupIndex
+from .mempool import Mempool, MempoolError, DuplicateTransactionError, InsufficientFundsError
+from .template import BlockTemplate, BlockTemplateBuilder
+from .verification import SignatureCache, SignatureVerifier, VerificationReport
+
+# Sai số cho phép khi so sánh số dư (float)
+BALANCE_TOLERANCE = 1e-9
 
 class Blockchain:
     """
     Lớp Blockchain quản lý toàn bộ chuỗi khối
     
     Attributes:
-        chain (List[Block]): Danh sách các block trong blockchain
-        difficulty (int): Độ khó khai thác
-        pending_transactions (List[Transaction]): Giao dịch chờ xử lý
-        mining_reward (float): Phần thưởng khai thác
+        chain (List[Block]): Danh sách các block trong blockchain (hoặc LazyChain đọc
+            block từ backend lưu trữ khi cần)
+        difficulty (int): Độ khó ban đầu (số chữ số hex 0), dùng cho genesis block
+        retargeter (DifficultyRetargeter): Điều chỉnh target theo cửa sổ trượt
+        mempool (Mempool): Giao dịch chờ xử lý, có giới hạn và ưu tiên theo phí
+        pending_transactions (List[Transaction]): Giao dịch trong mempool theo thứ tự nhận vào
+        mining_reward (float): Phần thưởng khai thác (chưa gồm phí giao dịch)
+        template_builder (BlockTemplateBuilder): Chọn giao dịch cho block mới, giữ template gần nhất
+        mining_workers (int): Số process khai thác song song (0 = số CPU)
+        current_mining_job (Optional[MiningJob]): Job khai thác đang chạy
+        telemetry (MiningTelemetry): Thống kê khai thác của node
+        state (StateIndex): Số dư / nonce theo địa chỉ, cập nhật khi nối hoặc gỡ block
+            (StoreStateIndex đọc từ store khi chain là LazyChain có chỉ mục truy vấn)
+        history_index (AddressHistoryIndex): Posting list lịch sử giao dịch theo địa chỉ
+            (hoặc StoreHistoryIndex)
+        lookup_index (ChainLookupIndex): Hash giao dịch / hash block -> vị trí trong chain
+            (hoặc StoreLookupIndex)
+        signature_verifier (SignatureVerifier): Pipeline xác minh chữ ký cho block và mempool
+        validated_height (int): Chiều cao cao nhất đã được xác thực (-1 = chưa xác thực)
+        validated_tip_hash (Optional[str]): Hash của block tại validated_height
+        last_full_verification (Optional[Dict]): Kết quả lần xác minh toàn chuỗi gần nhất
+        chain_verifier (Optional[ParallelChainVerifier]): Verifier song song cho verify_chain
+            (None = xác minh tuần tự)
     """
     
-    def __init__(self):
-        """Khởi tạo blockchain với genesis block"""
+    def __init__(self, difficulty: int = 2, target_block_time: float = 10, difficulty_adjustment_blocks: int = 10):
+        """
+        Khởi tạo blockchain với genesis block
+        
+        Args:
+            difficulty: Độ khó ban đầu (số lượng số 0 đầu tiên)
+            target_block_time: Thời gian mục tiêu giữa các block (giây)
+            difficulty_adjustment_blocks: Số block trong cửa sổ điều chỉnh độ khó
+        """
         self.chain: List[Block] = []
-        self.difficulty = 2  # Độ khó mặc định (số lượng số 0 đầu tiên)
-        self.pending_transactions: List[Transaction] = []
+        self.difficulty = difficulty
+        self.retargeter = DifficultyRetargeter(
+            window=difficulty_adjustment_blocks,
+            target_block_time=target_block_time,
+            initial_target=difficulty_to_target(difficulty)
+        )
+        self.mempool = Mempool()
         self.mining_reward = 10.0
+        self.template_builder = BlockTemplateBuilder()
+        self.mining_workers = 1
+        self.current_mining_job: Optional[MiningJob] = None
+        self.telemetry = MiningTelemetry()
+        self.state = StateIndex()
+        self.history_index = AddressHistoryIndex()
+        self.lookup_index = ChainLookupIndex()
+        self.signature_verifier = SignatureVerifier(cache=SignatureCache())
+        self.lock = threading.RLock()
+        
+        # Watermark: chain[0..validated_height] đã được xác thực
+        self.validated_height = -1
+        self.validated_tip_hash: Optional[str] = None
+        self.last_full_verification: Optional[Dict[str, Any]] = None
+        self.chain_verifier = None
         
         # Tạo genesis block
         self.create_genesis_block()
@@ -37,6 +97,115 @@ class Blockchain:
         genesis_block = Block(0, [], "0")
         genesis_block.mine_block(self.difficulty)
         self.chain.append(genesis_block)
+        self._on_block_appended(genesis_block)
+    
+    def _on_block_appended(self, block: Block):
+        """Cập nhật các trạng thái dẫn xuất sau khi một block được nối vào chain"""
+        self.retargeter.append_block(block)
+        self.state.apply_block(block, len(self.chain) - 1)
+        self.history_index.append_block(block, len(self.chain) - 1)
+        self.lookup_index.append_block(block, len(self.chain) - 1)
+        self._advance_watermark(block)
+    
+    def _advance_watermark(self, block: Block):
+        """
+        Dời watermark lên block vừa nối (O(1))
+        
+        Block đi qua add_block đã được xác thực, block tự khai thác và genesis do
+        node tạo ra; watermark chỉ tiến nếu block nối tiếp đúng đỉnh đã xác thực.
+        """
+        if block.previous_hash == (self.validated_tip_hash or "0"):
+            self.validated_height = len(self.chain) - 1
+            self.validated_tip_hash = block.hash
+    
+    def load_chain(self, blocks: List[Block]):
+        """
+        Thay toàn bộ chain (ví dụ khi nạp từ file) và dựng lại trạng thái dẫn xuất
+        
+        LazyChain được giữ nguyên (không nạp block vào bộ nhớ); nếu store của nó có
+        chỉ mục truy vấn thì state / history / lookup đọc thẳng từ chỉ mục đó (không
+        duyệt chain). Với chain dạng list, các chỉ mục trong bộ nhớ được dựng lại
+        trong một lượt duyệt chain.
+        
+        Args:
+            blocks: Danh sách block, bắt đầu từ genesis, hoặc LazyChain
+        """
+        with self.lock:
+            self.chain = blocks if isinstance(blocks, LazyChain) else list(blocks)
+            # Chỉ đọc window + 1 block cuối
+            self.retargeter.rebuild(self.chain)
+            if isinstance(self.chain, LazyChain) and self.chain.supports_queries:
+                store = self.chain.store
+                self.state = StoreStateIndex(store)
+                self.history_index = StoreHistoryIndex(store)
+                self.lookup_index = StoreLookupIndex(store)
+            else:
+                self.state = StateIndex()
+                self.history_index = AddressHistoryIndex()
+                self.lookup_index = ChainLookupIndex()
+                for height, block in enumerate(self.chain):
+                    self.state.apply_block(block, height)
+                    self.history_index.append_block(block, height)
+                    self.lookup_index.append_block(block, height)
+            # Chain nạp từ ngoài chưa được xác thực: cần restore_watermark() / verify_new_blocks()
+            self.validated_height = -1
+            self.validated_tip_hash = None
+    
+    def restore_watermark(self, height: int, tip_hash: Optional[str]) -> bool:
+        """
+        Tin watermark đã lưu (ví dụ cùng backend lưu block) nếu nó vẫn khớp chain
+        
+        Args:
+            height: Chiều cao cao nhất đã xác thực
+            tip_hash: Hash của block tại height
+            
+        Returns:
+            bool: True nếu watermark được dùng
+        """
+        with self.lock:
+            if tip_hash is None or not 0 <= height < len(self.chain) or self.chain[height].hash != tip_hash:
+                return False
+            self.validated_height = height
+            self.validated_tip_hash = tip_hash
+            return True
+    
+    def verify_new_blocks(self) -> Dict[str, Any]:
+        """
+        Xác minh các block phía trên watermark rồi dời watermark lên (O(block mới))
+        
+        Dùng khi khởi động sau restore_watermark(); xác minh lại toàn chuỗi là thao
+        tác riêng (verify_chain, chạy theo lịch).
+        
+        Returns:
+            Dict: Kết quả (valid, invalid_height, validated_height, blocks, elapsed)
+        """
+        start_time = time.time()
+        with self.lock:
+            start = max(1, self.validated_height + 1)
+            invalid_height = self.find_invalid_block(start=start)
+            last_valid = len(self.chain) - 1 if invalid_height is None else invalid_height - 1
+            self.validated_height = last_valid
+            self.validated_tip_hash = self.chain[last_valid].hash
+            return {
+                'valid': invalid_height is None,
+                'invalid_height': invalid_height,
+                'validated_height': self.validated_height,
+                'blocks': max(0, len(self.chain) - start),
+                'elapsed': time.time() - start_time
+            }
+    
+    def get_next_bits(self) -> int:
+        """Target dạng compact bắt buộc cho block kế tiếp"""
+        return self.retargeter.next_bits()
+    
+    def get_next_target(self) -> int:
+        """Target 256-bit bắt buộc cho block kế tiếp"""
+        return self.retargeter.next_target()
+    
+    @property
+    def current_difficulty(self) -> float:
+        """Độ khó hiện tại (số chữ số hex 0 tương đương, có phần lẻ)"""
+        return self.retargeter.next_difficulty()
     
     def get_latest_block(self) -> Block:
         """
@@ -47,55 +216,257 @@ class Blockchain:
         """
         return self.chain[-1]
     
-    def add_transaction(self, transaction: Transaction):
+    @property
+    def pending_transactions(self) -> List[Transaction]:
+        """Giao dịch trong mempool theo thứ tự nhận vào (bản sao)"""
+        return self.mempool.transactions()
+    
+    @pending_transactions.setter
+    def pending_transactions(self, transactions: List[Transaction]):
+        """Thay toàn bộ mempool (ví dụ khi nạp từ file); giao dịch không vừa bị bỏ"""
+        with self.lock:
+            self.mempool.clear()
+            for transaction in transactions:
+                try:
+                    self.mempool.add(transaction)
+                except MempoolError:
+                    pass
+    
+    def is_known_transaction(self, transaction_hash: str) -> bool:
+        """Giao dịch đã có trong mempool hoặc trong chain (O(1))"""
+        return transaction_hash in self.mempool or self.lookup_index.locate_transaction(transaction_hash) is not None
+    
+    def add_transaction(self, transaction: Transaction) -> bool:
         """
-        Thêm giao dịch vào pending pool
+        Thêm giao dịch vào mempool
+        
+        Giao dịch đã biết (trong mempool hoặc đã được xác nhận) bị bỏ qua trước khi
+        xác minh chữ ký, nên cùng một giao dịch được relay nhiều lần chỉ tốn một lần
+        tra cứu.
         
         Args:
             transaction: Giao dịch cần thêm
+            
+        Returns:
+            bool: True nếu đã thêm, False nếu giao dịch trùng
+            
+        Raises:
+            ValueError: Nếu giao dịch không hợp lệ
+            InsufficientFundsError: Nếu số dư khả dụng của người gửi không đủ
+            MempoolError: Nếu giao dịch quá lớn hoặc phí quá thấp khi mempool đầy
         """
-        if transaction.is_valid():
-            self.pending_transactions.append(transaction)
-        else:
+        if self.is_known_transaction(transaction.transaction_hash):
+            self.mempool.record_duplicate()
+            return False
+        # Qua signature_verifier để chữ ký được ghi vào cache dùng lại khi xác minh block
+        if not self.signature_verifier.verify_transactions([transaction]).valid:
             raise ValueError("Giao dịch không hợp lệ")
+        with self.lock:
+            # Đếm là trùng nếu bị chèn trong lúc xác minh chữ ký
+            if self.lookup_index.locate_transaction(transaction.transaction_hash) is not None:
+                self.mempool.record_duplicate()
+                return False
+            try:
+                self._check_funds(transaction)
+                self.mempool.add(transaction)
+            except DuplicateTransactionError:
+                return False
+            return True
     
-    def mine_pending_transactions(self, mining_reward_address: str) -> Block:
+    def _check_funds(self, transaction: Transaction):
         """
-        Khai thác tất cả giao dịch pending thành một block mới
+        Từ chối giao dịch chi quá số dư khả dụng của người gửi (O(1))
+        
+        Raises:
+            InsufficientFundsError: Nếu số dư khả dụng không đủ
+        """
+        if transaction.sender is None:
+            return
+        spendable = self.get_spendable_balance(transaction.sender)
+        if transaction.total_debit > spendable + BALANCE_TOLERANCE:
+            raise InsufficientFundsError(
+                f"Insufficient balance. Available: {spendable}, Required: {transaction.total_debit}"
+            )
+    
+    def add_transactions(self, transactions: List[Transaction]) -> VerificationReport:
+        """
+        Thêm một loạt giao dịch (ví dụ nhận dồn dập từ mạng) vào pending pool
+        
+        Giao dịch trùng (đã biết hoặc lặp lại trong loạt) bị bỏ trước khi xác minh.
+        Chữ ký của phần còn lại được xác minh một lần qua signature_verifier; giao
+        dịch hợp lệ được thêm, giao dịch lỗi (hoặc bị mempool từ chối) được báo trong
+        report.failures.
+        
+        Args:
+            transactions: Các giao dịch cần thêm
+            
+        Returns:
+            VerificationReport: Kết quả xác minh từng giao dịch
+        """
+        unique: Dict[str, Transaction] = {}
+        for transaction in transactions:
+            tx_hash = transaction.transaction_hash
+            if tx_hash in unique or self.is_known_transaction(tx_hash):
+                self.mempool.record_duplicate()
+            else:
+                unique[tx_hash] = transaction
+        
+        report = self.signature_verifier.verify_transactions(list(unique.values()))
+        with self.lock:
+            for tx_hash, transaction in unique.items():
+                if tx_hash in report.failures:
+                    continue
+                if self.lookup_index.locate_transaction(tx_hash) is not None:
+                    self.mempool.record_duplicate()
+                    continue
+                try:
+                    self._check_funds(transaction)
+                    self.mempool.add(transaction)
+                except DuplicateTransactionError:
+                    pass
+                except MempoolError as e:
+                    report.failures[tx_hash] = str(e)
+        return report
+    
+    def create_block_template(self, mining_reward_address: str) -> Block:
+        """
+        Dựng block chưa khai thác trên đỉnh chuỗi hiện tại
         
         Args:
             mining_reward_address: Địa chỉ nhận phần thưởng khai thác
             
         Returns:
-            Block: Block vừa được khai thác
+            Block: Block gồm các giao dịch được template_builder chọn và giao dịch thưởng
         """
-        # Thêm giao dịch reward cho miner
-        reward_transaction = Transaction(
-            sender=None,  # System transaction
-            receiver=mining_reward_address,
-            amount=self.mining_reward,
-            data={"type": "mining_reward"}
+        with self.lock:
+            # Khai thác luôn dùng template mới nhất (và làm mới template đang giữ)
+            template = self.template_builder.build(self)
+            
+            # Thêm giao dịch reward cho miner (phần thưởng + phí của các giao dịch được chọn)
+            reward_transaction = Transaction(
+                sender=None,  # System transaction
+                receiver=mining_reward_address,
+                amount=template.reward,
+                data={"type": "mining_reward"}
+            )
+            
+            block = Block(
+                index=template.height,
+                transactions=template.transactions + [reward_transaction],
+                previous_hash=template.previous_hash
+            )
+            block.set_target(template.target)
+            return block
+    
+    def block_rules(self) -> BlockRules:
+        """Giới hạn kích thước và phần thưởng áp dụng khi xác thực block"""
+        return BlockRules(
+            mining_reward=self.mining_reward,
+            max_transactions=self.template_builder.max_transactions,
+            max_bytes=self.template_builder.max_bytes
         )
+    
+    def get_block_template(self) -> BlockTemplate:
+        """
+        Template cho miner bên ngoài (giữ lại giữa các lần gọi, xem BlockTemplateBuilder)
         
-        # Thêm reward transaction vào pending
-        transactions_to_mine = self.pending_transactions + [reward_transaction]
+        Returns:
+            BlockTemplate: Giao dịch được chọn và header của block kế tiếp (chưa có giao dịch thưởng)
+        """
+        return self.template_builder.get_template(self)
+    
+    def mine_pending_transactions(self, mining_reward_address: str) -> Optional[Block]:
+        """
+        Khai thác tất cả giao dịch pending thành một block mới
         
-        # Tạo block mới
-        block = Block(
-            index=len(self.chain),
-            transactions=transactions_to_mine,
-            previous_hash=self.get_latest_block().hash
-        )
+        Việc khai thác chạy như một MiningJob: nếu có block mới ở đỉnh chuỗi trong lúc
+        đào, job dựng lại block trên đỉnh mới thay vì đào tiếp trên đỉnh cũ.
         
-        # Khai thác block
-        block.mine_block(self.difficulty)
+        Args:
+            mining_reward_address: Địa chỉ nhận phần thưởng khai thác
+            
+        Returns:
+            Optional[Block]: Block vừa được khai thác, None nếu job bị huỷ
+        """
+        return self.run_mining_job(MiningJob(self, mining_reward_address, self.mining_workers))
+    
+    def run_mining_job(self, job: MiningJob) -> Optional[Block]:
+        """
+        Chạy một mining job đã tạo sẵn (đồng bộ) và đăng ký nó là job hiện tại
         
-        # Thêm vào chain và clear pending
-        self.chain.append(block)
-        self.pending_transactions = []
+        Args:
+            job: MiningJob cần chạy
+            
+        Returns:
+            Optional[Block]: Block vừa được khai thác, None nếu job bị huỷ
+        """
+        self.current_mining_job = job
+        try:
+            block = job.run()
+        finally:
+            if self.current_mining_job is job:
+                self.current_mining_job = None
+        
+        if block:
+            print(f"Block mined: {block.hash} / Đã đào xong khối: {block.hash}")
+        return block
+    
+    def append_mined_block(self, block: Block) -> bool:
+        """
+        Thêm block vừa khai thác vào chain nếu nó vẫn nối tiếp đỉnh hiện tại
+        
+        Returns:
+            bool: False nếu đỉnh chuỗi đã thay đổi trong lúc khai thác
+        """
+        with self.lock:
+            if block.previous_hash != self.get_latest_block().hash:
+                return False
+            self.chain.append(block)
+            self._on_block_appended(block)
+            self.clear_transactions_from_mempool(block.transactions)
+            self._evict_overdrafts(tx.sender for tx in block.transactions)
+            return True
+    
+    def remove_last_block(self) -> Optional[Block]:
+        """
+        Gỡ block ở đỉnh chain (ví dụ khi chuyển sang nhánh khác) và hoàn tác trạng thái
+        
+        Giao dịch người dùng trong block được trả lại mempool; giao dịch thưởng bị bỏ.
         
+        Returns:
+            Optional[Block]: Block đã gỡ, None nếu chỉ còn genesis
+        """
+        with self.lock:
+            if len(self.chain) <= 1:
+                return None
+            block = self.chain.pop()
+            self.state.rollback_block(block, len(self.chain))
+            self.history_index.rollback_block(block, len(self.chain))
+            self.lookup_index.rollback_block(block, len(self.chain))
+            self.retargeter.rebuild(self.chain)
+            if self.validated_height >= len(self.chain):
+                self.validated_height = len(self.chain) - 1
+                self.validated_tip_hash = self.chain[-1].hash
+            
+            for transaction in block.transactions:
+                if transaction.sender is not None and transaction.transaction_hash not in self.mempool:
+                    try:
+                        self.mempool.add(transaction)
+                    except MempoolError:
+                        # Mempool đầy giao dịch phí cao hơn
+                        pass
+            # Người nhận trong block bị gỡ mất khoản nhận (ví dụ phần thưởng)
+            self._evict_overdrafts(tx.receiver for tx in block.transactions)
+        
+        self.notify_new_tip()
         return block
     
+    def notify_new_tip(self):
+        """Báo cho job khai thác đang chạy rằng đỉnh chuỗi đã thay đổi"""
+        job = self.current_mining_job
+        if job:
+            job.notify_new_tip()
+    
     def add_block(self, block: Block) -> bool:
         """
         Thêm một block nhận từ mạng vào chuỗi (sau khi xác thực)
@@ -103,23 +474,57 @@ class Blockchain:
         Returns:
             bool: True nếu thêm thành công
         """
-        latest_block = self.get_latest_block()
-        if block.is_valid(latest_block):
+        with self.lock:
+            # Index do block tự khai phải đúng chiều cao nó sẽ chiếm trong chain
+            if block.index != len(self.chain):
+                return False
+            # Giao dịch đã được xác nhận không được ghi vào chain lần nữa (replay)
+            if self._contains_confirmed_or_repeated(block):
+                return False
+            latest_block = self.get_latest_block()
+            if not block.is_valid(latest_block, self.signature_verifier, self.block_rules(), len(self.chain)):
+                return False
+            # Target của block phải khó ít nhất bằng target bắt buộc
+            if block.target > self.get_next_target():
+                return False
             self.chain.append(block)
+            self._on_block_appended(block)
             self.clear_transactions_from_mempool(block.transactions)
-            return True
+            self._evict_overdrafts(tx.sender for tx in block.transactions)
+        
+        self.notify_new_tip()
+        return True
+
+    def _contains_confirmed_or_repeated(self, block: Block) -> bool:
+        """Block có giao dịch đã nằm trong chain hoặc lặp lại trong chính nó (O(số giao dịch))"""
+        seen = set()
+        for transaction in block.transactions:
+            tx_hash = transaction.transaction_hash
+            if tx_hash in seen or self.lookup_index.locate_transaction(tx_hash) is not None:
+                return True
+            seen.add(tx_hash)
         return False
 
-    def clear_transactions_from_mempool(self, mined_transactions: List[Transaction]):
-        """Xóa các giao dịch đã được đào khỏi mempool."""
-        mined_tx_hashes = {tx.transaction_hash for tx in mined_transactions}
-        self.pending_transactions = [
-            tx for tx in self.pending_transactions if tx.transaction_hash not in mined_tx_hashes
-        ]
+    def clear_transactions_from_mempool(self, mined_transactions: List[Transaction]) -> int:
+        """Xóa các giao dịch đã được đào khỏi mempool (O(số giao dịch trong block))."""
+        return self.mempool.remove_many(tx.transaction_hash for tx in mined_transactions)
+    
+    def _evict_overdrafts(self, addresses):
+        """
+        Bỏ giao dịch chờ mới nhất của các địa chỉ có tổng chờ chi vượt số dư đã xác
+        nhận (ví dụ sau block chứa giao dịch chi tiêu xung đột từ node khác)
+        """
+        for address in set(addresses):
+            if address is None or self.get_spendable_balance(address) >= -BALANCE_TOLERANCE:
+                continue
+            for transaction in reversed(self.mempool.transactions_from(address)):
+                self.mempool.remove(transaction.transaction_hash)
+                if self.get_spendable_balance(address) >= -BALANCE_TOLERANCE:
+                    break
 
     def get_balance(self, address: str) -> float:
         """
-        Tính số dư của một địa chỉ
+        Lấy số dư của một địa chỉ từ state index (O(1))
         
         Args:
             address: Địa chỉ ví cần kiểm tra
@@ -127,38 +532,259 @@ class Blockchain:
         Returns:
             float: Số dư hiện tại
         """
-        balance = 0.0
+        return self.state.get_balance(address)
+    
+    def get_spendable_balance(self, address: str) -> float:
+        """
+        Số dư khả dụng: số dư đã xác nhận trừ số tiền + phí đang chờ chi trong mempool (O(1))
         
-        # Duyệt qua tất cả block (trừ genesis)
-        for block in self.chain[1:]:
-            for transaction in block.transactions:
-                if transaction.sender == address:
-                    balance -= transaction.amount
-                if transaction.receiver == address:
-                    balance += transaction.amount
+        Khoản đang chờ nhận chưa được tính cho tới khi được xác nhận.
+        """
+        return self.state.get_balance(address) - self.mempool.pending_debit(address)
+    
+    def get_account(self, address: str) -> Dict[str, Any]:
+        """
+        Trạng thái tài khoản (số dư, nonce, số giao dịch) từ state index, kèm
+        khoản đang chờ chi / nhận trong mempool
         
-        return balance
+        Args:
+            address: Địa chỉ ví
+            
+        Returns:
+            Dict: Trạng thái tài khoản
+        """
+        account = self.state.get_account(address)
+        account['pending_debit'] = self.mempool.pending_debit(address)
+        account['pending_credit'] = self.mempool.pending_credit(address)
+        account['spendable'] = account['balance'] - account['pending_debit']
+        return account
     
-    def is_chain_valid(self) -> bool:
+    def verify_state(self) -> List[str]:
         """
-        Kiểm tra tính hợp lệ của toàn bộ blockchain
+        Đối chiếu state index với trạng thái dựng lại từ chain (O(chain))
         
         Returns:
-            bool: True nếu blockchain hợp lệ
+            List[str]: Các địa chỉ bị lệch (rỗng nếu khớp)
         """
-        for i in range(1, len(self.chain)):
-            current_block = self.chain[i]
-            previous_block = self.chain[i - 1]
+        with self.lock:
+            chain = self.chain.copy()
+        return self.state.verify(chain)
+    
+    def rebuild_state(self):
+        """Dựng lại state index từ chain (O(chain))"""
+        with self.lock:
+            self.state.rebuild(self.chain)
+    
+    def find_transaction(self, transaction_hash: str) -> Optional[Block]:
+        """
+        Tìm block chứa giao dịch (O(1) qua lookup_index)
+        
+        Args:
+            transaction_hash: Hash giao dịch
             
-            # Kiểm tra block hiện tại
-            if not current_block.is_valid(previous_block):
-                return False
+        Returns:
+            Optional[Block]: Block chứa giao dịch, None nếu không tìm thấy
+        """
+        location = self.lookup_index.locate_transaction(transaction_hash)
+        if location is None:
+            return None
+        return self.chain[location[0]]
+    
+    def get_transaction(self, transaction_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Tra cứu một giao dịch đã vào chain
+        
+        Args:
+            transaction_hash: Hash giao dịch
+            
+        Returns:
+            Optional[Dict]: Giao dịch kèm block_index, block_hash, position và confirmations
+        """
+        with self.lock:
+            location = self.lookup_index.locate_transaction(transaction_hash)
+            if location is None:
+                return None
+            height, position = location
+            block = self.chain[height]
+            tx_data = block.transactions[position].to_dict()
+            tx_data['block_index'] = block.index
+            tx_data['block_hash'] = block.hash
+            tx_data['block_timestamp'] = block.timestamp
+            tx_data['position'] = position
+            tx_data['confirmations'] = len(self.chain) - height
+            return tx_data
+    
+    def get_block_by_height(self, height: int) -> Optional[Block]:
+        """
+        Lấy block theo chiều cao (O(1))
+        
+        Returns:
+            Optional[Block]: Block, None nếu chiều cao nằm ngoài chain
+        """
+        if not 0 <= height < len(self.chain):
+            return None
+        return self.chain[height]
+    
+    def get_block_by_hash(self, block_hash: str) -> Optional[Block]:
+        """
+        Lấy block theo hash (O(1) qua lookup_index)
+        
+        Returns:
+            Optional[Block]: Block, None nếu không có trong chain
+        """
+        height = self.lookup_index.block_height(block_hash)
+        if height is None:
+            return None
+        return self.chain[height]
+    
+    def get_transaction_proof(self, transaction_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Sinh Merkle inclusion proof (SPV) cho giao dịch đã được đưa vào block
+        
+        Returns:
+            Optional[Dict]: Proof gồm header và Merkle branch, None nếu không tìm thấy
+        """
+        block = self.find_transaction(transaction_hash)
+        if block is None:
+            return None
+        return block.get_merkle_proof(transaction_hash)
+    
+    def _new_retargeter(self) -> DifficultyRetargeter:
+        """Retargeter rỗng cùng tham số, dùng để phát lại điều chỉnh độ khó từ genesis"""
+        return DifficultyRetargeter(
+            window=self.retargeter.window,
+            target_block_time=self.retargeter.target_block_time,
+            initial_target=self.retargeter.initial_target
+        )
+    
+    def find_invalid_block(self, chain: Optional[List[Block]] = None, start: int = 1) -> Optional[int]:
+        """
+        Duyệt chuỗi từ chiều cao start và tìm block không hợp lệ đầu tiên (O(chain - start))
+        
+        Args:
+            chain: Danh sách block cần kiểm tra (mặc định: chain hiện tại)
+            start: Chiều cao đầu tiên cần kiểm tra (các block trước đó được coi là hợp lệ)
+            
+        Returns:
+            Optional[int]: Chỉ số block không hợp lệ đầu tiên, None nếu toàn bộ hợp lệ
+        """
+        chain = self.chain if chain is None else chain
+        start = max(1, start)
+        
+        # Phát lại việc điều chỉnh độ khó (từ cửa sổ ngay trước start) để kiểm tra target của từng block
+        retargeter = self._new_retargeter()
+        retargeter.rebuild(chain[max(0, start - retargeter.window - 1):start])
+        rules = self.block_rules()
+        
+        for i in range(start, len(chain)):
+            current_block = chain[i]
+            previous_block = chain[i - 1]
+            
+            # Kiểm tra block hiện tại (index phải bằng vị trí i)
+            if not current_block.is_valid(previous_block, self.signature_verifier, rules, i):
+                return i
             
             # Kiểm tra liên kết với block trước
             if current_block.previous_hash != previous_block.hash:
-                return False
+                return i
+            
+            # Mọi block sau genesis (kể cả block cũ chỉ có difficulty) phải đạt target bắt buộc
+            if current_block.target > retargeter.next_target():
+                return i
+            retargeter.append_block(current_block)
         
-        return True
+        return None
+    
+    def is_chain_valid(self) -> bool:
+        """
+        Kiểm tra tính hợp lệ của toàn bộ blockchain (xác minh lại mọi block, O(chain))
+        
+        Để kiểm tra nhanh, dùng is_chain_validated().
+        
+        Returns:
+            bool: True nếu blockchain hợp lệ
+        """
+        return self.find_invalid_block() is None
+    
+    def is_chain_validated(self) -> bool:
+        """
+        Trạng thái hợp lệ theo watermark (O(1))
+        
+        Returns:
+            bool: True nếu watermark đang ở đúng đỉnh chuỗi
+        """
+        chain = self.chain
+        return self.validated_height == len(chain) - 1 and self.validated_tip_hash == chain[-1].hash
+    
+    def verify_chain(self) -> Dict[str, Any]:
+        """
+        Xác minh lại toàn bộ chuỗi và đặt lại watermark
+        
+        Chạy trên bản chụp của chain nên không giữ lock trong lúc xác minh; các block
+        được nối thêm trong lúc đó đã được xác thực khi nhận.
+        
+        Returns:
+            Dict: Kết quả (valid, invalid_height, validated_height, blocks, elapsed, finished_at)
+        """
+        start_time = time.time()
+        with self.lock:
+            snapshot = self.chain.copy()
+        
+        if self.chain_verifier is not None:
+            result = self.chain_verifier.verify(snapshot, self._new_retargeter(), rules=self.block_rules())
+            invalid_height = result.invalid_height
+            details = {'workers': result.workers, 'ranges': result.ranges}
+        else:
+            invalid_height = self.find_invalid_block(snapshot)
+            details = {'workers': 1, 'ranges': 1}
+        
+        with self.lock:
+            if invalid_height is not None:
+                self.validated_height = invalid_height - 1
+                self.validated_tip_hash = snapshot[invalid_height - 1].hash
+            elif len(self.chain) >= len(snapshot) and self.chain[len(snapshot) - 1].hash == snapshot[-1].hash:
+                self.validated_height = len(self.chain) - 1
+                self.validated_tip_hash = self.chain[-1].hash
+            else:
+                # Chain bị thay thế trong lúc xác minh: kết quả không còn áp dụng
+                self.validated_height = -1
+                self.validated_tip_hash = None
+            
+            self.last_full_verification = {
+                'valid': invalid_height is None,
+                'invalid_height': invalid_height,
+                'validated_height': self.validated_height,
+                'blocks': len(snapshot),
+                'elapsed': time.time() - start_time,
+                'finished_at': time.time(),
+                **details
+            }
+            elapsed = self.last_full_verification['elapsed']
+            self.last_full_verification['blocks_per_second'] = len(snapshot) / elapsed if elapsed > 0 else 0.0
+            return dict(self.last_full_verification)
+    
+    def get_verification_progress(self) -> Optional[Dict[str, Any]]:
+        """Tiến độ xác minh toàn chuỗi (chỉ có khi dùng chain_verifier)"""
+        if self.chain_verifier is None:
+            return None
+        return self.chain_verifier.get_progress()
+    
+    def get_validation_status(self) -> Dict[str, Any]:
+        """
+        Trạng thái xác thực của chuỗi (O(1), dùng cho /status)
+        
+        Returns:
+            Dict: Chiều cao, watermark và kết quả lần xác minh toàn chuỗi gần nhất
+        """
+        chain = self.chain
+        return {
+            'is_valid': self.is_chain_validated(),
+            'height': len(chain) - 1,
+            'tip_hash': chain[-1].hash,
+            'validated_height': self.validated_height,
+            'validated_tip_hash': self.validated_tip_hash,
+            'last_full_verification': self.last_full_verification
+        }
     
     @staticmethod
     def block_from_dict(block_data: Dict[str, Any]) -> Block:
@@ -173,6 +799,7 @@ class Blockchain:
         block.merkle_root = block_data['merkle_root']
         block.nonce = block_data['nonce']
         block.difficulty = block_data['difficulty']
+        block.bits = block_data.get('bits')
         block.hash = block_data['hash']
         return block
 
@@ -186,7 +813,7 @@ class Blockchain:
         return {
             'chain': [block.to_dict() for block in self.chain],
             'difficulty': self.difficulty,
-            'pending_transactions': [tx.to_dict() for tx in self.pending_transactions],
+            'pending_transactions': [tx.to_dict() for tx in self.mempool],
             'mining_reward': self.mining_reward
         }
     
@@ -195,33 +822,56 @@ class Blockchain:
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
     
-    def get_transaction_history(self, address: str) -> List[Dict]:
+    def get_transaction_history(self, address: str, limit: Optional[int] = None,
+                                cursor: Optional[int] = None) -> List[Dict]:
         """
-        Lấy lịch sử giao dịch của một địa chỉ
+        Lấy lịch sử giao dịch của một địa chỉ (theo thứ tự chain)
         
         Args:
             address: Địa chỉ cần tra cứu
+            limit: Số giao dịch tối đa (None = tất cả)
+            cursor: Vị trí bắt đầu trong lịch sử (xem get_transaction_history_page)
             
         Returns:
             List[Dict]: Danh sách giao dịch liên quan
         """
-        history = []
-        
-        for block in self.chain[1:]:  # Skip genesis block
-            for transaction in block.transactions:
-                if transaction.sender == address or transaction.receiver == address:
-                    tx_data = transaction.to_dict()
-                    tx_data['block_index'] = block.index
-                    tx_data['block_timestamp'] = block.timestamp
-                    history.append(tx_data)
+        if limit is None:
+            limit = self.history_index.count(address)
+        return self.get_transaction_history_page(address, limit, cursor)['transactions']
+    
+    def get_transaction_history_page(self, address: str, limit: int = 100, cursor: Optional[int] = None,
+                                     descending: bool = False) -> Dict[str, Any]:
+        """
+        Một trang lịch sử giao dịch từ posting list (O(limit), không quét chain)
         
-        return history
+        Args:
+            address: Địa chỉ cần tra cứu
+            limit: Số giao dịch tối đa trong trang
+            cursor: Cursor trả về từ trang trước (None = trang đầu)
+            descending: True để lấy giao dịch mới nhất trước
+            
+        Returns:
+            Dict: transactions, next_cursor (None nếu hết) và total
+        """
+        with self.lock:
+            postings, next_cursor = self.history_index.page(address, max(0, limit), cursor, descending)
+            history = []
+            for height, position in postings:
+                block = self.chain[height]
+                tx_data = block.transactions[position].to_dict()
+                tx_data['block_index'] = block.index
+                tx_data['block_timestamp'] = block.timestamp
+                history.append(tx_data)
+            
+            return {
+                'transactions': history,
+                'next_cursor': next_cursor,
+                'total': self.history_index.count(address)
+            }
     
     def __str__(self) -> str:
         """String representation của blockchain"""
-        return f"Blockchain(blocks: {len(self.chain)}, pending: {len(self.pending_transactions)})"
+        return f"Blockchain(blocks: {len(self.chain)}, pending: {len(self.mempool)})"
 
-# TODO: Implement transaction fees
-# TODO: Add mempool management
 # TODO: Implement different consensus algorithms
 # TODO: Add blockchain state snapshots 
\ No newline at end of file
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Chain View Module
+File: core/chain_view.py
+Purpose: Chain dạng sequence trên backend lưu block: block được đọc theo chiều cao
+         và dựng thành đối tượng Block khi cần (có cache LRU), block mới nối / gỡ
+         được ghi thẳng xuống store; các chỉ mục trạng thái / lịch sử / tra cứu
+         đọc từ chỉ mục truy vấn của store thay vì dựng lại trong bộ nhớ
+Dependencies: core/blockchain.py (block_from_dict), core/state.py, storage/base.py
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_BLOCK_CACHE_SIZE = 1024
+
+class LazyChain(Sequence):
+    """
+    Chain chỉ đọc từ store khi cần
+
+    Block được đọc từ store theo chiều cao; block dựng từ store được giữ trong
+    cache LRU tối đa cache_size block. append() và pop() ghi thẳng xuống store
+    (store.append / store.truncate) nên chỉ mục truy vấn của store luôn khớp với
+    chain; sync() chỉ còn ghi bền vững các thay đổi đó.
+
+    Hỗ trợ các thao tác Blockchain dùng trên list: len, chỉ số (kể cả âm), slice
+    (trả về list), duyệt, append, pop và copy.
+
+    Attributes:
+        store (BlockStore): Backend chứa các block
+        cache_size (int): Số block tối đa giữ trong cache
+        hits (int): Số lần đọc block có sẵn trong cache
+        misses (int): Số lần phải dựng block từ store
+    """
+
+    def __init__(self, store, cache_size: int = DEFAULT_BLOCK_CACHE_SIZE):
+        """
+        Tạo view trên toàn bộ block trong store
+
+        Args:
+            store: Backend lưu block (BlockStore)
+            cache_size: Số block tối đa giữ trong cache
+        """
+        self.store = store
+        self.cache_size = max(1, cache_size)
+        self.hits = 0
+        self.misses = 0
+        # Chiều dài cố định của bản chụp chỉ đọc (copy()); None = theo store
+        self._length: Optional[int] = None
+        self._unsynced = 0
+        self._cache: 'OrderedDict[int, Any]' = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.store) if self._length is None else self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            with self._lock:
+                return [self._block(height) for height in range(*index.indices(len(self)))]
+        with self._lock:
+            height = range(len(self))[index]
+            return self._block(height)
+
+    def _block(self, height: int):
+        """Block tại chiều cao (không âm, trong phạm vi)"""
+        block = self._cache.get(height)
+        if block is not None:
+            self._cache.move_to_end(height)
+            self.hits += 1
+            return block
+        from .blockchain import Blockchain
+        block = Blockchain.block_from_dict(self.store.read(height))
+        self.misses += 1
+        self._remember(height, block)
+        return block
+
+    def _remember(self, height: int, block):
+        self._cache[height] = block
+        self._cache.move_to_end(height)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def __iter__(self) -> Iterator:
+        """
+        Duyệt tuần tự (đọc store theo thứ tự, không đưa block vào cache để một lượt
+        duyệt toàn chuỗi không đẩy các block hay dùng ra khỏi cache)
+        """
+        from .blockchain import Blockchain
+        length = len(self)
+        for height, block_data in enumerate(self.store.iter_block_dicts()):
+            if height >= length:
+                break
+            cached = self._cache.get(height)
+            yield cached if cached is not None else Blockchain.block_from_dict(block_data)
+
+    def _check_writable(self):
+        if self._length is not None:
+            raise TypeError("LazyChain snapshot is read-only")
+
+    def append(self, block):
+        """Nối block vào store (bền vững ở sync() kế tiếp)"""
+        with self._lock:
+            self._check_writable()
+            height = self.store.append(block)
+            self._remember(height, block)
+            self._unsynced += 1
+
+    def pop(self):
+        """Bỏ và trả về block cuối (cắt store, hoàn tác cả chỉ mục truy vấn)"""
+        with self._lock:
+            self._check_writable()
+            length = len(self.store)
+            if not length:
+                raise IndexError("pop from empty chain")
+            block = self._block(length - 1)
+            self._cache.pop(length - 1, None)
+            self.store.truncate(length - 1)
+            self._unsynced = max(0, self._unsynced - 1)
+            return block
+
+    def copy(self) -> 'LazyChain':
+        """
+        Bản chụp chỉ đọc với chiều dài hiện tại (O(1), cache riêng)
+
+        Bản chụp đọc cùng store nên chỉ còn đúng tới lần pop() kế tiếp (đổi nhánh).
+        """
+        with self._lock:
+            snapshot = LazyChain(self.store, self.cache_size)
+            snapshot._length = len(self)
+            return snapshot
+
+    def sync(self) -> int:
+        """
+        Ghi bền vững các block đã nối / gỡ kể từ lần sync() trước
+
+        Returns:
+            int: Số block đã nối
+        """
+        with self._lock:
+            self._check_writable()
+            self.store.sync()
+            appended = self._unsynced
+            self._unsynced = 0
+            return appended
+
+    @property
+    def fork_safe(self) -> bool:
+        """Worker process tạo bằng fork có đọc được store kế thừa không"""
+        return self.store.fork_safe
+
+    @property
+    def supports_queries(self) -> bool:
+        """Store có chỉ mục truy vấn để thay cho chỉ mục trong bộ nhớ"""
+        return self.store.supports_queries
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'blocks': len(self),
+                'unsynced_blocks': self._unsynced,
+                'cached_blocks': len(self._cache),
+                'cache_size': self.cache_size,
+                'cache_hits': self.hits,
+                'cache_misses': self.misses
+            }
+
+    def __repr__(self) -> str:
+        return f"LazyChain(blocks: {len(self)}, cached: {len(self._cache)})"
+
+class StoreStateIndex:
+    """
+    Trạng thái tài khoản đọc từ bảng accounts của store (thay cho StateIndex)
+
+    Store cập nhật số dư khi LazyChain nối / gỡ block, nên apply_block,
+    rollback_block và rebuild không phải làm gì.
+
+    Attributes:
+        store (BlockQueries): Backend có chỉ mục truy vấn
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    @property
+    def height(self) -> int:
+        return len(self.store) - 1
+
+    def clear(self):
+        pass
+
+    def apply_block(self, block, height: int):
+        pass
+
+    def rollback_block(self, block, height: int):
+        pass
+
+    def rebuild(self, chain: List):
+        pass
+
+    def verify(self, chain: List) -> List[str]:
+        """
+        Đối chiếu bảng accounts với trạng thái dựng lại từ chain (O(chain))
+
+        Returns:
+            List[str]: Các địa chỉ có trạng thái lệch (rỗng nếu khớp)
+        """
+        from .state import StateIndex
+        expected = StateIndex()
+        expected.rebuild(chain)
+        mismatched = []
+        for address in expected.tx_counts:
+            account = self.store.get_account(address)
+            if (not math.isclose(account['balance'], expected.get_balance(address), rel_tol=1e-9, abs_tol=1e-9)
+                    or account['nonce'] != expected.get_nonce(address)
+                    or account['tx_count'] != expected.tx_counts[address]):
+                mismatched.append(address)
+        if self.store.get_stats().get('accounts') != len(expected.tx_counts):
+            mismatched.append('<accounts>')
+        if self.height != expected.height:
+            mismatched.append('<height>')
+        return sorted(mismatched)
+
+    def get_balance(self, address: str) -> float:
+        return self.store.get_account(address)['balance']
+
+    def get_nonce(self, address: str) -> int:
+        return self.store.get_account(address)['nonce']
+
+    def get_account(self, address: str) -> Dict[str, Any]:
+        account = self.store.get_account(address)
+        return {key: account[key] for key in ('address', 'balance', 'nonce', 'tx_count')}
+
+class StoreHistoryIndex:
+    """Posting list lịch sử giao dịch đọc từ bảng postings của store (thay cho AddressHistoryIndex)"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def clear(self):
+        pass
+
+    def append_block(self, block, height: int):
+        pass
+
+    def rollback_block(self, block, height: int):
+        pass
+
+    def rebuild(self, chain: List):
+        pass
+
+    def count(self, address: str) -> int:
+        return self.store.history_count(address)
+
+    def page(self, address: str, limit: int, cursor: Optional[int] = None,
+             descending: bool = False) -> Tuple[List[Tuple[int, int]], Optional[int]]:
+        return self.store.history_postings(address, limit, cursor, descending)
+
+class StoreLookupIndex:
+    """Tra cứu giao dịch / block theo hash từ chỉ mục của store (thay cho ChainLookupIndex)"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def clear(self):
+        pass
+
+    def append_block(self, block, height: int):
+        pass
+
+    def rollback_block(self, block, height: int):
+        pass
+
+    def rebuild(self, chain: List):
+        pass
+
+    def locate_transaction(self, transaction_hash: str) -> Optional[Tuple[int, int]]:
+        return self.store.locate_transaction(transaction_hash)
+
+    def block_height(self, block_hash: str) -> Optional[int]:
+        return self.store.block_height(block_hash)
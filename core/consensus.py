@@ -11,6 +11,9 @@ import time
 from abc import ABC, abstractmethod
 from typing import Dict, List, Any
 from .block import Block
+from .mining import ParallelMiner
+from .telemetry import MiningTelemetry
+from .difficulty import DifficultyRetargeter, difficulty_to_target, target_to_difficulty
 
 class ConsensusAlgorithm(ABC):
     """
@@ -50,25 +53,35 @@ class ProofOfWork(ConsensusAlgorithm):
     Thuật toán đồng thuận Proof of Work (PoW)
     
     Attributes:
-        difficulty (int): Độ khó khai thác (số lượng số 0 đầu tiên)
+        difficulty (int): Độ khó ban đầu (số lượng số 0 đầu tiên)
+        target (int): Target 256-bit hiện tại
         target_time (int): Thời gian mục tiêu cho mỗi block (giây)
+        max_workers (int): Số process khai thác song song
+        adjustment_window (int): Số block trong cửa sổ điều chỉnh độ khó
     """
     
-    def __init__(self, difficulty: int = 4, target_time: int = 10):
+    def __init__(self, difficulty: int = 4, target_time: int = 10, max_workers: int = 1,
+                 adjustment_window: int = 10):
         """
         Khởi tạo PoW consensus
         
         Args:
             difficulty: Độ khó ban đầu
             target_time: Thời gian mục tiêu giữa các block (giây)
+            max_workers: Số process khai thác (0 = số CPU), lấy từ ConsensusConfig.max_mining_threads
+            adjustment_window: Số block trong cửa sổ điều chỉnh (ConsensusConfig.difficulty_adjustment_blocks)
         """
         self.difficulty = difficulty
+        self.target = difficulty_to_target(difficulty)
         self.target_time = target_time
+        self.max_workers = max_workers
+        self.adjustment_window = adjustment_window
         self.mining_stats = {
             'blocks_mined': 0,
             'total_hash_attempts': 0,
             'average_mining_time': 0
         }
+        self.telemetry = MiningTelemetry()
     
     def mine_block(self, block: Block, **kwargs) -> Block:
         """
@@ -76,29 +89,33 @@ class ProofOfWork(ConsensusAlgorithm):
         
         Args:
             block: Block cần khai thác
-            **kwargs: Có thể chứa 'difficulty' để override
+            **kwargs: Có thể chứa 'target' hoặc 'difficulty' và 'max_workers' để override,
+                'cancel_token' để dừng khai thác giữa chừng
             
         Returns:
-            Block: Block đã được khai thác
+            Block: Block đã được khai thác, None nếu bị huỷ
         """
-        difficulty = kwargs.get('difficulty', self.difficulty)
-        target = "0" * difficulty
+        if 'target' in kwargs:
+            block.set_target(kwargs['target'])
+        elif 'difficulty' in kwargs:
+            block.set_target(difficulty_to_target(kwargs['difficulty']))
+        else:
+            block.set_target(self.target)
+        miner = ParallelMiner(kwargs.get('max_workers', self.max_workers))
         
-        start_time = time.time()
-        hash_attempts = 0
+        print(f"Mining block #{block.index} with difficulty {target_to_difficulty(block.target):.2f} on {miner.workers} worker(s)...")
         
-        print(f"Mining block #{block.index} with difficulty {difficulty}...")
+        result = miner.mine(block, block.target, kwargs.get('cancel_token'))
+        if result is None:
+            print(f"Mining block #{block.index} cancelled")
+            return None
         
-        while not block.hash.startswith(target):
-            block.nonce += 1
-            block.hash = block.calculate_hash()
-            hash_attempts += 1
-            
-            # Hiển thị progress mỗi 100,000 attempts
-            if hash_attempts % 100000 == 0:
-                print(f"Mining... {hash_attempts} attempts")
+        block.nonce = result.nonce
+        block.hash = result.hash
         
-        mining_time = time.time() - start_time
+        mining_time = result.elapsed
+        hash_attempts = result.attempts
+        self.telemetry.record_block(block.index, result)
         
         # Cập nhật stats
         self.mining_stats['blocks_mined'] += 1
@@ -112,7 +129,7 @@ class ProofOfWork(ConsensusAlgorithm):
         print(f"Hash: {block.hash}")
         print(f"Nonce: {block.nonce}")
         print(f"Mining time: {mining_time:.2f} seconds")
-        print(f"Hash attempts: {hash_attempts}")
+        print(f"Hash attempts: {hash_attempts} ({result.hash_rate:.0f} H/s)")
         
         return block
     
@@ -122,16 +139,21 @@ class ProofOfWork(ConsensusAlgorithm):
         
         Args:
             block: Block cần xác thực
-            **kwargs: Có thể chứa 'difficulty'
+            **kwargs: Có thể chứa 'target' hoặc 'difficulty' (target bắt buộc,
+                mặc định self.target; target do block tự khai không được dùng)
             
         Returns:
             bool: True nếu block hợp lệ
         """
-        difficulty = kwargs.get('difficulty', self.difficulty)
-        target = "0" * difficulty
+        if 'target' in kwargs:
+            required_target = kwargs['target']
+        elif 'difficulty' in kwargs:
+            required_target = difficulty_to_target(kwargs['difficulty'])
+        else:
+            required_target = self.target
         
-        # Kiểm tra hash có đúng format không
-        if not block.hash.startswith(target):
+        # So sánh hash dạng số nguyên với target
+        if block.target > required_target or not block.meets_target():
             return False
         
         # Kiểm tra hash có được tính đúng không
@@ -143,43 +165,33 @@ class ProofOfWork(ConsensusAlgorithm):
     
     def adjust_difficulty(self, last_blocks: List[Block]) -> int:
         """
-        Điều chỉnh độ khó dựa trên thời gian khai thác gần đây
+        Điều chỉnh target dựa trên thời gian khai thác trong cửa sổ gần đây
         
         Args:
-            last_blocks: Danh sách blocks gần đây
+            last_blocks: Danh sách blocks gần đây (theo thứ tự chain)
             
         Returns:
-            int: Độ khó mới
+            int: Target mới dạng compact (bits)
         """
-        if len(last_blocks) < 2:
-            return self.difficulty
-        
-        # Tính thời gian trung bình giữa các blocks
-        time_diffs = []
-        for i in range(1, len(last_blocks)):
-            current_time = time.fromisoformat(last_blocks[i].timestamp)
-            prev_time = time.fromisoformat(last_blocks[i-1].timestamp)
-            time_diffs.append((current_time - prev_time).total_seconds())
-        
-        avg_time = sum(time_diffs) / len(time_diffs)
-        
-        # Điều chỉnh difficulty
-        if avg_time < self.target_time * 0.8:  # Quá nhanh
-            new_difficulty = self.difficulty + 1
-        elif avg_time > self.target_time * 1.2:  # Quá chậm
-            new_difficulty = max(1, self.difficulty - 1)
-        else:
-            new_difficulty = self.difficulty
+        retargeter = DifficultyRetargeter(
+            window=self.adjustment_window,
+            target_block_time=self.target_time,
+            initial_target=self.target
+        )
+        retargeter.rebuild(last_blocks)
+        new_target = retargeter.next_target()
         
-        if new_difficulty != self.difficulty:
-            print(f"Difficulty adjusted: {self.difficulty} -> {new_difficulty}")
-            print(f"Average mining time: {avg_time:.2f}s, Target: {self.target_time}s")
+        if new_target != self.target:
+            print(f"Difficulty adjusted: {target_to_difficulty(self.target):.2f} -> {target_to_difficulty(new_target):.2f}")
         
-        return new_difficulty
+        self.target = new_target
+        return retargeter.next_bits()
     
     def get_mining_stats(self) -> Dict[str, Any]:
-        """Lấy thống kê khai thác"""
-        return self.mining_stats.copy()
+        """Lấy thống kê khai thác (kèm telemetry cửa sổ trượt)"""
+        stats = self.mining_stats.copy()
+        stats['telemetry'] = self.telemetry.get_stats()
+        return stats
 
 class ProofOfStake(ConsensusAlgorithm):
     """
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Blockchain Difficulty Module
+File: core/difficulty.py
+Purpose: Target 256-bit dạng số, mã hóa compact ("bits") và điều chỉnh độ khó
+         theo cửa sổ trượt
+Dependencies: None
+"""
+
+import math
+from collections import deque
+from typing import List, Optional, Tuple
+
+# Target dễ nhất được phép (tương đương độ khó 1 = một chữ số hex 0 đầu tiên)
+POW_LIMIT = 1 << 252
+
+# Giới hạn mức thay đổi timespan mỗi lần điều chỉnh (x4 / :4)
+MAX_ADJUSTMENT_FACTOR = 4
+
+def difficulty_to_target(difficulty: int) -> int:
+    """
+    Đổi độ khó cũ (số chữ số hex 0 đầu tiên) thành target 256-bit
+
+    Hash hợp lệ khi int(hash, 16) < target, tương đương hash.startswith("0" * difficulty).
+    """
+    return 1 << (256 - 4 * difficulty)
+
+def target_to_difficulty(target: int) -> float:
+    """
+    Độ khó tương đương (số chữ số hex 0, có phần lẻ) của một target
+
+    Dùng để hiển thị: difficulty_to_target(d) cho lại đúng d.
+    """
+    return (256 - math.log2(target)) / 4
+
+def bits_to_target(bits: int) -> int:
+    """
+    Giải mã target từ dạng compact (1 byte số mũ + 3 byte mantissa, như nBits của Bitcoin)
+
+    Args:
+        bits: Target dạng compact
+
+    Returns:
+        int: Target 256-bit
+    """
+    exponent = bits >> 24
+    mantissa = bits & 0x007fffff
+    if exponent <= 3:
+        return mantissa >> (8 * (3 - exponent))
+    return mantissa << (8 * (exponent - 3))
+
+def target_to_bits(target: int) -> int:
+    """
+    Mã hóa target sang dạng compact (làm tròn xuống, nên bits_to_target(bits) <= target)
+
+    Args:
+        target: Target 256-bit (> 0)
+
+    Returns:
+        int: Target dạng compact
+    """
+    size = (target.bit_length() + 7) // 8
+    if size <= 3:
+        mantissa = target << (8 * (3 - size))
+    else:
+        mantissa = target >> (8 * (size - 3))
+    # Bit cao nhất của mantissa là bit dấu trong định dạng compact
+    if mantissa & 0x00800000:
+        mantissa >>= 8
+        size += 1
+    return (size << 24) | mantissa
+
+def normalize_target(target: int) -> Tuple[int, int]:
+    """
+    Làm tròn target về giá trị biểu diễn được bằng compact bits
+
+    Returns:
+        Tuple[int, int]: (bits, target đã làm tròn)
+    """
+    bits = target_to_bits(min(target, POW_LIMIT))
+    return bits, bits_to_target(bits)
+
+class DifficultyRetargeter:
+    """
+    Điều chỉnh độ khó theo cửa sổ trượt, cập nhật tăng dần khi block được thêm
+
+    Target kế tiếp = trung bình target của `window` block gần nhất
+                     x (timespan thực tế / timespan mục tiêu),
+    với timespan bị giới hạn trong [1/4, 4] lần mục tiêu và target không vượt POW_LIMIT.
+
+    Attributes:
+        window (int): Số block trong cửa sổ (difficulty_adjustment_blocks)
+        target_block_time (float): Thời gian mục tiêu giữa hai block (giây)
+        initial_target (int): Target dùng khi chưa đủ dữ liệu
+    """
+
+    def __init__(self, window: int = 10, target_block_time: float = 10, initial_target: int = POW_LIMIT):
+        """
+        Khởi tạo retargeter
+
+        Args:
+            window: Số block trong cửa sổ trượt
+            target_block_time: Thời gian mục tiêu giữa các block (giây)
+            initial_target: Target ban đầu
+        """
+        self.window = max(1, window)
+        self.target_block_time = target_block_time
+        self.initial_target = min(initial_target, POW_LIMIT)
+        # window + 1 timestamp cho window khoảng thời gian
+        self._timestamps: deque = deque(maxlen=self.window + 1)
+        self._targets: deque = deque()
+        self._target_sum = 0
+        self._next: Optional[Tuple[int, int]] = None
+
+    def append_block(self, block):
+        """Cập nhật cửa sổ với block vừa được thêm vào chain (O(1))"""
+        self._timestamps.append(float(block.timestamp))
+        target = block.target
+        self._targets.append(target)
+        self._target_sum += target
+        if len(self._targets) > self.window:
+            self._target_sum -= self._targets.popleft()
+        self._next = None
+
+    def rebuild(self, blocks: List):
+        """Dựng lại cửa sổ từ các block cuối của chain (sau khi nạp hoặc rollback)"""
+        self._timestamps.clear()
+        self._targets.clear()
+        self._target_sum = 0
+        self._next = None
+        for block in blocks[-(self.window + 1):]:
+            self.append_block(block)
+
+    def _compute_next(self) -> Tuple[int, int]:
+        """Tính (bits, target) cho block kế tiếp"""
+        if len(self._timestamps) < 2:
+            return normalize_target(self.initial_target)
+
+        intervals = len(self._timestamps) - 1
+        expected = self.target_block_time * intervals
+        actual = self._timestamps[-1] - self._timestamps[0]
+        actual = min(max(actual, expected / MAX_ADJUSTMENT_FACTOR), expected * MAX_ADJUSTMENT_FACTOR)
+
+        average_target = self._target_sum // len(self._targets)
+        # Số nguyên: tránh mất chính xác của float với số 256-bit
+        new_target = average_target * int(actual * 1000) // int(expected * 1000)
+        return normalize_target(max(1, new_target))
+
+    def next_bits(self) -> int:
+        """Target dạng compact bắt buộc cho block kế tiếp"""
+        if self._next is None:
+            self._next = self._compute_next()
+        return self._next[0]
+
+    def next_target(self) -> int:
+        """Target 256-bit bắt buộc cho block kế tiếp"""
+        self.next_bits()
+        return self._next[1]
+
+    def next_difficulty(self) -> float:
+        """Độ khó tương đương (số chữ số hex 0) cho block kế tiếp"""
+        return target_to_difficulty(self.next_target())
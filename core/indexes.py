@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Blockchain Index Module
+File: core/indexes.py
+Purpose: Các chỉ mục tra cứu được cập nhật khi nối / gỡ block - posting list lịch
+         sử giao dịch theo địa chỉ (phân trang bằng cursor), tra cứu giao dịch và
+         block theo hash
+Dependencies: core/block.py
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# (chiều cao block, vị trí giao dịch trong block)
+Posting = Tuple[int, int]
+
+class AddressHistoryIndex:
+    """
+    Posting list theo địa chỉ: address -> [(height, position), ...] theo thứ tự chain
+
+    Mỗi giao dịch có một posting cho người gửi và một cho người nhận (một nếu trùng
+    nhau). Danh sách chỉ được nối thêm hoặc cắt đuôi (khi gỡ block), nên vị trí
+    trong danh sách dùng được làm cursor phân trang ổn định.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, List[Posting]] = {}
+        self._lock = threading.RLock()
+
+    def clear(self):
+        with self._lock:
+            self.postings.clear()
+
+    def append_block(self, block, height: int):
+        """Thêm posting cho các giao dịch của block vừa nối (O(số giao dịch))"""
+        with self._lock:
+            # Genesis không thuộc lịch sử giao dịch
+            if height == 0:
+                return
+            for position, transaction in enumerate(block.transactions):
+                for address in {transaction.sender, transaction.receiver}:
+                    if address is not None:
+                        self.postings.setdefault(address, []).append((height, position))
+
+    def rollback_block(self, block, height: int):
+        """Bỏ posting của block ở đỉnh chain vừa bị gỡ"""
+        with self._lock:
+            for transaction in block.transactions:
+                for address in {transaction.sender, transaction.receiver}:
+                    postings = self.postings.get(address)
+                    while postings and postings[-1][0] >= height:
+                        postings.pop()
+                    if postings is not None and not postings:
+                        del self.postings[address]
+
+    def rebuild(self, chain: List):
+        """Dựng lại toàn bộ posting list từ chain (O(chain))"""
+        with self._lock:
+            self.clear()
+            for height, block in enumerate(chain):
+                self.append_block(block, height)
+
+    def count(self, address: str) -> int:
+        """Số giao dịch liên quan đến địa chỉ"""
+        return len(self.postings.get(address, ()))
+
+    def page(self, address: str, limit: int, cursor: Optional[int] = None,
+             descending: bool = False) -> Tuple[List[Posting], Optional[int]]:
+        """
+        Một trang posting (O(limit))
+
+        Args:
+            address: Địa chỉ cần tra cứu
+            limit: Số posting tối đa
+            cursor: Vị trí bắt đầu (tăng dần) hoặc vị trí kết thúc, không gồm (giảm dần);
+                None = đầu (hoặc cuối) danh sách
+            descending: True để lấy giao dịch mới nhất trước
+
+        Returns:
+            Tuple: (các posting, cursor cho trang tiếp theo hoặc None nếu hết)
+        """
+        with self._lock:
+            postings = self.postings.get(address, [])
+            total = len(postings)
+            if descending:
+                end = total if cursor is None else max(0, min(cursor, total))
+                start = max(0, end - limit)
+                return postings[start:end][::-1], (start if start > 0 else None)
+
+            start = 0 if cursor is None else max(0, min(cursor, total))
+            end = min(total, start + limit)
+            return postings[start:end], (end if end < total else None)
+
+class ChainLookupIndex:
+    """
+    Tra cứu điểm O(1): hash giao dịch -> (height, position), hash block -> height
+
+    Block theo chiều cao được lấy trực tiếp từ chain (chain[height]).
+    """
+
+    def __init__(self):
+        self.transactions: Dict[str, Posting] = {}
+        self.blocks: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    def clear(self):
+        with self._lock:
+            self.transactions.clear()
+            self.blocks.clear()
+
+    def append_block(self, block, height: int):
+        """Đánh chỉ mục block vừa nối và các giao dịch của nó"""
+        with self._lock:
+            self.blocks[block.hash] = height
+            for position, transaction in enumerate(block.transactions):
+                self.transactions[transaction.transaction_hash] = (height, position)
+
+    def rollback_block(self, block, height: int):
+        """Bỏ chỉ mục của block ở đỉnh chain vừa bị gỡ"""
+        with self._lock:
+            if self.blocks.get(block.hash) == height:
+                del self.blocks[block.hash]
+            for transaction in block.transactions:
+                location = self.transactions.get(transaction.transaction_hash)
+                if location is not None and location[0] == height:
+                    del self.transactions[transaction.transaction_hash]
+
+    def rebuild(self, chain: List):
+        """Dựng lại chỉ mục từ chain (O(chain))"""
+        with self._lock:
+            self.clear()
+            for height, block in enumerate(chain):
+                self.append_block(block, height)
+
+    def locate_transaction(self, transaction_hash: str) -> Optional[Posting]:
+        """(height, position) của giao dịch, None nếu không có trong chain"""
+        return self.transactions.get(transaction_hash)
+
+    def block_height(self, block_hash: str) -> Optional[int]:
+        """Chiều cao của block, None nếu không có trong chain"""
+        return self.blocks.get(block_hash)
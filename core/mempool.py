@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Blockchain Mempool Module
+File: core/mempool.py
+Purpose: Vùng chờ giao dịch có giới hạn (số lượng và byte), xếp ưu tiên theo phí
+         trên byte, tra cứu O(1) theo hash và loại giao dịch phí thấp nhất khi đầy
+Dependencies: core/transaction.py
+"""
+
+import heapq
+import itertools
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from .transaction import Transaction
+
+DEFAULT_MAX_TRANSACTIONS = 5000
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+
+class MempoolError(ValueError):
+    """Giao dịch không được nhận vào mempool (trùng lặp, mempool đầy, ...)"""
+
+class DuplicateTransactionError(MempoolError):
+    """Giao dịch đã có trong mempool"""
+
+class InsufficientFundsError(MempoolError):
+    """Người gửi không đủ số dư khả dụng (đã trừ các giao dịch đang chờ)"""
+
+@dataclass
+class MempoolEntry:
+    """
+    Một giao dịch trong mempool
+
+    Attributes:
+        transaction (Transaction): Giao dịch
+        fee_rate (float): Phí trên byte
+        size (int): Kích thước serialize (byte)
+        sequence (int): Thứ tự nhận vào (tăng dần)
+    """
+    transaction: Transaction
+    fee_rate: float
+    size: int
+    sequence: int
+
+class Mempool:
+    """
+    Mempool có giới hạn, ưu tiên theo phí
+
+    Giao dịch được lưu trong dict theo hash, giữ thứ tự nhận vào (kiểm tra, thêm,
+    xoá và chống trùng O(1)). Một min-heap
+    theo (fee_rate, giao dịch mới nhất trước) cho biết giao dịch cần loại khi mempool
+    đầy; mục trong heap bị xoá lười (bỏ qua khi hash không còn trong dict).
+
+    Tổng tiền đang chờ chi / chờ nhận theo địa chỉ được cập nhật khi giao dịch vào
+    hoặc rời mempool, để kiểm tra số dư khả dụng trong O(1).
+
+    Attributes:
+        max_transactions (int): Số giao dịch tối đa
+        max_bytes (int): Tổng kích thước tối đa (byte)
+        total_bytes (int): Tổng kích thước hiện tại
+        evicted (int): Số giao dịch đã bị loại vì mempool đầy
+        duplicates_rejected (int): Số lần từ chối giao dịch trùng lặp
+        version (int): Tăng mỗi khi nội dung mempool thay đổi
+        pending_debits (Dict[str, float]): Tổng số tiền + phí đang chờ chi theo người gửi
+        pending_credits (Dict[str, float]): Tổng số tiền đang chờ nhận theo người nhận
+    """
+
+    def __init__(self, max_transactions: int = DEFAULT_MAX_TRANSACTIONS, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Khởi tạo mempool
+
+        Args:
+            max_transactions: Số giao dịch tối đa
+            max_bytes: Tổng kích thước tối đa (byte)
+        """
+        self.max_transactions = max(1, max_transactions)
+        self.max_bytes = max(1, max_bytes)
+        self.total_bytes = 0
+        self.evicted = 0
+        self.duplicates_rejected = 0
+        self.version = 0
+        self.pending_debits: Dict[str, float] = {}
+        self.pending_credits: Dict[str, float] = {}
+        self._pending_refs: Dict[str, int] = {}
+        self._entries: Dict[str, MempoolEntry] = {}
+        self._eviction_heap: List[tuple] = []
+        self._sequence = itertools.count()
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, transaction_hash: str) -> bool:
+        return transaction_hash in self._entries
+
+    def __iter__(self) -> Iterator[Transaction]:
+        """Các giao dịch theo thứ tự nhận vào"""
+        with self._lock:
+            transactions = [entry.transaction for entry in self._entries.values()]
+        return iter(transactions)
+
+    def entries(self) -> List[MempoolEntry]:
+        """Bản chụp các mục theo thứ tự nhận vào"""
+        with self._lock:
+            return list(self._entries.values())
+
+    def get(self, transaction_hash: str) -> Optional[Transaction]:
+        entry = self._entries.get(transaction_hash)
+        return entry.transaction if entry else None
+
+    def add(self, transaction: Transaction) -> List[Transaction]:
+        """
+        Thêm giao dịch (đã xác minh) vào mempool
+
+        Nếu mempool đầy, các giao dịch có phí trên byte thấp nhất bị loại để nhường
+        chỗ, miễn là chúng thấp hơn giao dịch mới.
+
+        Args:
+            transaction: Giao dịch cần thêm
+
+        Returns:
+            List[Transaction]: Các giao dịch bị loại để nhường chỗ
+
+        Raises:
+            DuplicateTransactionError: Nếu giao dịch đã có trong mempool
+            MempoolError: Nếu giao dịch quá lớn hoặc phí quá thấp để vào mempool đầy
+        """
+        tx_hash = transaction.transaction_hash
+        size = transaction.size
+        entry = MempoolEntry(transaction, transaction.fee_rate, size, next(self._sequence))
+
+        with self._lock:
+            if tx_hash in self._entries:
+                self.duplicates_rejected += 1
+                raise DuplicateTransactionError(f"Transaction already in mempool: {tx_hash}")
+            if size > self.max_bytes:
+                raise MempoolError(f"Transaction too large for mempool: {size} bytes")
+
+            # Chọn các giao dịch cần loại trước khi thay đổi gì (để có thể từ chối nguyên vẹn)
+            victims = []
+            count = len(self._entries) + 1
+            total_bytes = self.total_bytes + size
+            for victim in self._eviction_candidates():
+                if count <= self.max_transactions and total_bytes <= self.max_bytes:
+                    break
+                if victim.fee_rate >= entry.fee_rate:
+                    raise MempoolError(
+                        f"Mempool full: fee rate {entry.fee_rate:.6f} is not above the minimum {victim.fee_rate:.6f}"
+                    )
+                victims.append(victim)
+                count -= 1
+                total_bytes -= victim.size
+
+            for victim in victims:
+                self._discard(victim.transaction.transaction_hash)
+                self.evicted += 1
+
+            self._entries[tx_hash] = entry
+            self.total_bytes += size
+            self.version += 1
+            self._track(transaction, 1)
+            heapq.heappush(self._eviction_heap, (entry.fee_rate, -entry.sequence, tx_hash))
+            return [victim.transaction for victim in victims]
+
+    def _eviction_candidates(self) -> Iterator[MempoolEntry]:
+        """Các mục theo thứ tự bị loại (phí thấp nhất, mới nhất trước), bỏ mục đã xoá"""
+        heap = self._eviction_heap
+        # Dọn các mục đã xoá ở đỉnh heap
+        while heap and heap[0][2] not in self._entries:
+            heapq.heappop(heap)
+        for _, neg_sequence, tx_hash in self._iter_heap():
+            entry = self._entries.get(tx_hash)
+            if entry is not None and entry.sequence == -neg_sequence:
+                yield entry
+
+    def _iter_heap(self) -> Iterator[tuple]:
+        """Duyệt heap theo thứ tự tăng dần mà không làm thay đổi nó"""
+        heap = self._eviction_heap
+        frontier = [(heap[0], 0)] if heap else []
+        while frontier:
+            item, index = heapq.heappop(frontier)
+            yield item
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+
+    def _discard(self, transaction_hash: str) -> Optional[MempoolEntry]:
+        """Xoá khỏi dict (mục trong heap được bỏ qua lười)"""
+        entry = self._entries.pop(transaction_hash, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+            self.version += 1
+            self._track(entry.transaction, -1)
+            # Tránh heap phình to vì các mục đã xoá
+            if len(self._eviction_heap) > 2 * len(self._entries) + 64:
+                self._compact_heap()
+        return entry
+
+    def _track(self, transaction: Transaction, direction: int):
+        """Cập nhật tổng đang chờ chi / nhận khi giao dịch vào (1) hoặc rời (-1) mempool"""
+        sender = transaction.sender
+        receiver = transaction.receiver
+        if sender is not None:
+            self.pending_debits[sender] = self.pending_debits.get(sender, 0.0) + transaction.total_debit * direction
+        self.pending_credits[receiver] = self.pending_credits.get(receiver, 0.0) + transaction.amount * direction
+        for address in {sender, receiver}:
+            if address is None:
+                continue
+            refs = self._pending_refs.get(address, 0) + direction
+            if refs:
+                self._pending_refs[address] = refs
+            else:
+                # Không còn giao dịch chờ: bỏ hẳn (tránh sai số float còn sót)
+                self._pending_refs.pop(address, None)
+                self.pending_debits.pop(address, None)
+                self.pending_credits.pop(address, None)
+
+    def _compact_heap(self):
+        self._eviction_heap = [item for item in self._eviction_heap if item[2] in self._entries]
+        heapq.heapify(self._eviction_heap)
+
+    def remove(self, transaction_hash: str) -> Optional[Transaction]:
+        """
+        Xoá một giao dịch (O(1))
+
+        Returns:
+            Optional[Transaction]: Giao dịch đã xoá, None nếu không có
+        """
+        with self._lock:
+            entry = self._discard(transaction_hash)
+            return entry.transaction if entry else None
+
+    def remove_many(self, transaction_hashes: Iterable[str]) -> int:
+        """
+        Xoá một loạt giao dịch, ví dụ các giao dịch vừa được xác nhận trong block
+        (O(số hash), bỏ qua hash không có trong mempool)
+
+        Returns:
+            int: Số giao dịch đã xoá
+        """
+        removed = 0
+        with self._lock:
+            for transaction_hash in transaction_hashes:
+                if self._discard(transaction_hash) is not None:
+                    removed += 1
+        return removed
+
+    def record_duplicate(self):
+        """Ghi nhận một giao dịch trùng bị từ chối trước khi tới add (ví dụ đã có trong chain)"""
+        with self._lock:
+            self.duplicates_rejected += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._eviction_heap.clear()
+            self.pending_debits.clear()
+            self.pending_credits.clear()
+            self._pending_refs.clear()
+            self.total_bytes = 0
+            self.version += 1
+
+    def pending_debit(self, address: str) -> float:
+        """Tổng số tiền + phí địa chỉ đang chờ chi (O(1))"""
+        return self.pending_debits.get(address, 0.0)
+
+    def pending_credit(self, address: str) -> float:
+        """Tổng số tiền địa chỉ đang chờ nhận (O(1))"""
+        return self.pending_credits.get(address, 0.0)
+
+    def transactions_from(self, sender: str) -> List[Transaction]:
+        """Giao dịch đang chờ của một người gửi, theo thứ tự nhận vào (O(kích thước mempool))"""
+        if sender not in self.pending_debits:
+            return []
+        with self._lock:
+            return [entry.transaction for entry in self._entries.values() if entry.transaction.sender == sender]
+
+    def transactions(self) -> List[Transaction]:
+        """Danh sách giao dịch theo thứ tự nhận vào"""
+        return list(self)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Kích thước và bộ đếm của mempool"""
+        with self._lock:
+            lowest = next(self._eviction_candidates(), None)
+            return {
+                'transactions': len(self._entries),
+                'bytes': self.total_bytes,
+                'max_transactions': self.max_transactions,
+                'max_bytes': self.max_bytes,
+                'evicted': self.evicted,
+                'duplicates_rejected': self.duplicates_rejected,
+                'min_fee_rate': lowest.fee_rate if lowest else 0.0
+            }
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Blockchain Merkle Tree Module
+File: core/merkle.py
+Purpose: Merkle tree lưu sẵn mọi tầng cập nhật O(log n), sinh và xác minh
+         Merkle proof (SPV) trên bộ máy Merkle dùng chung của utils/merkle.py
+Dependencies: utils/merkle.py
+"""
+
+from typing import Dict, List
+from utils.merkle import EMPTY_ROOT, hash_level, hash_pair
+
+class MerkleTree:
+    """
+    Merkle tree với các tầng được lưu sẵn dưới dạng digest 32 byte
+
+    levels[0] là danh sách digest lá; levels[k + 1] = hash_level(levels[k]).
+
+    Attributes:
+        levels (List[List[bytes]]): Các tầng của cây, từ lá đến gốc
+    """
+
+    def __init__(self, leaves: List[str] = None):
+        """
+        Dựng cây từ danh sách hash lá dạng hex (O(n))
+
+        Args:
+            leaves: Danh sách hash giao dịch (không bị thay đổi)
+        """
+        self._build([bytes.fromhex(leaf) for leaf in leaves or []])
+
+    @classmethod
+    def from_digests(cls, digests: List[bytes]) -> 'MerkleTree':
+        """Dựng cây trực tiếp từ các digest 32 byte"""
+        tree = cls.__new__(cls)
+        tree._build(list(digests))
+        return tree
+
+    def _build(self, digests: List[bytes]):
+        """Tính toàn bộ các tầng bằng hash_level"""
+        self.levels: List[List[bytes]] = [digests]
+        level = digests
+        while len(level) > 1:
+            level = hash_level(level)
+            self.levels.append(level)
+
+    def __len__(self) -> int:
+        """Số lá của cây"""
+        return len(self.levels[0])
+
+    def index_of(self, leaf: str) -> int:
+        """
+        Vị trí của lá trong cây
+
+        Raises:
+            ValueError: Nếu không tìm thấy
+        """
+        return self.levels[0].index(bytes.fromhex(leaf))
+
+    @property
+    def root(self) -> str:
+        """Merkle root dạng hex (không tính lại)"""
+        if not self.levels[0]:
+            return EMPTY_ROOT
+        return self.levels[-1][0].hex()
+
+    def append(self, leaf: str) -> str:
+        """
+        Thêm một lá và cập nhật các nút trên đường lên gốc (O(log n))
+
+        Args:
+            leaf: Hash giao dịch mới (hex)
+
+        Returns:
+            str: Merkle root mới
+        """
+        return self.append_digest(bytes.fromhex(leaf))
+
+    def append_digest(self, digest: bytes) -> str:
+        """Giống append nhưng nhận trực tiếp digest 32 byte"""
+        index = len(self.levels[0])
+        self.levels[0].append(digest)
+
+        depth = 0
+        while len(self.levels[depth]) > 1:
+            level = self.levels[depth]
+            parent = index // 2
+            left = level[2 * parent]
+            right = level[2 * parent + 1] if 2 * parent + 1 < len(level) else left
+
+            if depth + 1 == len(self.levels):
+                self.levels.append([])
+            upper = self.levels[depth + 1]
+            if parent < len(upper):
+                upper[parent] = hash_pair(left, right)
+            else:
+                upper.append(hash_pair(left, right))
+
+            index = parent
+            depth += 1
+
+        return self.root
+
+    def get_proof(self, index: int) -> List[Dict[str, str]]:
+        """
+        Sinh Merkle branch cho lá ở vị trí index (O(log n))
+
+        Args:
+            index: Vị trí giao dịch trong block
+
+        Returns:
+            List[Dict]: Các nút anh em từ lá lên gốc, mỗi nút gồm
+                'hash' (hex) và 'position' ('left' hoặc 'right' so với nút đang xét)
+
+        Raises:
+            IndexError: Nếu index nằm ngoài cây
+        """
+        if not 0 <= index < len(self.levels[0]):
+            raise IndexError(f"Leaf index out of range: {index}")
+
+        branch = []
+        for level in self.levels[:-1]:
+            if index % 2 == 0:
+                # Nút lẻ cuối tầng được ghép với chính nó
+                sibling = level[index + 1] if index + 1 < len(level) else level[index]
+                branch.append({'hash': sibling.hex(), 'position': 'right'})
+            else:
+                branch.append({'hash': level[index - 1].hex(), 'position': 'left'})
+            index //= 2
+        return branch
+
+def verify_merkle_proof(leaf: str, branch: List[Dict[str, str]], merkle_root: str) -> bool:
+    """
+    Xác minh Merkle branch (chạy offline, không cần block đầy đủ)
+
+    Args:
+        leaf: Hash giao dịch
+        branch: Kết quả của MerkleTree.get_proof
+        merkle_root: Merkle root trong header block
+
+    Returns:
+        bool: True nếu branch dẫn từ leaf đến merkle_root
+    """
+    current = bytes.fromhex(leaf)
+    for node in branch:
+        sibling = bytes.fromhex(node['hash'])
+        if node.get('position') == 'left':
+            current = hash_pair(sibling, current)
+        elif node.get('position') == 'right':
+            current = hash_pair(current, sibling)
+        else:
+            return False
+    return current.hex() == merkle_root
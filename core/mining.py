@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Blockchain Mining Engine Module
+File: core/mining.py
+Purpose: Khai thác song song - chia không gian nonce cho nhiều worker process,
+         mining job có thể huỷ khi có block mới ở đỉnh chuỗi
+Dependencies: core/block.py
+"""
+
+import os
+import time
+import uuid
+import threading
+import multiprocessing
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .block import Block, BlockHeaderTemplate
+from .difficulty import target_to_difficulty
+
+# Số nonce mỗi worker thử trước khi kiểm tra lại cờ dừng (~10ms mỗi đoạn)
+DEFAULT_CHUNK_SIZE = 8192
+
+class CancelToken:
+    """
+    Cờ huỷ dùng chung giữa thread điều phối và các worker process
+
+    Attributes:
+        reason (Optional[str]): Lý do huỷ ('new_tip', 'cancelled', ...)
+    """
+
+    def __init__(self):
+        self._event = multiprocessing.Event()
+        self.reason: Optional[str] = None
+
+    def cancel(self, reason: str = "cancelled"):
+        """Bật cờ huỷ (lý do đầu tiên được giữ lại)"""
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        """True nếu đã bị huỷ"""
+        return self._event.is_set()
+
+    @property
+    def event(self):
+        """multiprocessing.Event bên dưới (truyền được cho worker process)"""
+        return self._event
+
+@dataclass
+class MiningResult:
+    """
+    Kết quả của một lần khai thác
+
+    Attributes:
+        nonce (int): Nonce tìm được
+        hash (str): Hash hợp lệ tương ứng
+        attempts (int): Tổng số nonce đã thử (mọi worker)
+        elapsed (float): Thời gian khai thác (giây)
+        workers (int): Số worker đã tham gia
+        worker_attempts (List[int]): Số nonce đã thử của từng worker
+    """
+    nonce: int
+    hash: str
+    attempts: int
+    elapsed: float
+    workers: int
+    worker_attempts: List[int] = field(default_factory=list)
+
+    @property
+    def hash_rate(self) -> float:
+        """Tốc độ băm trung bình (hash/giây)"""
+        return self.attempts / self.elapsed if self.elapsed > 0 else 0.0
+
+def resolve_worker_count(max_workers: int) -> int:
+    """Số worker thực tế: 0 hoặc số âm nghĩa là dùng toàn bộ CPU"""
+    if max_workers <= 0:
+        return os.cpu_count() or 1
+    return max_workers
+
+def _add_progress(progress, tried: int):
+    """Cộng số nonce đã thử vào bộ đếm dùng chung (multiprocessing.Value)"""
+    if progress is not None:
+        with progress.get_lock():
+            progress.value += tried
+
+def _mining_worker(template: BlockHeaderTemplate, target: int, start_nonce: int, worker_id: int, worker_count: int,
+                   chunk_size: int, stop_event, cancel_event, result_queue, progress):
+    """
+    Worker process: quét các đoạn nonce worker_id, worker_id + n, worker_id + 2n, ...
+
+    Các đoạn của những worker khác nhau không giao nhau. Worker dừng khi tìm được
+    hash hợp lệ, khi stop_event được bật bởi worker khác, hoặc khi job bị huỷ.
+    """
+    attempts = 0
+    chunk = worker_id
+    while not stop_event.is_set() and not cancel_event.is_set():
+        lo = start_nonce + chunk * chunk_size
+        nonce, block_hash, tried = template.search(lo, lo + chunk_size, target)
+        attempts += tried
+        _add_progress(progress, tried)
+        if nonce is not None:
+            stop_event.set()
+            result_queue.put((worker_id, nonce, block_hash, attempts))
+            return
+        chunk += worker_count
+    result_queue.put((worker_id, None, None, attempts))
+
+class ParallelMiner:
+    """
+    Bộ khai thác song song theo dải nonce
+
+    Attributes:
+        workers (int): Số worker process
+        chunk_size (int): Số nonce mỗi đơn vị công việc
+    """
+
+    def __init__(self, max_workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Khởi tạo miner
+
+        Args:
+            max_workers: Số process tối đa (0 = số CPU), thường lấy từ ConsensusConfig.max_mining_threads
+            chunk_size: Số nonce mỗi đơn vị công việc
+        """
+        self.workers = resolve_worker_count(max_workers)
+        self.chunk_size = chunk_size
+
+    def mine(self, block, target: int, cancel_token: Optional[CancelToken] = None,
+             progress=None) -> Optional[MiningResult]:
+        """
+        Tìm nonce cho block, bắt đầu từ block.nonce hiện tại
+
+        Args:
+            block: Block cần khai thác (không bị thay đổi)
+            target: Target 256-bit, hash hợp lệ khi int(hash, 16) < target
+            cancel_token: Cờ huỷ, được kiểm tra sau mỗi đoạn nonce
+            progress: multiprocessing.Value đếm số nonce đã thử, cập nhật sau mỗi đoạn (optional)
+
+        Returns:
+            Optional[MiningResult]: Nonce và hash hợp lệ, None nếu bị huỷ
+        """
+        template = block.header_template()
+        cancel_token = cancel_token or CancelToken()
+        start_time = time.time()
+
+        if self.workers == 1:
+            nonce, block_hash, attempts = self._mine_serial(template, block.nonce, target, cancel_token, progress)
+            worker_attempts = [attempts]
+        else:
+            nonce, block_hash, worker_attempts = self._mine_parallel(template, block.nonce, target, cancel_token, progress)
+            attempts = sum(worker_attempts)
+
+        if nonce is None:
+            return None
+        return MiningResult(nonce, block_hash, attempts, time.time() - start_time,
+                            len(worker_attempts), worker_attempts)
+
+    def _mine_serial(self, template: BlockHeaderTemplate, start_nonce: int, target: int,
+                     cancel_token: CancelToken, progress) -> Tuple[Optional[int], Optional[str], int]:
+        """Khai thác trong process hiện tại (không tốn chi phí tạo process)"""
+        attempts = 0
+        lo = start_nonce
+        while not cancel_token.is_cancelled:
+            nonce, block_hash, tried = template.search(lo, lo + self.chunk_size, target)
+            attempts += tried
+            _add_progress(progress, tried)
+            if nonce is not None:
+                return nonce, block_hash, attempts
+            lo += self.chunk_size
+        return None, None, attempts
+
+    def _mine_parallel(self, template: BlockHeaderTemplate, start_nonce: int, target: int,
+                       cancel_token: CancelToken, progress) -> Tuple[Optional[int], Optional[str], List[int]]:
+        """
+        Chia dải nonce cho các worker process, dừng tất cả khi có worker tìm thấy
+
+        Returns:
+            Tuple: (nonce, hash, số nonce đã thử của từng worker)
+        """
+        stop_event = multiprocessing.Event()
+        result_queue = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(
+                target=_mining_worker,
+                args=(template, target, start_nonce, worker_id, self.workers,
+                      self.chunk_size, stop_event, cancel_token.event, result_queue, progress),
+                daemon=True
+            )
+            for worker_id in range(self.workers)
+        ]
+        for process in processes:
+            process.start()
+
+        found = None
+        worker_attempts = [0] * self.workers
+        try:
+            # Mỗi worker gửi đúng một kết quả khi dừng
+            for _ in processes:
+                worker_id, nonce, block_hash, tried = result_queue.get()
+                worker_attempts[worker_id] = tried
+                if nonce is not None and found is None:
+                    found = (nonce, block_hash)
+                    stop_event.set()
+        finally:
+            stop_event.set()
+            for process in processes:
+                process.join()
+
+        if found is None:
+            return None, None, worker_attempts
+        return found[0], found[1], worker_attempts
+
+class MiningJob:
+    """
+    Một lượt khai thác block mới trên đỉnh chuỗi hiện tại, có thể huỷ
+
+    Khi blockchain nhận block mới ở đỉnh (từ P2P hoặc node), notify_new_tip()
+    huỷ lượt khai thác đang chạy; job dựng lại template trên đỉnh mới và tiếp tục.
+    cancel() dừng hẳn job.
+
+    Attributes:
+        job_id (str): ID của job
+        miner_address (str): Địa chỉ nhận thưởng
+        state (str): 'pending', 'running', 'done', 'cancelled' hoặc 'failed'
+        block (Optional[Block]): Block đã khai thác khi job hoàn tất
+        result (Optional[MiningResult]): Kết quả khai thác của lượt thành công
+        restarts (int): Số lần dựng lại template do đỉnh chuỗi thay đổi
+        target (int): Target 256-bit của lượt khai thác gần nhất
+    """
+
+    def __init__(self, blockchain, miner_address: str, max_workers: int = 1):
+        """
+        Khởi tạo mining job
+
+        Args:
+            blockchain: Blockchain instance
+            miner_address: Địa chỉ nhận phần thưởng khai thác
+            max_workers: Số process khai thác (0 = số CPU)
+        """
+        self.job_id = str(uuid.uuid4())
+        self.blockchain = blockchain
+        self.miner_address = miner_address
+        self.miner = ParallelMiner(max_workers)
+        self.state = "pending"
+        self.block: Optional[Block] = None
+        self.result: Optional[MiningResult] = None
+        self.error: Optional[str] = None
+        self.restarts = 0
+        self.target = blockchain.get_next_target()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancelled = False
+        self._round_token = CancelToken()
+        self._progress = multiprocessing.Value('Q', 0)
+        self._lock = threading.Lock()
+
+    def notify_new_tip(self):
+        """Báo đỉnh chuỗi đã thay đổi: huỷ lượt hiện tại để dựng lại template"""
+        with self._lock:
+            self._round_token.cancel("new_tip")
+
+    def cancel(self):
+        """Huỷ hẳn job"""
+        with self._lock:
+            self._cancelled = True
+            self._round_token.cancel("cancelled")
+
+    @property
+    def is_finished(self) -> bool:
+        """True nếu job đã kết thúc (thành công, bị huỷ hoặc lỗi)"""
+        return self.state in ("done", "cancelled", "failed")
+
+    @property
+    def nonces_tried(self) -> int:
+        """Tổng số nonce đã thử qua mọi lượt (cập nhật sau mỗi đoạn nonce)"""
+        return self._progress.value
+
+    def get_progress(self) -> Dict[str, Any]:
+        """
+        Lấy tiến độ của job
+
+        Returns:
+            Dict: Trạng thái, số nonce đã thử, hash rate và thời gian ước tính
+        """
+        if self.started_at is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        nonces_tried = self.nonces_tried
+        hash_rate = nonces_tried / elapsed if elapsed > 0 else 0.0
+        expected_attempts = (1 << 256) // self.target
+
+        progress = {
+            'job_id': self.job_id,
+            'state': self.state,
+            'miner_address': self.miner_address,
+            'workers': self.miner.workers,
+            'difficulty': target_to_difficulty(self.target),
+            'target': f"{self.target:064x}",
+            'nonces_tried': nonces_tried,
+            'elapsed_seconds': elapsed,
+            'hash_rate': hash_rate,
+            'expected_attempts': expected_attempts,
+            # PoW không có trí nhớ: thời gian còn lại kỳ vọng luôn là expected_attempts / hash_rate
+            'eta_seconds': expected_attempts / hash_rate if hash_rate > 0 and not self.is_finished else None,
+            'restarts': self.restarts
+        }
+        if self.block is not None:
+            progress['block'] = self.block.to_dict()
+        if self.error:
+            progress['error'] = self.error
+        return progress
+
+    def run(self) -> Optional[Block]:
+        """
+        Chạy job cho đến khi khai thác được block hoặc bị huỷ
+
+        Returns:
+            Optional[Block]: Block đã được thêm vào chain, None nếu bị huỷ
+        """
+        self.state = "running"
+        self.started_at = time.time()
+        try:
+            while True:
+                with self._lock:
+                    if self._cancelled:
+                        break
+                    token = self._round_token = CancelToken()
+
+                block = self.blockchain.create_block_template(self.miner_address)
+                self.target = block.target
+                result = self.miner.mine(block, self.target, token, self._progress)
+                if result is not None:
+                    block.nonce = result.nonce
+                    block.hash = result.hash
+                    # Đỉnh chuỗi có thể đã đổi ngay sau khi tìm được nonce
+                    if self.blockchain.append_mined_block(block):
+                        self.block = block
+                        self.result = result
+                        self.state = "done"
+                        self.blockchain.telemetry.record_block(block.index, result)
+                        return block
+
+                if self._cancelled:
+                    break
+                self.restarts += 1
+                print(f"New chain tip received, rebuilding template for job {self.job_id[:8]}...")
+
+            self.state = "cancelled"
+            return None
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            raise
+        finally:
+            self.finished_at = time.time()
+
+class MiningJobManager:
+    """
+    Quản lý các mining job chạy nền (dùng cho HTTP API)
+
+    Mỗi blockchain chỉ chạy một job tại một thời điểm; các job đã kết thúc được
+    giữ lại (tối đa max_history) để client có thể tra cứu kết quả.
+    """
+
+    def __init__(self, max_history: int = 100):
+        """
+        Khởi tạo manager
+
+        Args:
+            max_history: Số job tối đa được lưu lại
+        """
+        self.max_history = max_history
+        self.jobs: Dict[str, MiningJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, blockchain, miner_address: str,
+               on_done: Optional[Callable[[MiningJob], None]] = None) -> MiningJob:
+        """
+        Tạo job mới và chạy nó trong thread nền
+
+        Args:
+            blockchain: Blockchain instance
+            miner_address: Địa chỉ nhận thưởng
+            on_done: Callback gọi khi job kết thúc (ví dụ: broadcast block)
+
+        Returns:
+            MiningJob: Job vừa tạo
+
+        Raises:
+            RuntimeError: Nếu blockchain đang có job khác chạy
+        """
+        with self._lock:
+            running = self.get_running_job(blockchain)
+            if running:
+                raise RuntimeError(f"Mining job {running.job_id} is already running")
+
+            job = MiningJob(blockchain, miner_address, blockchain.mining_workers)
+            self.jobs[job.job_id] = job
+            self._trim_history()
+
+        def run():
+            try:
+                blockchain.run_mining_job(job)
+            except Exception as e:
+                print(f"Mining job {job.job_id[:8]} failed: {e}")
+            if on_done:
+                on_done(job)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return job
+
+    def get(self, job_id: str) -> Optional[MiningJob]:
+        """Tra cứu job theo ID"""
+        return self.jobs.get(job_id)
+
+    def get_running_job(self, blockchain) -> Optional[MiningJob]:
+        """Job đang chạy trên blockchain (nếu có)"""
+        for job in self.jobs.values():
+            if job.blockchain is blockchain and not job.is_finished:
+                return job
+        return None
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """Tiến độ của tất cả job đang lưu"""
+        return [job.get_progress() for job in self.jobs.values()]
+
+    def _trim_history(self):
+        """Bỏ các job cũ nhất đã kết thúc khi vượt quá max_history"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.is_finished]
+        while len(self.jobs) > self.max_history and finished:
+            del self.jobs[finished.pop(0)]
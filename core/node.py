@@ -7,7 +7,7 @@ Dependencies: core/blockchain.py, network/p2p.py
 """
 
 import uuid
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set
 from .blockchain import Blockchain
 from .transaction import Transaction
 
@@ -21,20 +21,23 @@ class Node:
         peers (Set[str]): Danh sách các peer nodes
         is_mining (bool): Trạng thái khai thác
         wallet_address (str): Địa chỉ ví của node
+        private_key (Optional[str]): Khóa bí mật dùng để ký giao dịch của node
     """
     
-    def __init__(self, wallet_address: str = None):
+    def __init__(self, wallet_address: str = None, private_key: Optional[str] = None):
         """
         Khởi tạo node mới
         
         Args:
             wallet_address: Địa chỉ ví của node (optional)
+            private_key: Khóa bí mật của ví (optional, cần để gửi giao dịch)
         """
         self.node_id = str(uuid.uuid4())
         self.blockchain = Blockchain()
         self.peers: Set[str] = set()
         self.is_mining = False
         self.wallet_address = wallet_address or f"node_{self.node_id[:8]}"
+        self.private_key = private_key
         
         print(f"Node {self.node_id[:8]} initialized with wallet: {self.wallet_address}")
     
@@ -79,7 +82,7 @@ class Node:
     
     def start_mining(self):
         """Bắt đầu khai thác blocks"""
-        if len(self.blockchain.pending_transactions) == 0:
+        if len(self.blockchain.mempool) == 0:
             print("No pending transactions to mine")
             return
         
@@ -89,6 +92,9 @@ class Node:
         try:
             # Khai thác block với pending transactions
             new_block = self.blockchain.mine_pending_transactions(self.wallet_address)
+            if new_block is None:
+                print("Mining cancelled")
+                return
             print(f"Block #{new_block.index} mined successfully!")
             print(f"Block hash: {new_block.hash}")
             
@@ -100,6 +106,31 @@ class Node:
         finally:
             self.is_mining = False
     
+    def stop_mining(self):
+        """Huỷ job khai thác đang chạy (nếu có)"""
+        job = self.blockchain.current_mining_job
+        if job:
+            job.cancel()
+            print(f"Node {self.node_id[:8]} stopped mining")
+    
+    def receive_block(self, block) -> bool:
+        """
+        Nhận block mới từ peer và nối vào chain
+        
+        Nếu block được chấp nhận, job khai thác đang chạy được báo để dựng lại
+        template trên đỉnh mới.
+        
+        Args:
+            block: Block nhận được
+            
+        Returns:
+            bool: True nếu block được thêm vào chain
+        """
+        if self.blockchain.add_block(block):
+            print(f"Accepted block #{block.index} from network")
+            return True
+        return False
+    
     def broadcast_new_block(self, block):
         """
         Phát tán block mới đến peers
@@ -136,11 +167,11 @@ class Node:
             'is_mining': self.is_mining,
             'peers_count': len(self.peers),
             'blockchain_length': len(self.blockchain.chain),
-            'pending_transactions': len(self.blockchain.pending_transactions),
+            'pending_transactions': len(self.blockchain.mempool),
             'wallet_balance': self.blockchain.get_balance(self.wallet_address)
         }
     
-    def create_transaction(self, receiver: str, amount: float, data: Dict = None) -> Transaction:
+    def create_transaction(self, receiver: str, amount: float, data: Dict = None, fee: float = 0) -> Transaction:
         """
         Tạo giao dịch mới từ node này
         
@@ -148,21 +179,24 @@ class Node:
             receiver: Địa chỉ người nhận
             amount: Số tiền giao dịch
             data: Dữ liệu bổ sung
+            fee: Phí giao dịch
             
         Returns:
-            Transaction: Giao dịch vừa tạo
+            Transaction: Giao dịch vừa tạo (đã ký nếu node có khóa bí mật)
         """
-        # Kiểm tra số dư
-        balance = self.blockchain.get_balance(self.wallet_address)
-        if balance < amount:
-            raise ValueError(f"Insufficient balance. Available: {balance}, Required: {amount}")
+        # Kiểm tra số dư khả dụng (đã trừ giao dịch đang chờ của node, O(1))
+        spendable = self.blockchain.get_spendable_balance(self.wallet_address)
+        if spendable < amount + fee:
+            raise ValueError(f"Insufficient balance. Available: {spendable}, Required: {amount + fee}")
         
         # Tạo giao dịch
         transaction = Transaction(
             sender=self.wallet_address,
             receiver=receiver,
             amount=amount,
-            data=data
+            private_key=self.private_key,
+            data=data,
+            fee=fee
         )
         
         return transaction
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Blockchain State Index Module
+File: core/state.py
+Purpose: Chỉ mục trạng thái tài khoản (số dư, nonce, số giao dịch) được cập nhật
+         tăng dần khi nối / gỡ block, dựng lại và đối chiếu được với chain
+Dependencies: core/block.py
+"""
+
+import math
+import threading
+from typing import Any, Dict, List
+
+class StateIndex:
+    """
+    Trạng thái tài khoản: address -> số dư, nonce và số giao dịch
+
+    Quy tắc giống cách quét cũ của Blockchain.get_balance: mọi giao dịch trong các
+    block sau genesis trừ tiền (số tiền + phí) người gửi và cộng tiền người nhận.
+
+    Attributes:
+        balances (Dict[str, float]): Số dư theo địa chỉ
+        nonces (Dict[str, int]): Số giao dịch đã gửi theo địa chỉ
+        tx_counts (Dict[str, int]): Số giao dịch liên quan (gửi hoặc nhận) theo địa chỉ
+        height (int): Chỉ số block cuối cùng đã áp dụng (-1 = rỗng)
+    """
+
+    def __init__(self):
+        self.balances: Dict[str, float] = {}
+        self.nonces: Dict[str, int] = {}
+        self.tx_counts: Dict[str, int] = {}
+        self.height = -1
+        self._lock = threading.RLock()
+
+    def clear(self):
+        with self._lock:
+            self.balances.clear()
+            self.nonces.clear()
+            self.tx_counts.clear()
+            self.height = -1
+
+    def apply_block(self, block, height: int):
+        """
+        Áp dụng các giao dịch của block vừa nối vào chain (O(số giao dịch))
+
+        Args:
+            block: Block vừa được nối
+            height: Chiều cao của block trong chain (không dùng block.index do block tự khai)
+        """
+        with self._lock:
+            # Genesis không tính vào số dư
+            if height > 0:
+                for transaction in block.transactions:
+                    self._apply_transaction(transaction, 1)
+            self.height = height
+
+    def rollback_block(self, block, height: int):
+        """
+        Hoàn tác block ở đỉnh chain (thứ tự ngược với apply_block)
+
+        Args:
+            block: Block vừa được gỡ khỏi chain
+            height: Chiều cao của block đó trong chain
+        """
+        with self._lock:
+            if height > 0:
+                for transaction in reversed(block.transactions):
+                    self._apply_transaction(transaction, -1)
+            self.height = height - 1
+
+    def _apply_transaction(self, transaction, direction: int):
+        """Cộng (direction = 1) hoặc hoàn tác (direction = -1) một giao dịch"""
+        amount = transaction.amount * direction
+        sender = transaction.sender
+        receiver = transaction.receiver
+
+        if sender is not None:
+            # Người gửi trả cả phí; phí đi vào giao dịch thưởng của miner
+            self.balances[sender] = self.balances.get(sender, 0.0) - transaction.total_debit * direction
+            self._bump(self.nonces, sender, direction)
+            self._bump(self.tx_counts, sender, direction)
+        self.balances[receiver] = self.balances.get(receiver, 0.0) + amount
+        if receiver != sender:
+            self._bump(self.tx_counts, receiver, direction)
+
+        if direction < 0:
+            for address in (sender, receiver):
+                if address is not None and not self.tx_counts.get(address):
+                    # Tài khoản không còn giao dịch nào: bỏ hẳn (tránh sai số float còn sót)
+                    self.balances.pop(address, None)
+                    self.tx_counts.pop(address, None)
+                    self.nonces.pop(address, None)
+
+    @staticmethod
+    def _bump(counter: Dict[str, int], address: str, delta: int):
+        value = counter.get(address, 0) + delta
+        if value:
+            counter[address] = value
+        else:
+            counter.pop(address, None)
+
+    def rebuild(self, chain: List):
+        """Dựng lại toàn bộ chỉ mục từ chain (O(chain))"""
+        with self._lock:
+            self.clear()
+            for height, block in enumerate(chain):
+                self.apply_block(block, height)
+
+    def verify(self, chain: List) -> List[str]:
+        """
+        Đối chiếu chỉ mục với trạng thái dựng lại từ chain
+
+        Returns:
+            List[str]: Các địa chỉ có trạng thái lệch (rỗng nếu khớp)
+        """
+        expected = StateIndex()
+        expected.rebuild(chain)
+        with self._lock:
+            mismatched = []
+            for address in set(self.balances) | set(expected.balances):
+                if (not math.isclose(self.balances.get(address, 0.0), expected.balances.get(address, 0.0),
+                                     rel_tol=1e-9, abs_tol=1e-9)
+                        or self.nonces.get(address, 0) != expected.nonces.get(address, 0)
+                        or self.tx_counts.get(address, 0) != expected.tx_counts.get(address, 0)):
+                    mismatched.append(address)
+            if self.height != expected.height:
+                mismatched.append('<height>')
+            return sorted(mismatched)
+
+    def get_balance(self, address: str) -> float:
+        """Số dư hiện tại (O(1))"""
+        return self.balances.get(address, 0.0)
+
+    def get_nonce(self, address: str) -> int:
+        """Số giao dịch đã gửi (O(1))"""
+        return self.nonces.get(address, 0)
+
+    def get_account(self, address: str) -> Dict[str, Any]:
+        """Trạng thái một tài khoản"""
+        with self._lock:
+            return {
+                'address': address,
+                'balance': self.balances.get(address, 0.0),
+                'nonce': self.nonces.get(address, 0),
+                'tx_count': self.tx_counts.get(address, 0)
+            }
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Mining Telemetry Module
+File: core/telemetry.py
+Purpose: Thống kê khai thác - hash rate theo cửa sổ trượt 1m/15m/1h,
+         hash rate từng worker và phân phối thời gian giải block
+Dependencies: None
+"""
+
+import math
+import time
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional
+
+# Cửa sổ trượt (tên -> số giây)
+TELEMETRY_WINDOWS = {'1m': 60, '15m': 900, '1h': 3600}
+
+# Biên trên của các bucket histogram thời gian giải block (giây)
+SOLVE_TIME_BUCKETS = [0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600]
+
+PERCENTILES = [50, 90, 99]
+
+@dataclass
+class BlockMiningRecord:
+    """
+    Bản ghi khai thác một block
+
+    Attributes:
+        finished_at (float): Thời điểm tìm được nonce
+        block_index (int): Chỉ số block
+        attempts (int): Số nonce đã thử
+        elapsed (float): Thời gian khai thác (giây)
+        worker_attempts (List[int]): Số nonce đã thử của từng worker
+    """
+    finished_at: float
+    block_index: int
+    attempts: int
+    elapsed: float
+    worker_attempts: List[int]
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Percentile theo phương pháp nearest-rank
+
+    Args:
+        sorted_values: Danh sách đã sắp xếp tăng dần (không rỗng)
+        pct: Percentile (0-100)
+    """
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+class MiningTelemetry:
+    """
+    Bộ thu thập thống kê khai thác
+
+    Các bản ghi trong 1 giờ gần nhất được giữ để tính cửa sổ trượt; histogram
+    và tổng tích luỹ được tính trên toàn bộ thời gian chạy.
+    """
+
+    def __init__(self, max_samples: int = 1000):
+        """
+        Khởi tạo telemetry
+
+        Args:
+            max_samples: Số thời gian giải block gần nhất dùng để tính percentile
+        """
+        self.started_at = time.time()
+        self.blocks_mined = 0
+        self.total_attempts = 0
+        self.total_mining_time = 0.0
+        self.records: deque = deque()
+        self.solve_times: deque = deque(maxlen=max_samples)
+        self.histogram = [0] * (len(SOLVE_TIME_BUCKETS) + 1)
+        self._lock = threading.Lock()
+
+    def record_block(self, block_index: int, result, finished_at: Optional[float] = None):
+        """
+        Ghi nhận một block vừa khai thác
+
+        Args:
+            block_index: Chỉ số block
+            result: MiningResult của lượt khai thác thành công
+            finished_at: Thời điểm hoàn tất (mặc định: bây giờ)
+        """
+        record = BlockMiningRecord(
+            finished_at=finished_at or time.time(),
+            block_index=block_index,
+            attempts=result.attempts,
+            elapsed=result.elapsed,
+            worker_attempts=list(result.worker_attempts or [result.attempts])
+        )
+
+        with self._lock:
+            self.blocks_mined += 1
+            self.total_attempts += record.attempts
+            self.total_mining_time += record.elapsed
+            self.records.append(record)
+            self.solve_times.append(record.elapsed)
+            self.histogram[self._bucket_index(record.elapsed)] += 1
+            self._prune(record.finished_at)
+
+    @staticmethod
+    def _bucket_index(elapsed: float) -> int:
+        """Vị trí bucket histogram cho một thời gian giải block"""
+        for i, bound in enumerate(SOLVE_TIME_BUCKETS):
+            if elapsed <= bound:
+                return i
+        return len(SOLVE_TIME_BUCKETS)
+
+    def _prune(self, now: float):
+        """Bỏ các bản ghi cũ hơn cửa sổ dài nhất"""
+        horizon = now - max(TELEMETRY_WINDOWS.values())
+        while self.records and self.records[0].finished_at < horizon:
+            self.records.popleft()
+
+    def _window_stats(self, now: float, seconds: int) -> Dict[str, Any]:
+        """Thống kê cho các block hoàn tất trong `seconds` giây gần nhất"""
+        records = [r for r in self.records if r.finished_at >= now - seconds]
+        attempts = sum(r.attempts for r in records)
+        mining_time = sum(r.elapsed for r in records)
+
+        worker_attempts: Dict[int, int] = {}
+        for record in records:
+            for worker_id, tried in enumerate(record.worker_attempts):
+                worker_attempts[worker_id] = worker_attempts.get(worker_id, 0) + tried
+
+        return {
+            'blocks': len(records),
+            'attempts': attempts,
+            'mining_time': mining_time,
+            'hash_rate': attempts / mining_time if mining_time > 0 else 0.0,
+            'worker_hash_rates': {
+                str(worker_id): tried / mining_time if mining_time > 0 else 0.0
+                for worker_id, tried in sorted(worker_attempts.items())
+            }
+        }
+
+    def get_solve_time_histogram(self) -> Dict[str, Any]:
+        """
+        Phân phối thời gian giải block
+
+        Returns:
+            Dict: Số block theo bucket và các percentile (trên max_samples block gần nhất)
+        """
+        labels = [f"<={bound}s" for bound in SOLVE_TIME_BUCKETS] + [f">{SOLVE_TIME_BUCKETS[-1]}s"]
+        buckets = dict(zip(labels, self.histogram))
+
+        samples = sorted(self.solve_times)
+        percentiles = {
+            f"p{pct}": percentile(samples, pct) if samples else None
+            for pct in PERCENTILES
+        }
+        return {'buckets': buckets, 'percentiles': percentiles}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Ảnh chụp toàn bộ thống kê khai thác
+
+        Returns:
+            Dict: Tổng tích luỹ, cửa sổ 1m/15m/1h và histogram thời gian giải block
+        """
+        now = time.time()
+        with self._lock:
+            self._prune(now)
+            windows = {
+                name: self._window_stats(now, seconds)
+                for name, seconds in TELEMETRY_WINDOWS.items()
+            }
+            stats = {
+                'blocks_mined': self.blocks_mined,
+                'total_attempts': self.total_attempts,
+                'average_mining_time': self.total_mining_time / self.blocks_mined if self.blocks_mined else 0.0,
+                'hash_rate': windows['1m']['hash_rate'],
+                'uptime': now - self.started_at,
+                'windows': windows,
+                'solve_time_histogram': self.get_solve_time_histogram()
+            }
+        return stats
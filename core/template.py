@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Block Template Module
+File: core/template.py
+Purpose: Chọn giao dịch từ mempool cho block mới theo phí trên byte, trong giới hạn
+         số giao dịch và số byte, giữ thứ tự giao dịch của cùng một người gửi; giữ
+         template gần nhất để miner bên ngoài hỏi lại mà không phải dựng lại
+Dependencies: core/mempool.py, core/transaction.py
+"""
+
+import heapq
+import time
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from .mempool import Mempool, MempoolEntry
+from .transaction import Transaction
+
+DEFAULT_MAX_BLOCK_BYTES = 1_000_000
+# Chỗ dành cho giao dịch thưởng (kích thước thực khoảng 250 byte)
+REWARD_RESERVED_BYTES = 512
+# Mempool thay đổi: template được dựng lại tối đa một lần mỗi khoảng này (giây)
+DEFAULT_REFRESH_INTERVAL = 5.0
+
+@dataclass
+class BlockTemplate:
+    """
+    Nội dung block kế tiếp, chưa gồm giao dịch thưởng và nonce
+
+    Attributes:
+        height (int): Chỉ số của block kế tiếp
+        previous_hash (str): Hash của đỉnh chuỗi
+        bits (int): Target dạng compact bắt buộc
+        target (int): Target 256-bit bắt buộc
+        transactions (List[Transaction]): Giao dịch được chọn, theo thứ tự trong block
+        total_fees (float): Tổng phí của các giao dịch được chọn
+        reward (float): Giá trị giao dịch thưởng (phần thưởng + phí)
+        size (int): Tổng kích thước các giao dịch được chọn (byte)
+        mempool_version (int): Phiên bản mempool lúc dựng
+        created_at (float): Thời điểm dựng
+    """
+    height: int
+    previous_hash: str
+    bits: int
+    target: int
+    transactions: List[Transaction] = field(default_factory=list)
+    total_fees: float = 0.0
+    reward: float = 0.0
+    size: int = 0
+    mempool_version: int = 0
+    created_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'height': self.height,
+            'previous_hash': self.previous_hash,
+            'bits': self.bits,
+            'target': format(self.target, '064x'),
+            'transactions': [tx.to_dict() for tx in self.transactions],
+            'transaction_count': len(self.transactions),
+            'total_fees': self.total_fees,
+            'reward': self.reward,
+            'size': self.size,
+            'mempool_version': self.mempool_version,
+            'created_at': self.created_at
+        }
+
+class BlockTemplateBuilder:
+    """
+    Dựng template block từ mempool
+
+    Giao dịch của một người gửi được xếp theo thứ tự tạo (timestamp, rồi thứ tự
+    nhận vào) và chỉ được chọn sau tất cả giao dịch trước đó của người gửi đó.
+    Mỗi bước chọn giao dịch đầu hàng có phí trên byte cao nhất trong số các người
+    gửi; giao dịch không vừa số byte còn lại kéo theo bỏ các giao dịch sau nó của
+    cùng người gửi.
+
+    Template gần nhất được giữ lại: đỉnh chuỗi đổi thì dựng lại ngay, mempool đổi
+    thì dựng lại khi template đã cũ hơn refresh_interval.
+
+    Attributes:
+        max_transactions (int): Số giao dịch tối đa mỗi block (gồm giao dịch thưởng)
+        max_bytes (int): Tổng kích thước giao dịch tối đa mỗi block (gồm giao dịch thưởng)
+        refresh_interval (float): Tuổi tối thiểu trước khi dựng lại vì mempool đổi (giây)
+        builds (int): Số lần đã dựng template
+    """
+
+    def __init__(self, max_transactions: int = 100, max_bytes: int = DEFAULT_MAX_BLOCK_BYTES,
+                 refresh_interval: float = DEFAULT_REFRESH_INTERVAL):
+        """
+        Khởi tạo builder
+
+        Args:
+            max_transactions: Số giao dịch tối đa mỗi block (gồm giao dịch thưởng)
+            max_bytes: Tổng kích thước giao dịch tối đa mỗi block (byte)
+            refresh_interval: Tuổi tối thiểu trước khi dựng lại vì mempool đổi (giây)
+        """
+        self.max_transactions = max(2, max_transactions)
+        self.max_bytes = max(REWARD_RESERVED_BYTES + 1, max_bytes)
+        self.refresh_interval = refresh_interval
+        self.builds = 0
+        self._cached: Optional[BlockTemplate] = None
+        self._lock = threading.Lock()
+
+    def select(self, mempool: Mempool) -> Tuple[List[Transaction], int]:
+        """
+        Chọn giao dịch cho block kế tiếp
+
+        Args:
+            mempool: Mempool nguồn
+
+        Returns:
+            Tuple: (giao dịch theo thứ tự trong block, tổng kích thước)
+        """
+        # Hàng đợi theo người gửi, theo thứ tự tạo giao dịch
+        queues: Dict[str, List[MempoolEntry]] = {}
+        for entry in mempool.entries():
+            queues.setdefault(entry.transaction.sender, []).append(entry)
+        heads = []
+        for sender, queue in queues.items():
+            queue.sort(key=lambda entry: (entry.transaction.timestamp, entry.sequence))
+            heads.append((-queue[0].fee_rate, queue[0].sequence, sender, 0))
+        heapq.heapify(heads)
+
+        max_count = self.max_transactions - 1
+        byte_budget = self.max_bytes - REWARD_RESERVED_BYTES
+        selected: List[Transaction] = []
+        size = 0
+        while heads and len(selected) < max_count:
+            _, _, sender, position = heapq.heappop(heads)
+            entry = queues[sender][position]
+            if size + entry.size > byte_budget:
+                # Các giao dịch sau của người gửi này phụ thuộc giao dịch bị bỏ
+                continue
+            selected.append(entry.transaction)
+            size += entry.size
+            position += 1
+            if position < len(queues[sender]):
+                following = queues[sender][position]
+                heapq.heappush(heads, (-following.fee_rate, following.sequence, sender, position))
+        return selected, size
+
+    def build(self, blockchain) -> BlockTemplate:
+        """Dựng template mới trên đỉnh chuỗi hiện tại và giữ lại nó"""
+        with blockchain.lock:
+            mempool = blockchain.mempool
+            version = mempool.version
+            transactions, size = self.select(mempool)
+            total_fees = sum(tx.fee for tx in transactions)
+            template = BlockTemplate(
+                height=len(blockchain.chain),
+                previous_hash=blockchain.get_latest_block().hash,
+                bits=blockchain.get_next_bits(),
+                target=blockchain.get_next_target(),
+                transactions=transactions,
+                total_fees=total_fees,
+                reward=blockchain.mining_reward + total_fees,
+                size=size,
+                mempool_version=version
+            )
+        with self._lock:
+            self._cached = template
+            self.builds += 1
+        return template
+
+    def get_template(self, blockchain) -> BlockTemplate:
+        """
+        Template hiện tại, chỉ dựng lại khi cần
+
+        Args:
+            blockchain: Blockchain nguồn
+
+        Returns:
+            BlockTemplate: Template đã giữ hoặc vừa dựng
+        """
+        with self._lock:
+            cached = self._cached
+        if cached is not None and cached.previous_hash == blockchain.get_latest_block().hash:
+            if (cached.mempool_version == blockchain.mempool.version
+                    or time.time() - cached.created_at < self.refresh_interval):
+                return cached
+        return self.build(blockchain)
+
+    def invalidate(self):
+        """Bỏ template đang giữ"""
+        with self._lock:
+            self._cached = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'max_transactions': self.max_transactions,
+                'max_bytes': self.max_bytes,
+                'refresh_interval': self.refresh_interval,
+                'builds': self.builds,
+                'cached_height': self._cached.height if self._cached else None
+            }
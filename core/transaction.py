@@ -9,22 +9,66 @@ Dependencies: utils/crypto.py
 import hashlib
 import json
 import time
+from collections.abc import Mapping
 from datetime import datetime
-from typing import Dict, Any, Optional
+from types import MappingProxyType
+from typing import Dict, Any, Optional, Tuple
+from utils.crypto import CryptoUtils, Ed25519
+
+# Dữ liệu rỗng dùng chung cho mọi giao dịch không có metadata
+_EMPTY_DATA = MappingProxyType({})
+
+def _freeze(value: Any) -> Any:
+    """Bản chỉ đọc (đệ quy) của dữ liệu JSON: dict -> MappingProxyType, list -> tuple"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def _thaw(value: Any) -> Any:
+    """Bản sao có thể sửa (dict / list) của dữ liệu đã _freeze"""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+def _transaction_from_dict(data: Dict[str, Any]) -> 'Transaction':
+    """Dựng lại Transaction khi unpickle (ví dụ trong worker process)"""
+    return Transaction.from_dict(data)
 
 class Transaction:
     """
     Lớp Transaction đại diện cho một giao dịch trong blockchain
     
+    Giao dịch là bất biến sau khi được tạo (và ký). Chuỗi byte chuẩn hóa, digest
+    và kết quả kiểm tra hash được tính một lần trong __init__ và dùng lại cho
+    hashing, validation và Merkle tree; dạng dictionary (P2P relay, lưu trữ) được
+    dựng khi cần trong to_dict() để không nhân đôi bộ nhớ của mỗi giao dịch.
+    
     Attributes:
         sender (str): Địa chỉ người gửi
         receiver (str): Địa chỉ người nhận  
         amount (float): Số tiền giao dịch
+        fee (float): Phí giao dịch trả cho thợ đào (người gửi bị trừ amount + fee)
         timestamp (str): Thời gian giao dịch
+        data (Mapping): Dữ liệu bổ sung (chỉ đọc, kể cả dict / list lồng bên trong)
+        signature (Optional[str]): Chữ ký Ed25519 của người gửi (hex)
+        public_key (Optional[str]): Ed25519 public key của người gửi (hex); sender phải
+            là địa chỉ sinh ra từ khóa này
         transaction_hash (str): Hash của giao dịch
     """
     
-    def __init__(self, sender: Optional[str], receiver: str, amount: float, private_key: Optional[str] = None, data: Optional[Dict] = None):
+    __slots__ = (
+        'sender', 'receiver', 'amount', 'fee', 'timestamp', 'data', 'signature', 'public_key', 'transaction_hash',
+        '_canonical', '_digest', '_hash_digest'
+    )
+    
+    def __init__(self, sender: Optional[str], receiver: str, amount: float, private_key: Optional[str] = None,
+                 data: Optional[Dict] = None, timestamp: Optional[float] = None,
+                 signature: Optional[str] = None, transaction_hash: Optional[str] = None,
+                 public_key: Optional[str] = None, fee: float = 0):
         """
         Khởi tạo giao dịch mới
         
@@ -34,58 +78,152 @@ class Transaction:
             amount: Số tiền giao dịch
             private_key: Khóa riêng của người gửi để ký
             data: Dữ liệu bổ sung (metadata)
+            timestamp: Thời gian giao dịch (mặc định: bây giờ)
+            signature: Chữ ký có sẵn (khi nạp từ dictionary)
+            transaction_hash: Hash được khai báo (khi nạp từ dictionary); mặc định là hash tính được
+            public_key: Public key có sẵn (khi nạp từ dictionary); mặc định suy ra từ private_key
+            fee: Phí giao dịch
         """
-        self.sender = sender
-        self.receiver = receiver
-        self.amount = amount
-        self.timestamp = time.time()
-        self.data = data or {}
+        init = object.__setattr__
+        init(self, 'sender', sender)
+        init(self, 'receiver', receiver)
+        init(self, 'amount', amount)
+        init(self, 'fee', fee)
+        init(self, 'timestamp', time.time() if timestamp is None else timestamp)
+        init(self, 'data', _freeze(data) if data else _EMPTY_DATA)
+        if public_key is None and sender and private_key:
+            public_key = Ed25519.public_key(private_key)
+        init(self, 'public_key', public_key)
+        
+        # Chuỗi byte chuẩn hóa và digest chỉ được tính một lần
+        payload = {
+            'sender': self.sender,
+            'receiver': self.receiver,
+            'amount': self.amount,
+            'timestamp': self.timestamp,
+            'data': _thaw(self.data)
+        }
+        # Public key nằm trong phần được hash (và ký); giao dịch cũ không có khóa giữ nguyên hash
+        if public_key is not None:
+            payload['public_key'] = public_key
+        # Tương tự, phí chỉ được hash khi khác 0
+        if fee:
+            payload['fee'] = fee
+        canonical = json.dumps(payload, sort_keys=True).encode()
+        digest = hashlib.sha256(canonical).digest()
+        init(self, '_canonical', canonical)
+        init(self, '_digest', digest)
         
-        # Hash và signature được tính sau
-        self.transaction_hash = self.calculate_hash()
-        self.signature = None # Sẽ được thêm sau khi ký
+        if transaction_hash is None or transaction_hash == digest.hex():
+            init(self, 'transaction_hash', digest.hex())
+            init(self, '_hash_digest', digest)
+        else:
+            init(self, 'transaction_hash', transaction_hash)
+            init(self, '_hash_digest', None)
         
-        if sender and private_key:
-            self.sign(private_key)
-
+        if signature is None and sender and private_key:
+            signature = self._create_signature(private_key)
+        init(self, 'signature', signature)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Transaction is immutable (cannot set '{name}')")
+    
+    def __delattr__(self, name):
+        raise AttributeError(f"Transaction is immutable (cannot delete '{name}')")
+    
+    def __reduce__(self):
+        # __setattr__ bị chặn nên pickle mặc định của __slots__ không dùng được
+        return (_transaction_from_dict, (self.to_dict(),))
+    
+    @property
+    def canonical_bytes(self) -> bytes:
+        """Chuỗi byte chuẩn hóa (JSON sort_keys) dùng để tính hash"""
+        return self._canonical
+    
+    @property
+    def digest(self) -> bytes:
+        """SHA-256 digest (32 byte) của chuỗi byte chuẩn hóa"""
+        return self._digest
+    
+    @property
+    def hash_digest(self) -> bytes:
+        """
+        transaction_hash dạng 32 byte (dùng làm lá Merkle)
+        
+        Hash khai báo không phải hex 32 byte (ví dụ từ peer) được thay bằng một digest
+        không thể khớp với nó, để block chứa giao dịch bị đánh giá là không hợp lệ
+        thay vì làm lỗi khi dựng Merkle tree.
+        """
+        if self._hash_digest is not None:
+            return self._hash_digest
+        try:
+            declared = bytes.fromhex(self.transaction_hash)
+        except (TypeError, ValueError):
+            declared = b''
+        if len(declared) == 32:
+            return declared
+        return hashlib.sha256(b'invalid-transaction-hash:' + repr(self.transaction_hash).encode()).digest()
+    
+    @property
+    def size(self) -> int:
+        """Kích thước serialize ước lượng (byte) của giao dịch"""
+        return len(self._canonical) + 64 + len(self.signature or "")
+    
+    @property
+    def fee_rate(self) -> float:
+        """Phí trên mỗi byte (dùng để xếp ưu tiên trong mempool)"""
+        return self.fee / self.size
+    
+    @property
+    def total_debit(self) -> float:
+        """Tổng số tiền người gửi bị trừ (amount + fee)"""
+        return self.amount + self.fee
+    
     def calculate_hash(self) -> str:
         """
         Tính toán hash SHA-256 của giao dịch (không bao gồm signature)
         
         Returns:
-            str: Hash của giao dịch dưới dạng hex
+            str: Hash của giao dịch dưới dạng hex (từ digest đã tính sẵn)
         """
-        transaction_string = json.dumps({
-            'sender': self.sender,
-            'receiver': self.receiver,
-            'amount': self.amount,
-            'timestamp': self.timestamp,
-            'data': self.data
-        }, sort_keys=True)
-        
-        return hashlib.sha256(transaction_string.encode()).hexdigest()
+        return self._digest.hex()
     
-    def sign(self, private_key: str):
-        """Ký giao dịch bằng private key"""
-        # Đây là một ví dụ đơn giản, thực tế cần dùng ecdsa
-        # self.signature = CryptoUtils.sign(self.transaction_hash, private_key)
-        self.signature = f"signed_with_{private_key}" # Placeholder
+    def _create_signature(self, private_key: str) -> str:
+        """Ký digest của giao dịch bằng Ed25519"""
+        return Ed25519.sign(self._digest, private_key)
+    
+    def sign(self, private_key: str) -> 'Transaction':
+        """
+        Ký giao dịch bằng private key
+        
+        Giao dịch là bất biến nên trả về một bản sao đã ký.
+        
+        Returns:
+            Transaction: Giao dịch đã ký
+        """
+        return Transaction(
+            self.sender, self.receiver, self.amount, private_key,
+            data=_thaw(self.data), timestamp=self.timestamp, fee=self.fee
+        )
     
     def to_dict(self) -> Dict[str, Any]:
         """
         Chuyển đổi giao dịch thành dictionary
         
         Returns:
-            Dict: Dữ liệu giao dịch dưới dạng dictionary
+            Dict: Dữ liệu giao dịch dưới dạng dictionary (dựng mới mỗi lần gọi, không
+                giữ bản dictionary trong mỗi giao dịch)
         """
         return {
             'sender': self.sender,
             'receiver': self.receiver,
             'amount': self.amount,
+            'fee': self.fee,
             'timestamp': self.timestamp,
-            'data': self.data,
+            'data': _thaw(self.data),
             'transaction_hash': self.transaction_hash,
-            'signature': self.signature
+            'signature': self.signature,
+            'public_key': self.public_key
         }
     
     @classmethod
@@ -93,42 +231,104 @@ class Transaction:
         """
         Tạo đối tượng Transaction từ dictionary
         """
-        tx = cls(
+        return cls(
             sender=data.get('sender'),
             receiver=data.get('receiver'),
             amount=data.get('amount'),
-            data=data.get('data')
+            data=data.get('data'),
+            timestamp=data.get('timestamp', time.time()),
+            signature=data.get('signature'),
+            transaction_hash=data.get('transaction_hash'),
+            public_key=data.get('public_key'),
+            fee=data.get('fee', 0)
         )
-        tx.timestamp = data.get('timestamp', time.time())
-        tx.transaction_hash = data.get('transaction_hash', tx.calculate_hash())
-        tx.signature = data.get('signature')
-        return tx
     
-    def is_valid(self) -> bool:
+    @property
+    def requires_signature(self) -> bool:
+        """Giao dịch hệ thống (thưởng, sender None) không cần chữ ký"""
+        return self.sender is not None
+    
+    @property
+    def signature_scheme(self) -> str:
         """
-        Kiểm tra tính hợp lệ của giao dịch
+        Tên scheme chữ ký (khóa trong core.verification.SIGNATURE_SCHEMES)
+        
+        Giao dịch cũ không có public key dùng chữ ký giữ chỗ "signed_with_..."; scheme
+        này chỉ được chấp nhận trong block dưới ED25519_ACTIVATION_HEIGHT.
+        """
+        return "ed25519" if self.public_key is not None else "placeholder"
+    
+    def signature_item(self) -> Tuple[bytes, Optional[str], Any]:
+        """
+        Dữ liệu cần cho việc xác minh chữ ký
         
         Returns:
-            bool: True nếu giao dịch hợp lệ
+            Tuple: (message đã ký = digest giao dịch, signature, public key)
+        """
+        return self._digest, self.signature, self.public_key
+    
+    def validation_error(self) -> Optional[str]:
+        """
+        Kiểm tra cấu trúc giao dịch (không gồm xác minh chữ ký bằng mật mã)
+        
+        Returns:
+            Optional[str]: Lý do không hợp lệ, None nếu hợp lệ
         """
         # Giao dịch hệ thống (thưởng) luôn hợp lệ
         if self.sender is None:
-            return True
+            return None
             
-        if not self.sender or not self.receiver or not self.signature:
-            return False
+        if not self.sender or not self.receiver:
+            return "missing sender or receiver"
+        
+        if not self.signature:
+            return "missing signature"
         
         if self.amount <= 0:
-            return False
+            return "non-positive amount"
+        
+        if self.fee < 0:
+            return "negative fee"
+        
+        # Xác minh hash (so với digest đã tính sẵn, không serialize lại)
+        if self._hash_digest is None:
+            return "hash mismatch"
         
-        # Xác minh hash
-        if self.transaction_hash != self.calculate_hash():
+        # Public key phải sinh ra đúng địa chỉ người gửi
+        if self.public_key is not None and CryptoUtils.address_from_public_key(self.public_key) != self.sender:
+            return "public key does not match sender address"
+        
+        return None
+    
+    def verify_signature(self) -> bool:
+        """Xác minh chữ ký bằng scheme tương ứng (trong process hiện tại)"""
+        from .verification import get_scheme
+        try:
+            scheme = get_scheme(self.signature_scheme)
+        except KeyError:
             return False
+        return scheme.verify(*self.signature_item())
+    
+    def is_valid(self, height: Optional[int] = None) -> bool:
+        """
+        Kiểm tra tính hợp lệ của giao dịch
+        
+        Để xác minh nhiều giao dịch cùng lúc, dùng core.verification.SignatureVerifier.
         
-        # Xác minh signature
-        # valid_sig = CryptoUtils.verify(self.transaction_hash, self.signature, self.sender_public_key)
-        # return valid_sig
-        return True # Placeholder
+        Args:
+            height: Chiều cao của block chứa giao dịch (None = giao dịch mới, bắt buộc Ed25519)
+        
+        Returns:
+            bool: True nếu giao dịch hợp lệ
+        """
+        from .verification import requires_ed25519
+        if self.validation_error() is not None:
+            return False
+        if not self.requires_signature:
+            return True
+        if self.signature_scheme != "ed25519" and requires_ed25519(height):
+            return False
+        return self.verify_signature()
     
     def __str__(self) -> str:
         """String representation của giao dịch"""
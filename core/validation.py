@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Chain Validation Module
+File: core/validation.py
+Purpose: Xác minh toàn chuỗi song song (chia chuỗi thành các đoạn liên tiếp cho
+         worker process, ghép nối kiểm tra liên kết ở biên) và chạy theo lịch,
+         tách khỏi kiểm tra O(1) bằng watermark của Blockchain
+Dependencies: core/blockchain.py, core/difficulty.py, core/verification.py
+"""
+
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .difficulty import DifficultyRetargeter
+from .verification import get_ed25519_activation_height, set_ed25519_activation_height
+
+# Số block mỗi work unit
+DEFAULT_VERIFY_RANGE_SIZE = 1000
+
+# Chain chia sẻ cho worker qua fork (copy-on-write, không phải pickle từng block)
+_shared_chain: Optional[List] = None
+
+# (start, end, chỉ số block không hợp lệ đầu tiên, previous_hash của block đầu, hash của block cuối)
+RangeResult = Tuple[int, int, Optional[int], str, str]
+
+def _verify_blocks(start: int, blocks: List, rules=None) -> RangeResult:
+    """
+    Xác minh một đoạn block liên tiếp: index đúng chiều cao, hash, PoW, Merkle root,
+    giới hạn kích thước và phần thưởng (nếu có rules), giao dịch và liên kết bên
+    trong đoạn. Liên kết
+    với đoạn trước được kiểm tra khi ghép nối.
+    """
+    invalid_height = None
+    for offset, block in enumerate(blocks):
+        previous_block = blocks[offset - 1] if offset else None
+        if not block.is_valid(previous_block, rules=rules, height=start + offset):
+            invalid_height = start + offset
+            break
+    return start, start + len(blocks), invalid_height, blocks[0].previous_hash, blocks[-1].hash
+
+def _verify_shared_range(start: int, end: int, rules=None) -> RangeResult:
+    """Worker (fork): đọc block từ chain được kế thừa của process cha"""
+    return _verify_blocks(start, _shared_chain[start:end], rules)
+
+def _verify_range_dicts(start: int, block_dicts: List[Dict[str, Any]], rules=None) -> RangeResult:
+    """Worker (spawn): dựng lại block từ dictionary"""
+    from .blockchain import Blockchain
+    return _verify_blocks(start, [Blockchain.block_from_dict(data) for data in block_dicts], rules)
+
+@dataclass
+class ChainVerificationResult:
+    """
+    Kết quả xác minh toàn chuỗi
+
+    Attributes:
+        invalid_height (Optional[int]): Chỉ số block không hợp lệ đầu tiên (None = hợp lệ)
+        blocks (int): Số block đã kiểm tra
+        ranges (int): Số work unit
+        workers (int): Số worker process (1 = chạy trong process hiện tại)
+        elapsed (float): Thời gian xác minh (giây)
+    """
+    invalid_height: Optional[int]
+    blocks: int
+    ranges: int
+    workers: int
+    elapsed: float
+
+    @property
+    def valid(self) -> bool:
+        return self.invalid_height is None
+
+    @property
+    def blocks_per_second(self) -> float:
+        return self.blocks / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'valid': self.valid,
+            'invalid_height': self.invalid_height,
+            'blocks': self.blocks,
+            'ranges': self.ranges,
+            'workers': self.workers,
+            'elapsed': self.elapsed,
+            'blocks_per_second': self.blocks_per_second
+        }
+
+class ParallelChainVerifier:
+    """
+    Xác minh toàn chuỗi trên nhiều process
+
+    Chuỗi được chia thành các đoạn liên tiếp range_size block; mỗi worker kiểm tra
+    một đoạn. Sau đó process cha ghép nối: block đầu mỗi đoạn phải trỏ tới hash
+    block cuối của đoạn trước. Việc phát lại điều chỉnh độ khó chỉ cần header nên
+    chạy tuần tự trong process cha trong lúc các worker làm việc.
+
+    Worker chỉ được fork (và đọc thẳng chain kế thừa) khi process chưa có thread
+    nào khác; nếu không, worker được tạo bằng spawn và nhận block dạng dictionary.
+
+    Attributes:
+        max_workers (int): Số worker process (0 = số CPU)
+        range_size (int): Số block mỗi work unit
+    """
+
+    def __init__(self, max_workers: int = 0, range_size: int = DEFAULT_VERIFY_RANGE_SIZE):
+        """
+        Khởi tạo verifier
+
+        Args:
+            max_workers: Số worker process (0 = số CPU)
+            range_size: Số block mỗi work unit
+        """
+        from .mining import resolve_worker_count
+        self.max_workers = resolve_worker_count(max_workers)
+        self.range_size = max(1, range_size)
+        self._progress: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def get_progress(self) -> Dict[str, Any]:
+        """Tiến độ của lượt xác minh gần nhất (đang chạy hoặc đã xong)"""
+        with self._lock:
+            return dict(self._progress)
+
+    def _update_progress(self, blocks_done: int, ranges_done: int, started_at: float,
+                         on_progress: Optional[Callable[[Dict[str, Any]], None]]):
+        elapsed = time.time() - started_at
+        with self._lock:
+            self._progress.update({
+                'blocks_verified': blocks_done,
+                'ranges_done': ranges_done,
+                'elapsed': elapsed,
+                'blocks_per_second': blocks_done / elapsed if elapsed > 0 else 0.0
+            })
+            snapshot = dict(self._progress)
+        if on_progress:
+            on_progress(snapshot)
+
+    def verify(self, chain: List, retargeter: Optional[DifficultyRetargeter] = None,
+               on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+               rules=None) -> ChainVerificationResult:
+        """
+        Xác minh toàn bộ chain
+
+        Args:
+            chain: Danh sách block (bắt đầu từ genesis); không bị thay đổi
+            retargeter: Retargeter rỗng có cùng tham số với chain (để phát lại độ khó)
+            on_progress: Callback nhận dictionary tiến độ sau mỗi work unit
+            rules: BlockRules (giới hạn kích thước và phần thưởng) gửi cho worker
+
+        Returns:
+            ChainVerificationResult: Kết quả, kèm block không hợp lệ đầu tiên
+        """
+        global _shared_chain
+
+        started_at = time.time()
+        starts = list(range(1, len(chain), self.range_size))
+        workers = min(self.max_workers, len(starts)) or 1
+        with self._lock:
+            self._progress = {
+                'running': True,
+                'blocks_total': max(0, len(chain) - 1),
+                'ranges_total': len(starts),
+                'workers': workers,
+                'started_at': started_at
+            }
+        self._update_progress(0, 0, started_at, on_progress)
+
+        results: List[RangeResult] = []
+        blocks_done = 0
+        if workers <= 1:
+            for start in starts:
+                results.append(_verify_blocks(start, chain[start:start + self.range_size], rules))
+                blocks_done += results[-1][1] - start
+                self._update_progress(blocks_done, len(results), started_at, on_progress)
+            invalid_candidates = [self._replay_difficulty(chain, retargeter)]
+        else:
+            # fork khi còn thread khác (server HTTP, lượt xác minh theo lịch) có thể sao chép
+            # một lock đang bị giữ (ví dụ lock của LazyChain) sang worker: khi đó tạo worker
+            # bằng spawn. Chain đọc từ store không an toàn qua fork (ví dụ SQLite) cũng gửi
+            # block cho worker thay vì chia sẻ chain.
+            forking = multiprocessing.get_start_method() == 'fork'
+            single_threaded = threading.active_count() == 1
+            use_fork = forking and single_threaded and getattr(chain, 'fork_safe', True)
+            context = multiprocessing.get_context('spawn') if forking and not single_threaded else None
+            if use_fork:
+                _shared_chain = chain
+            try:
+                # Worker không tạo bằng fork không kế thừa chiều cao kích hoạt Ed25519 đã cấu hình
+                with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                         initializer=set_ed25519_activation_height,
+                                         initargs=(get_ed25519_activation_height(),)) as pool:
+                    if use_fork:
+                        futures = [pool.submit(_verify_shared_range, start, start + self.range_size, rules)
+                                   for start in starts]
+                    else:
+                        futures = [pool.submit(_verify_range_dicts, start,
+                                               [block.to_dict() for block in chain[start:start + self.range_size]],
+                                               rules)
+                                   for start in starts]
+
+                    # Phát lại độ khó (chỉ đọc header) trong lúc worker xác minh
+                    invalid_candidates = [self._replay_difficulty(chain, retargeter)]
+
+                    for future in as_completed(futures):
+                        results.append(future.result())
+                        blocks_done += results[-1][1] - results[-1][0]
+                        self._update_progress(blocks_done, len(results), started_at, on_progress)
+            finally:
+                _shared_chain = None
+
+        invalid_candidates.extend(result[2] for result in results)
+        invalid_candidates.append(self._stitch(chain, results))
+        invalid = [height for height in invalid_candidates if height is not None]
+
+        result = ChainVerificationResult(
+            invalid_height=min(invalid) if invalid else None,
+            blocks=blocks_done,
+            ranges=len(results),
+            workers=workers,
+            elapsed=time.time() - started_at
+        )
+        with self._lock:
+            self._progress['running'] = False
+            self._progress['result'] = result.to_dict()
+        return result
+
+    @staticmethod
+    def _stitch(chain: List, results: List[RangeResult]) -> Optional[int]:
+        """Kiểm tra liên kết ở biên giữa các đoạn; trả về block lỗi đầu tiên"""
+        previous_hash = chain[0].hash if chain else None
+        for start, _, _, first_previous_hash, last_hash in sorted(results):
+            if first_previous_hash != previous_hash:
+                return start
+            previous_hash = last_hash
+        return None
+
+    @staticmethod
+    def _replay_difficulty(chain: List, retargeter: Optional[DifficultyRetargeter]) -> Optional[int]:
+        """Phát lại điều chỉnh độ khó; trả về block đầu tiên có target dễ hơn mức bắt buộc"""
+        if retargeter is None or not chain:
+            return None
+        retargeter.append_block(chain[0])
+        for i in range(1, len(chain)):
+            block = chain[i]
+            # Mọi block sau genesis (kể cả block cũ chỉ có difficulty) phải đạt target bắt buộc
+            if block.target > retargeter.next_target():
+                return i
+            retargeter.append_block(block)
+        return None
+
+class ChainVerificationScheduler:
+    """
+    Chạy Blockchain.verify_chain() định kỳ trong một thread nền
+
+    Có thể yêu cầu chạy ngay bằng trigger(); tại mỗi thời điểm chỉ có một lượt
+    xác minh toàn chuỗi.
+
+    Attributes:
+        blockchain: Blockchain cần xác minh
+        interval (float): Chu kỳ xác minh (giây); 0 = chỉ chạy khi được yêu cầu
+    """
+
+    def __init__(self, blockchain, interval: float = 3600):
+        """
+        Khởi tạo scheduler
+
+        Args:
+            blockchain: Blockchain cần xác minh
+            interval: Chu kỳ xác minh (giây); 0 = chỉ chạy khi được yêu cầu
+        """
+        self.blockchain = blockchain
+        self.interval = interval
+        self.running = False
+        self.runs = 0
+        self.next_run_at: Optional[float] = None
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Bắt đầu thread nền (daemon)"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Dừng thread nền sau lượt xác minh đang chạy (nếu có)"""
+        self._stopped.set()
+        self._wake.set()
+
+    def trigger(self) -> bool:
+        """
+        Yêu cầu xác minh toàn chuỗi ngay
+
+        Returns:
+            bool: False nếu một lượt xác minh đang chạy
+        """
+        if self.running:
+            return False
+        self.start()
+        self._wake.set()
+        return True
+
+    def _run(self):
+        while not self._stopped.is_set():
+            timeout = self.interval if self.interval > 0 else None
+            self.next_run_at = time.time() + timeout if timeout else None
+            self._wake.wait(timeout)
+            self._wake.clear()
+            if self._stopped.is_set():
+                break
+
+            self.running = True
+            try:
+                self.blockchain.verify_chain()
+            except Exception as e:
+                print(f"Full chain verification failed: {e}")
+            finally:
+                self.running = False
+                self.runs += 1
+
+    def get_status(self) -> Dict[str, Any]:
+        """Trạng thái lịch xác minh"""
+        return {
+            'interval': self.interval,
+            'running': self.running,
+            'runs': self.runs,
+            'next_run_at': self.next_run_at,
+            'last_result': self.blockchain.last_full_verification,
+            'progress': self.blockchain.get_verification_progress()
+        }
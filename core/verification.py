@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Signature Verification Pipeline Module
+File: core/verification.py
+Purpose: Xác minh chữ ký cho cả block hoặc một loạt giao dịch - chia lô, chạy song
+         song trên process pool, dùng batch verification nếu scheme hỗ trợ và báo
+         lỗi riêng cho từng giao dịch
+Dependencies: utils/crypto.py
+"""
+
+import time
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from utils.crypto import Ed25519
+
+# Số chữ ký mỗi lô gửi cho một worker
+DEFAULT_VERIFY_CHUNK_SIZE = 64
+
+# Dưới ngưỡng này chi phí gửi sang process lớn hơn lợi ích song song
+DEFAULT_PARALLEL_THRESHOLD = 32
+
+# Số chữ ký đã xác minh được nhớ mặc định (~100 byte mỗi mục)
+DEFAULT_SIGNATURE_CACHE_SIZE = 100_000
+
+# Giao dịch vào mempool và block từ chiều cao này trở đi phải có public key và chữ
+# ký Ed25519; chữ ký giữ chỗ chỉ còn được chấp nhận trong block cũ dưới chiều cao này.
+# Đặt qua set_ed25519_activation_height() (cấu hình ed25519_activation_height, hoặc
+# giá trị lưu cùng block store khi chain được chuyển từ blockchain.json cũ)
+ED25519_ACTIVATION_HEIGHT = 0
+
+# (message, signature, public_key)
+SignatureItem = Tuple[bytes, str, Any]
+
+def requires_ed25519(height: Optional[int] = None) -> bool:
+    """
+    Giao dịch ở chiều cao này có bắt buộc dùng Ed25519 không
+
+    Args:
+        height: Chiều cao của block chứa giao dịch (None = giao dịch vào mempool)
+    """
+    return height is None or height >= ED25519_ACTIVATION_HEIGHT
+
+def set_ed25519_activation_height(height: int):
+    """
+    Đặt chiều cao bắt đầu bắt buộc Ed25519
+
+    Cần gọi trước khi tạo process pool; worker tạo bằng spawn nhận giá trị qua
+    initializer (xem ParallelChainVerifier).
+
+    Args:
+        height: Chiều cao của block đầu tiên bắt buộc Ed25519
+    """
+    global ED25519_ACTIVATION_HEIGHT
+    ED25519_ACTIVATION_HEIGHT = max(0, int(height))
+
+def get_ed25519_activation_height() -> int:
+    """Chiều cao bắt đầu bắt buộc Ed25519 đang dùng"""
+    return ED25519_ACTIVATION_HEIGHT
+
+def has_placeholder_signatures(chain) -> bool:
+    """
+    Chain có giao dịch ký bằng chữ ký giữ chỗ cũ không (ví dụ chain chuyển từ blockchain.json)
+
+    Args:
+        chain: Danh sách block (bắt đầu từ genesis)
+    """
+    return any(tx.requires_signature and tx.signature_scheme != Ed25519Scheme.name
+               for block in chain for tx in block.transactions)
+
+class SignatureScheme(ABC):
+    """
+    Abstract base class cho các thuật toán chữ ký
+
+    Lớp con cài đặt verify; verify_batch mặc định kiểm tra từng chữ ký, scheme có
+    batch verification (ví dụ Ed25519) nên override để xác minh cả lô một lần.
+
+    Attributes:
+        name (str): Tên scheme (khóa trong SIGNATURE_SCHEMES)
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def verify(self, message: bytes, signature: str, public_key: Any) -> bool:
+        """Xác minh một chữ ký"""
+
+    def verify_batch(self, items: List[SignatureItem]) -> List[bool]:
+        """
+        Xác minh một lô chữ ký
+
+        Returns:
+            List[bool]: Kết quả theo đúng thứ tự của items
+        """
+        return [self.verify(message, signature, public_key) for message, signature, public_key in items]
+
+class PlaceholderScheme(SignatureScheme):
+    """
+    Chữ ký giữ chỗ cũ ("signed_with_..."): chỉ yêu cầu có chữ ký
+
+    Chỉ được dùng cho block dưới ED25519_ACTIVATION_HEIGHT (xem requires_ed25519);
+    vẫn cần cho chain chuyển từ blockchain.json cũ, nơi chiều cao kích hoạt được
+    đặt ngay trên đỉnh chain lúc chuyển.
+    """
+
+    name = "placeholder"
+
+    def verify(self, message: bytes, signature: str, public_key: Any) -> bool:
+        return bool(signature)
+
+class Ed25519Scheme(SignatureScheme):
+    """Ed25519 (utils/crypto.py), có batch verification"""
+
+    name = "ed25519"
+
+    def verify(self, message: bytes, signature: str, public_key: Any) -> bool:
+        if not signature or not public_key:
+            return False
+        return Ed25519.verify(message, signature, public_key)
+
+    def verify_batch(self, items: List[SignatureItem]) -> List[bool]:
+        # Cả lô đúng là trường hợp thường gặp; chỉ khi lô sai mới xác minh từng chữ ký
+        if len(items) > 1 and all(signature and public_key for _, signature, public_key in items):
+            if Ed25519.verify_batch(items):
+                return [True] * len(items)
+        return super().verify_batch(items)
+
+SIGNATURE_SCHEMES: Dict[str, SignatureScheme] = {}
+
+def register_scheme(scheme: SignatureScheme) -> SignatureScheme:
+    """
+    Đăng ký một scheme chữ ký
+
+    Scheme cần được đăng ký khi import module (trước khi process pool được tạo)
+    để worker process cũng nhìn thấy nó.
+    """
+    SIGNATURE_SCHEMES[scheme.name] = scheme
+    return scheme
+
+def get_scheme(name: str) -> SignatureScheme:
+    """
+    Lấy scheme theo tên
+
+    Raises:
+        KeyError: Nếu scheme chưa được đăng ký
+    """
+    return SIGNATURE_SCHEMES[name]
+
+register_scheme(PlaceholderScheme())
+register_scheme(Ed25519Scheme())
+
+def _verify_chunk(scheme_name: str, items: List[SignatureItem]) -> List[bool]:
+    """Hàm chạy trong worker process: xác minh một lô chữ ký của cùng một scheme"""
+    return get_scheme(scheme_name).verify_batch(items)
+
+class SignatureCache:
+    """
+    Cache LRU các cặp (hash giao dịch, chữ ký) đã xác minh thành công
+
+    Giao dịch được nhận vào mempool sẽ xuất hiện lại trong block; cache giúp
+    Block.is_valid bỏ qua phần xác minh mật mã cho chúng. Chỉ chữ ký hợp lệ được lưu.
+
+    Attributes:
+        max_size (int): Số mục tối đa
+        hits (int): Số lần tra cứu trúng cache
+        misses (int): Số lần tra cứu trượt
+        evictions (int): Số mục bị loại do đầy
+    """
+
+    def __init__(self, max_size: int = DEFAULT_SIGNATURE_CACHE_SIZE):
+        self.max_size = max(1, max_size)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def contains(self, tx_hash: str, signature: str) -> bool:
+        """Tra cứu (đếm hit/miss) và đánh dấu mục vừa dùng"""
+        key = (tx_hash, signature)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def add(self, tx_hash: str, signature: str):
+        """Ghi nhận một chữ ký đã xác minh, loại mục cũ nhất nếu đầy"""
+        key = (tx_hash, signature)
+        with self._lock:
+            self._entries[key] = None
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Kích thước và bộ đếm hit/miss của cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+@dataclass
+class VerificationReport:
+    """
+    Kết quả xác minh một block hoặc một loạt giao dịch
+
+    Attributes:
+        checked (int): Số giao dịch đã kiểm tra
+        signatures (int): Số chữ ký đã xác minh bằng mật mã
+        cached (int): Số chữ ký bỏ qua nhờ SignatureCache
+        failures (Dict[str, str]): Hash giao dịch -> lý do không hợp lệ
+        elapsed (float): Thời gian xác minh (giây)
+        workers (int): Số worker process đã dùng (1 = chạy trong process hiện tại)
+    """
+    checked: int = 0
+    signatures: int = 0
+    cached: int = 0
+    failures: Dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0
+    workers: int = 1
+
+    @property
+    def valid(self) -> bool:
+        """True nếu mọi giao dịch đều hợp lệ"""
+        return not self.failures
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'valid': self.valid,
+            'checked': self.checked,
+            'signatures': self.signatures,
+            'cached': self.cached,
+            'failures': dict(self.failures),
+            'elapsed': self.elapsed,
+            'workers': self.workers
+        }
+
+class SignatureVerifier:
+    """
+    Pipeline xác minh chữ ký
+
+    Kiểm tra cấu trúc (hash, số tiền, ...) chạy ngay trong process hiện tại; các chữ
+    ký được nhóm theo scheme, chia lô và gửi cho process pool (tạo khi cần lần đầu).
+    Loạt nhỏ hoặc max_workers=1 được xác minh tuần tự, không tạo pool. Chữ ký đã
+    có trong cache (nếu được cấu hình) không bị xác minh lại.
+
+    Attributes:
+        max_workers (int): Số worker process (0 = số CPU)
+        chunk_size (int): Số chữ ký mỗi lô
+        parallel_threshold (int): Số chữ ký tối thiểu để dùng process pool
+        cache (Optional[SignatureCache]): Cache chữ ký đã xác minh
+    """
+
+    def __init__(self, max_workers: int = 1, chunk_size: int = DEFAULT_VERIFY_CHUNK_SIZE,
+                 parallel_threshold: int = DEFAULT_PARALLEL_THRESHOLD,
+                 cache: Optional[SignatureCache] = None):
+        """
+        Khởi tạo verifier
+
+        Args:
+            max_workers: Số worker process (0 = số CPU)
+            chunk_size: Số chữ ký mỗi lô
+            parallel_threshold: Số chữ ký tối thiểu để dùng process pool
+            cache: Cache chữ ký đã xác minh (dùng chung cho mempool và block)
+        """
+        from .mining import resolve_worker_count
+        self.max_workers = resolve_worker_count(max_workers)
+        self.chunk_size = max(1, chunk_size)
+        self.parallel_threshold = parallel_threshold
+        self.cache = cache
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._pool
+
+    def close(self):
+        """Tắt process pool (nếu đã tạo)"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+    def verify_block(self, block, height: Optional[int] = None) -> VerificationReport:
+        """
+        Xác minh mọi giao dịch trong block
+
+        Args:
+            block: Block cần xác minh
+            height: Chiều cao thực của block trong chain (không dùng block.index do
+                block tự khai; None = bắt buộc Ed25519 như giao dịch mới)
+        """
+        return self.verify_transactions(block.transactions, height)
+
+    def verify_transactions(self, transactions: Iterable, height: Optional[int] = None) -> VerificationReport:
+        """
+        Xác minh một loạt giao dịch
+
+        Giao dịch cần chữ ký phải có public key (scheme Ed25519), trừ trong block cũ
+        dưới ED25519_ACTIVATION_HEIGHT.
+
+        Args:
+            transactions: Các giao dịch cần kiểm tra
+            height: Chiều cao của block chứa các giao dịch (None = giao dịch vào mempool)
+
+        Returns:
+            VerificationReport: Kết quả, kèm lý do cho từng giao dịch không hợp lệ
+        """
+        start_time = time.time()
+        report = VerificationReport()
+        ed25519_only = requires_ed25519(height)
+
+        # scheme -> [(hash giao dịch, item)]
+        pending: Dict[str, List[Tuple[str, SignatureItem]]] = {}
+        for transaction in transactions:
+            report.checked += 1
+            error = transaction.validation_error()
+            if error:
+                report.failures[transaction.transaction_hash] = error
+                continue
+            if not transaction.requires_signature:
+                continue
+            if ed25519_only and transaction.signature_scheme != Ed25519Scheme.name:
+                report.failures[transaction.transaction_hash] = "missing public key"
+                continue
+            if self.cache is not None and self.cache.contains(transaction.transaction_hash, transaction.signature):
+                report.cached += 1
+                continue
+            pending.setdefault(transaction.signature_scheme, []).append(
+                (transaction.transaction_hash, transaction.signature_item())
+            )
+
+        for scheme_name, entries in pending.items():
+            if scheme_name not in SIGNATURE_SCHEMES:
+                for tx_hash, _ in entries:
+                    report.failures[tx_hash] = f"unknown signature scheme: {scheme_name}"
+                continue
+
+            results = self._verify_items(scheme_name, [item for _, item in entries], report)
+            report.signatures += len(entries)
+            for (tx_hash, item), ok in zip(entries, results):
+                if not ok:
+                    report.failures[tx_hash] = "invalid signature"
+                elif self.cache is not None:
+                    self.cache.add(tx_hash, item[1])
+
+        report.elapsed = time.time() - start_time
+        return report
+
+    def _verify_items(self, scheme_name: str, items: List[SignatureItem], report: VerificationReport) -> List[bool]:
+        """Xác minh các chữ ký của một scheme, song song nếu loạt đủ lớn"""
+        if self.max_workers <= 1 or len(items) < self.parallel_threshold:
+            return get_scheme(scheme_name).verify_batch(items)
+
+        chunks = [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+        try:
+            pool = self._get_pool()
+            futures = [pool.submit(_verify_chunk, scheme_name, chunk) for chunk in chunks]
+            results: List[bool] = []
+            for future in futures:
+                results.extend(future.result())
+        except BrokenProcessPool:
+            # Worker chết giữa chừng: bỏ pool hỏng và xác minh tuần tự
+            with self._lock:
+                self._pool = None
+            return get_scheme(scheme_name).verify_batch(items)
+
+        report.workers = max(report.workers, min(self.max_workers, len(chunks)))
+        return results
@@ -9,7 +9,9 @@ Course: Chuỗi khối trong Kinh doanh (BLB 515)
 Dependencies: All modules
 """
 
+import os
 import sys
+import json
 import time
 import threading
 import argparse
@@ -17,11 +19,18 @@ from typing import Optional
 
 # Import core modules
 from core.blockchain import Blockchain
+from core.chain_view import LazyChain
 from core.transaction import Transaction
+from core.mempool import Mempool, MempoolError
+from core.template import BlockTemplateBuilder
 from core.node import Node
 from core.consensus import create_consensus
+from core.verification import (SignatureCache, SignatureVerifier, get_ed25519_activation_height,
+                               has_placeholder_signatures, set_ed25519_activation_height)
+from core.validation import ParallelChainVerifier
 
 # Import network modules
+from storage.base import create_block_store
 from network.server import BlockchainHTTPServer
 from network.p2p import P2PNetwork
 
@@ -42,7 +51,25 @@ def demo_mode():
     print("🚀 Running Blockchain Demo Mode... / Chạy chế độ demo...")
     
     # 1. Initialize blockchain
-    blockchain = Blockchain()
+    blockchain = Blockchain(
+        difficulty=config.blockchain.difficulty,
+        target_block_time=config.blockchain.target_block_time,
+        difficulty_adjustment_blocks=config.consensus.difficulty_adjustment_blocks
+    )
+    blockchain.mining_workers = config.consensus.max_mining_threads
+    blockchain.signature_verifier = SignatureVerifier(
+        max_workers=config.consensus.signature_verify_workers,
+        cache=SignatureCache(config.consensus.signature_cache_size)
+    )
+    blockchain.chain_verifier = ParallelChainVerifier(max_workers=config.consensus.chain_verify_workers)
+    blockchain.mempool = Mempool(
+        max_transactions=config.blockchain.mempool_max_transactions,
+        max_bytes=config.blockchain.mempool_max_bytes
+    )
+    blockchain.template_builder = BlockTemplateBuilder(
+        max_transactions=config.blockchain.max_transactions_per_block,
+        max_bytes=config.blockchain.max_block_bytes
+    )
     print("Blockchain initialized. / Đã khởi tạo chuỗi khối.")
     
     # 2. Create wallets
@@ -54,11 +81,16 @@ def demo_mode():
     for name, info in wallet_manager.list_wallets().items():
         print(f"  - {name}: {info}")
     
-    # 3. Create transactions
-    print("\nCreating transactions... / Đang tạo giao dịch...")
     alice_wallet = wallet_manager.get_wallet("alice")
     bob_wallet = wallet_manager.get_wallet("bob")
     
+    # 3. Fund alice and bob (giao dịch chi quá số dư bị mempool từ chối)
+    print("\nFunding alice and bob with mining rewards... / Đào khối thưởng cho alice và bob...")
+    blockchain.mine_pending_transactions(alice_wallet['address'])
+    blockchain.mine_pending_transactions(bob_wallet['address'])
+    
+    # 4. Create transactions
+    print("\nCreating transactions... / Đang tạo giao dịch...")
     tx1 = Transaction(alice_wallet['address'], bob_wallet['address'], 10, alice_wallet['private_key'])
     tx2 = Transaction(bob_wallet['address'], alice_wallet['address'], 5, bob_wallet['private_key'])
     
@@ -66,18 +98,80 @@ def demo_mode():
     blockchain.add_transaction(tx2)
     print("2 transactions added to mempool. / 2 giao dịch đã được thêm vào vùng chờ.")
     
-    # 4. Mine a block
+    # 5. Mine a block
     print("\nMining a block... / Đang đào khối...")
     miner_wallet = wallet_manager.get_wallet("miner")
     blockchain.mine_pending_transactions(miner_wallet['address'])
     
-    # 5. Visualize the chain
+    # 6. Visualize the chain
     BlockchainVisualizer.print_chain(blockchain)
     
-    # 6. Check status
+    # 7. Check status
     BlockchainAnalyzer.print_status(blockchain)
     print("\n✅ Demo finished. / Hoàn thành demo.")
 
+# Lệnh tra cứu: backend có chỉ mục (sqlite) trả lời mà không nạp chain
+QUERY_COMMANDS = ('balance', 'history', 'tx')
+
+def load_wallets(path: str) -> bool:
+    """
+    Nạp wallets.json vào wallet_manager, dựng lại ví cũ (trước Ed25519) từ private key
+    
+    Returns:
+        bool: False nếu có ví không dùng được (đã in lỗi)
+    """
+    if not os.path.exists(path):
+        return True
+    wallet_data = FileUtils.load_json(path)
+    if not wallet_data:
+        return True
+    try:
+        migrated = wallet_manager.load_wallets(wallet_data)
+    except ValueError as e:
+        print(f"❌ {e}. Fix or remove it in {path}. / Ví không hợp lệ, hãy sửa hoặc xoá trong {path}.")
+        return False
+    print("Wallet data loaded from file. / Đã tải dữ liệu ví từ file.")
+    for name in migrated:
+        wallet = wallet_manager.get_wallet(name)
+        print(f"⚠️ Wallet '{name}' re-derived from its Ed25519 key: {wallet['address']}. Funds at the legacy "
+              f"address {wallet.get('legacy_address')} cannot be spent. / Ví '{name}' đã được tạo lại từ khóa Ed25519.")
+    return True
+
+def load_mempool_file(path: str) -> Mempool:
+    """Mempool dựng từ mempool.json (giao dịch đã được node nhận trước đó), chỉ dùng để đọc"""
+    mempool = Mempool(max_transactions=config.blockchain.mempool_max_transactions,
+                      max_bytes=config.blockchain.mempool_max_bytes)
+    if os.path.exists(path):
+        for tx_data in FileUtils.load_json(path) or []:
+            try:
+                mempool.add(Transaction.from_dict(tx_data))
+            except MempoolError:
+                pass
+    return mempool
+
+def run_query(args, source, mempool: Optional[Mempool] = None):
+    """
+    In kết quả lệnh balance / history / tx
+    
+    Args:
+        args: Tham số dòng lệnh
+        source: Blockchain hoặc BlockStore cài đặt BlockQueries (cùng tên phương thức)
+        mempool: Mempool cho khoản đang chờ khi source là BlockStore
+    """
+    if args.command == 'tx':
+        result = source.get_transaction(args.hash)
+        if result is None:
+            print(f"❌ Transaction not found: {args.hash} / Không tìm thấy giao dịch.")
+            return
+    else:
+        wallet = wallet_manager.get_wallet(args.address)
+        address = wallet['address'] if wallet else args.address
+        if args.command == 'balance':
+            result = source.get_account(address) if mempool is None else source.get_account(address, mempool)
+        else:
+            result = source.get_transaction_history_page(address, args.limit, args.cursor, args.desc)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
 def main():
     """
     Main entry point for the application
@@ -109,6 +203,7 @@ def main():
     parser_tx.add_argument('sender', metavar='SENDER_WALLET', help='Tên ví người gửi.')
     parser_tx.add_argument('receiver', metavar='RECEIVER_WALLET', help='Tên ví người nhận.')
     parser_tx.add_argument('amount', metavar='AMOUNT', type=float, help='Số lượng giao dịch.')
+    parser_tx.add_argument('--fee', type=float, default=0, help='Phí giao dịch (mặc định: 0).')
 
     # --- Command: chain ---
     parser_chain = subparsers.add_parser('chain', help='Hiển thị toàn bộ chuỗi khối.')
@@ -123,6 +218,21 @@ def main():
     parser_create_wallet = subparsers.add_parser('create-wallet', help='Tạo một ví mới.')
     parser_create_wallet.add_argument('name', metavar='WALLET_NAME', help='Tên của ví mới.')
 
+    # --- Command: balance ---
+    parser_balance = subparsers.add_parser('balance', help='Xem số dư của một ví hoặc địa chỉ.')
+    parser_balance.add_argument('address', metavar='WALLET_OR_ADDRESS', help='Tên ví hoặc địa chỉ.')
+    
+    # --- Command: history ---
+    parser_history = subparsers.add_parser('history', help='Xem lịch sử giao dịch của một ví hoặc địa chỉ.')
+    parser_history.add_argument('address', metavar='WALLET_OR_ADDRESS', help='Tên ví hoặc địa chỉ.')
+    parser_history.add_argument('--limit', type=int, default=20, help='Số giao dịch mỗi trang (mặc định: 20).')
+    parser_history.add_argument('--cursor', type=int, default=None, help='Cursor trả về từ trang trước.')
+    parser_history.add_argument('--desc', action='store_true', help='Giao dịch mới nhất trước.')
+    
+    # --- Command: tx ---
+    parser_lookup = subparsers.add_parser('tx', help='Tra cứu giao dịch đã xác nhận theo hash.')
+    parser_lookup.add_argument('hash', metavar='TX_HASH', help='Hash giao dịch.')
+
     # --- Command: server ---
     parser_server = subparsers.add_parser('server', help='Chạy node như một máy chủ (P2P và HTTP).')
     
@@ -138,28 +248,106 @@ def main():
     if args.command == 'demo':
         demo_mode()
         return
+    
+    # Backend lưu block: block log chỉ ghi nối hoặc SQLite (lưu một block mới tốn O(block))
+    block_store = create_block_store(config.storage.backend, config.get_block_store_path(),
+                                     **config.get_block_store_options())
+    store_stats = block_store.get_stats()
+    if store_stats.get('recovered') or store_stats.get('truncated_bytes'):
+        print(f"Block log recovered: {store_stats['recovered']} records re-indexed, "
+              f"{store_stats['truncated_bytes']} torn bytes dropped. / Đã khôi phục block log.")
+    if store_stats.get('reindexed'):
+        print(f"Query index rebuilt from block log: {store_stats['reindexed']} blocks. "
+              f"/ Đã dựng lại chỉ mục truy vấn từ block log.")
+    
+    # Chain chuyển từ JSON cũ lưu chiều cao kích hoạt Ed25519 riêng; cấu hình chỉ nâng thêm được
+    set_ed25519_activation_height(max(config.blockchain.ed25519_activation_height,
+                                      block_store.load_chain_params().get('ed25519_activation_height', 0)))
+    
+    if args.command in QUERY_COMMANDS and block_store.supports_queries and len(block_store):
+        # Trả lời thẳng từ chỉ mục của backend, không nạp chain vào bộ nhớ
+        if load_wallets(config.storage.wallets_file):
+            mempool = load_mempool_file(config.get_mempool_file_path()) if args.command == 'balance' else None
+            run_query(args, block_store, mempool)
+        block_store.close()
+        return
 
     # Initialize components
-    blockchain = Blockchain()
+    blockchain = Blockchain(
+        difficulty=config.blockchain.difficulty,
+        target_block_time=config.blockchain.target_block_time,
+        difficulty_adjustment_blocks=config.consensus.difficulty_adjustment_blocks
+    )
+    blockchain.mining_workers = config.consensus.max_mining_threads
+    blockchain.signature_verifier = SignatureVerifier(
+        max_workers=config.consensus.signature_verify_workers,
+        cache=SignatureCache(config.consensus.signature_cache_size)
+    )
+    blockchain.chain_verifier = ParallelChainVerifier(max_workers=config.consensus.chain_verify_workers)
+    blockchain.mempool = Mempool(
+        max_transactions=config.blockchain.mempool_max_transactions,
+        max_bytes=config.blockchain.mempool_max_bytes
+    )
+    blockchain.template_builder = BlockTemplateBuilder(
+        max_transactions=config.blockchain.max_transactions_per_block,
+        max_bytes=config.blockchain.max_block_bytes
+    )
     
     # Load data from files
     try:
-        chain_data = FileUtils.load_json(config.storage.blockchain_file)
-        if chain_data and 'chain' in chain_data:
-            blockchain.chain = [Blockchain.block_from_dict(b) for b in chain_data['chain']]
-            blockchain.pending_transactions = [Transaction.from_dict(tx) for tx in chain_data.get('pending_transactions', [])]
-            print("Blockchain data loaded from file. / Đã tải dữ liệu chuỗi khối từ file.")
+        chain_loaded = False
+        if len(block_store):
+            # Block được đọc từ bộ lưu trữ khi cần, không nạp toàn bộ chain vào bộ nhớ
+            blockchain.load_chain(LazyChain(block_store, cache_size=config.storage.block_cache_size))
+            chain_loaded = True
+            print(f"Blockchain loaded from {config.storage.backend} storage ({len(block_store)} blocks). "
+                  f"/ Đã tải chuỗi khối từ bộ lưu trữ.")
+        elif os.path.exists(config.storage.blockchain_file):
+            # Dữ liệu JSON cũ: nạp một lần rồi chuyển sang block log
+            chain_data = FileUtils.load_json(config.storage.blockchain_file)
+            if chain_data and 'chain' in chain_data:
+                blockchain.load_chain([Blockchain.block_from_dict(b) for b in chain_data['chain']])
+                if has_placeholder_signatures(blockchain.chain) and len(blockchain.chain) > get_ed25519_activation_height():
+                    # Block cũ mang chữ ký giữ chỗ: chỉ block sau đỉnh lúc chuyển mới bắt buộc Ed25519
+                    set_ed25519_activation_height(len(blockchain.chain))
+                    block_store.save_chain_params({**block_store.load_chain_params(),
+                                                   'ed25519_activation_height': len(blockchain.chain)})
+                    print(f"Legacy signatures found: Ed25519 required from height {len(blockchain.chain)}. "
+                          f"/ Chain cũ: bắt buộc Ed25519 từ độ cao {len(blockchain.chain)}.")
+                blockchain.pending_transactions = [Transaction.from_dict(tx) for tx in chain_data.get('pending_transactions', [])]
+                block_store.sync_chain(blockchain.chain)
+                chain_loaded = True
+                print(f"Blockchain data migrated from JSON file to {config.storage.backend} storage. "
+                      f"/ Đã chuyển dữ liệu chuỗi khối từ file JSON sang bộ lưu trữ mới.")
+        
+        if os.path.exists(config.get_mempool_file_path()):
+            mempool_data = FileUtils.load_json(config.get_mempool_file_path()) or []
+            blockchain.pending_transactions = [Transaction.from_dict(tx) for tx in mempool_data]
+        
+        if chain_loaded:
+            # Watermark lưu cùng backend được tin; chỉ block phía trên nó được xác minh
+            # (xác minh lại toàn chuỗi chạy riêng theo lịch trong chế độ server)
+            watermark = block_store.load_watermark()
+            if watermark:
+                blockchain.restore_watermark(*watermark)
+            verification = blockchain.verify_new_blocks()
+            if verification['blocks']:
+                print(f"Chain verified above watermark: {verification['blocks']} blocks in "
+                      f"{verification['elapsed']:.2f}s / Đã xác minh các khối mới.")
+                block_store.save_watermark(blockchain.validated_height, blockchain.validated_tip_hash)
+            if not verification['valid']:
+                print(f"⚠️ Invalid block at height {verification['invalid_height']}. / Khối không hợp lệ tại độ cao {verification['invalid_height']}.")
         
-        wallet_data = FileUtils.load_json(config.storage.wallets_file)
-        if wallet_data:
-            wallet_manager.wallets = wallet_data
-            print("Wallet data loaded from file. / Đã tải dữ liệu ví từ file.")
-            
     except FileNotFoundError:
         print("No saved data found. Starting with a fresh blockchain. / Không tìm thấy dữ liệu đã lưu. Bắt đầu với chuỗi khối mới.")
     except Exception as e:
         print(f"Could not load data: {e}. Starting fresh. / Không thể tải dữ liệu: {e}. Bắt đầu mới.")
 
+    # Ví không dùng được: dừng trước khi lệnh nào ghi đè wallets.json
+    if not load_wallets(config.storage.wallets_file):
+        block_store.close()
+        return
+
     p2p_network = P2PNetwork(blockchain, host=config.network.p2p_host, port=config.network.p2p_port)
 
     # --- Execute Commands ---
@@ -187,6 +375,10 @@ def main():
         action_taken = True
         BlockchainAnalyzer.print_status(blockchain)
 
+    elif args.command in QUERY_COMMANDS:
+        action_taken = True
+        run_query(args, blockchain)
+
     elif args.command == 'transaction':
         action_taken = True
         try:
@@ -198,7 +390,8 @@ def main():
             if not receiver_wallet:
                 raise ValueError(f"Receiver wallet '{args.receiver}' not found. / Không tìm thấy ví người nhận '{args.receiver}'.")
 
-            tx = Transaction(sender_wallet['address'], receiver_wallet['address'], args.amount, sender_wallet['private_key'])
+            tx = Transaction(sender_wallet['address'], receiver_wallet['address'], args.amount,
+                             sender_wallet['private_key'], fee=args.fee)
             blockchain.add_transaction(tx)
             print("✅ Transaction added to local mempool. / Đã thêm giao dịch vào mempool cục bộ.")
             # p2p_network.broadcast_transaction(tx)
@@ -216,12 +409,16 @@ def main():
             miner_wallet = wallet_manager.create_wallet(miner_wallet_name)
 
         print(f"⛏️  Mining a new block... (reward to: {miner_wallet_name}) / Đang đào khối mới... (thưởng cho: {miner_wallet_name})")
-        if not blockchain.pending_transactions:
+        if not blockchain.mempool:
             print("ℹ️ No pending transactions to mine. A block will be created with only the reward. / Không có giao dịch chờ xử lý. Khối mới sẽ chỉ có giao dịch thưởng.")
         
         new_block = blockchain.mine_pending_transactions(miner_wallet['address'])
-        print(f"🎉 New block #{new_block.index} mined successfully! / Đã đào xong khối mới #{new_block.index}!")
-        BlockchainVisualizer.print_block(new_block)
+        if new_block is None:
+            print("❌ Mining was cancelled before a block was found. / Việc đào khối đã bị huỷ trước khi tìm được khối.")
+        else:
+            print(f"🎉 New block #{new_block.index} mined successfully! / Đã đào xong khối mới #{new_block.index}!")
+            BlockchainVisualizer.print_block(new_block)
+        BlockchainAnalyzer.print_mining_stats(blockchain.telemetry.get_stats())
         # p2p_network.broadcast_block(new_block)
 
     elif args.command == 'server':
@@ -233,7 +430,8 @@ def main():
         http_server = BlockchainHTTPServer(
             (config.network.http_host, config.network.http_port),
             blockchain,
-            p2p_network
+            p2p_network,
+            verification_interval=config.blockchain.full_verification_interval
         )
         http_thread = threading.Thread(target=http_server.serve_forever)
         http_thread.daemon = True
@@ -247,15 +445,23 @@ def main():
                 time.sleep(1)
         except KeyboardInterrupt:
             print("\nShutting down... / Đang tắt...")
+            if config.storage.auto_save:
+                block_store.sync_chain(blockchain.chain)
+                block_store.save_watermark(blockchain.validated_height, blockchain.validated_tip_hash)
+                FileUtils.save_json(config.get_mempool_file_path(), [tx.to_dict() for tx in blockchain.mempool])
 
     # Save data if changed and not in server mode
     if action_taken and args.command != 'server':
         if args.command in ['transaction', 'mine', 'create-wallet']:
              if config.storage.auto_save:
-                blockchain.save_to_file(config.storage.blockchain_file)
+                block_store.sync_chain(blockchain.chain)
+                block_store.save_watermark(blockchain.validated_height, blockchain.validated_tip_hash)
+                FileUtils.save_json(config.get_mempool_file_path(), [tx.to_dict() for tx in blockchain.mempool])
                 FileUtils.save_json(config.storage.wallets_file, wallet_manager.wallets)
                 print(f"💾 Blockchain and wallets saved. / Đã lưu chuỗi khối và ví.")
 
+    block_store.close()
+
     if not action_taken:
         print("No action specified. Use 'python3 main.py --help' for options. / Không có hành động nào được chỉ định. Sử dụng 'python3 main.py --help' để xem các tùy chọn.")
 
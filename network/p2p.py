@@ -13,6 +13,7 @@ import time
 import hashlib
 from typing import Dict, List, Set, Optional, Callable
 from dataclasses import dataclass
+from core.transaction import Transaction
 
 @dataclass
 class PeerInfo:
@@ -330,6 +331,7 @@ class P2PNetwork:
 
         try:
             new_block = self.blockchain.block_from_dict(block_data)
+            # add_block báo cho job khai thác đang chạy để dựng lại template trên đỉnh mới
             if self.blockchain.add_block(new_block):
                 print(f"✅ Appended new block #{new_block.index} from network.")
             else:
@@ -344,6 +346,12 @@ class P2PNetwork:
             print("Received a 'new_transaction' message without transaction data.")
             return
             
+        # Relay lặp lại: bỏ qua ngay theo hash, không dựng lại / xác minh giao dịch
+        tx_hash = tx_data.get('transaction_hash')
+        if tx_hash and self.blockchain.is_known_transaction(tx_hash):
+            self.blockchain.mempool.record_duplicate()
+            return
+
         try:
             transaction = Transaction.from_dict(tx_data)
             if self.blockchain.add_transaction(transaction):
@@ -8,18 +8,26 @@ Dependencies: core/node.py, network/p2p.py
 
 import json
 import threading
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 from typing import Dict, Any, Optional
+from core.mining import MiningJobManager
+from core.validation import ChainVerificationScheduler
+
+# Phân trang cho /transactions
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
 
 class BlockchainHTTPHandler(BaseHTTPRequestHandler):
     """
     HTTP Request Handler cho blockchain API
     """
     
-    def __init__(self, blockchain, p2p_network, *args, **kwargs):
+    def __init__(self, blockchain, p2p_network, mining_jobs, chain_verification, *args, **kwargs):
         self.blockchain = blockchain
         self.p2p_network = p2p_network
+        self.mining_jobs = mining_jobs
+        self.chain_verification = chain_verification
         super().__init__(*args, **kwargs)
 
     def do_GET(self):
@@ -39,10 +47,24 @@ class BlockchainHTTPHandler(BaseHTTPRequestHandler):
                 self._handle_get_balance(query_params)
             elif path == "/transactions":
                 self._handle_get_transactions(query_params)
+            elif path == "/proof":
+                self._handle_get_proof(query_params)
             elif path == "/peers":
                 self._handle_get_peers()
             elif path == "/mining/stats":
                 self._handle_mining_stats()
+            elif path.startswith("/mine/"):
+                self._handle_get_mining_job(path[len("/mine/"):])
+            elif path == "/verify":
+                self._handle_get_verification()
+            elif path == "/block-template":
+                self._handle_get_block_template()
+            elif path.startswith("/tx/"):
+                self._handle_get_transaction(path[len("/tx/"):])
+            elif path.startswith("/block/height/"):
+                self._handle_get_block_by_height(path[len("/block/height/"):])
+            elif path.startswith("/block/"):
+                self._handle_get_block_by_hash(path[len("/block/"):])
             else:
                 self._send_error(404, "Endpoint not found")
                 
@@ -68,6 +90,8 @@ class BlockchainHTTPHandler(BaseHTTPRequestHandler):
                 self._handle_connect_peer(data)
             elif path == "/sync":
                 self._handle_sync_blockchain()
+            elif path == "/verify":
+                self._handle_start_verification()
             else:
                 self._send_error(404, "Endpoint not found")
                 
@@ -85,13 +109,21 @@ class BlockchainHTTPHandler(BaseHTTPRequestHandler):
                 "GET /status - Node status",
                 "GET /blockchain - Full blockchain",
                 "GET /balance?address=<addr> - Get balance",
-                "GET /transactions?address=<addr> - Get transactions",
+                "GET /transactions?address=<addr>&limit=<n>&cursor=<c>&order=asc|desc - Get transactions (paginated)",
+                "GET /proof?tx=<hash> - Merkle inclusion proof (SPV)",
+                "GET /tx/<hash> - Transaction by hash",
+                "GET /block/<hash> - Block by hash",
+                "GET /block/height/<n> - Block by height",
                 "GET /peers - Connected peers",
                 "GET /mining/stats - Mining statistics",
                 "POST /transaction - Create transaction",
-                "POST /mine - Mine pending transactions",
+                "POST /mine - Start mining job (returns job_id)",
+                "GET /mine/<job_id> - Mining job progress / result",
                 "POST /connect - Connect to peer",
-                "POST /sync - Sync blockchain"
+                "POST /sync - Sync blockchain",
+                "POST /verify - Start full chain verification",
+                "GET /verify - Full chain verification schedule / last result",
+                "GET /block-template - Transactions and header fields for the next block"
             ]
         }
         self._send_json_response(response)
@@ -100,11 +132,17 @@ class BlockchainHTTPHandler(BaseHTTPRequestHandler):
         """Xử lý status endpoint"""
         status = {
             "blocks": len(self.blockchain.chain),
-            "pending_transactions": len(self.blockchain.pending_transactions),
-            "difficulty": self.blockchain.difficulty,
-            "is_valid": self.blockchain.is_chain_valid(),
+            "pending_transactions": len(self.blockchain.mempool),
+            "difficulty": self.blockchain.current_difficulty,
+            "target_bits": self.blockchain.get_next_bits(),
             "peers": len(self.p2p_network.peers) if self.p2p_network else 0,
         }
+        # Trạng thái hợp lệ theo watermark (O(1)); xác minh toàn chuỗi chạy riêng qua /verify
+        status.update(self.blockchain.get_validation_status())
+        cache = self.blockchain.signature_verifier.cache
+        if cache is not None:
+            status["signature_cache"] = cache.get_stats()
+        status["mempool"] = self.blockchain.mempool.get_stats()
         self._send_json_response(status)
     
     def _handle_get_blockchain(self):
@@ -119,12 +157,8 @@ class BlockchainHTTPHandler(BaseHTTPRequestHandler):
             self._send_error(400, "Missing address parameter")
             return
         
-        balance = self.blockchain.get_balance(address[0])
-        
-        response = {
-            "address": address[0],
-            "balance": balance
-        }
+        # Tra cứu O(1) từ state index: address, balance, nonce, tx_count
+        response = self.blockchain.get_account(address[0])
         self._send_json_response(response)
     
     def _handle_get_transactions(self, query_params):
@@ -134,14 +168,68 @@ class BlockchainHTTPHandler(BaseHTTPRequestHandler):
             self._send_error(400, "Missing address parameter")
             return
         
-        transactions = self.blockchain.get_transaction_history(address[0])
+        try:
+            limit = int(query_params.get('limit', [DEFAULT_PAGE_SIZE])[0])
+            cursor = query_params.get('cursor', [None])[0]
+            cursor = int(cursor) if cursor not in (None, "") else None
+        except ValueError:
+            self._send_error(400, "limit and cursor must be integers")
+            return
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            self._send_error(400, f"limit must be between 1 and {MAX_PAGE_SIZE}")
+            return
+        descending = query_params.get('order', ['asc'])[0] == 'desc'
+        
+        page = self.blockchain.get_transaction_history_page(address[0], limit, cursor, descending)
         
         response = {
             "address": address[0],
-            "transactions": transactions
+            **page
         }
         self._send_json_response(response)
     
+    def _handle_get_proof(self, query_params):
+        """Xử lý Merkle proof endpoint (SPV)"""
+        tx_hash = query_params.get('tx')
+        if not tx_hash or not tx_hash[0]:
+            self._send_error(400, "Missing tx parameter")
+            return
+        
+        proof = self.blockchain.get_transaction_proof(tx_hash[0])
+        if proof is None:
+            self._send_error(404, f"Transaction not found in chain: {tx_hash[0]}")
+            return
+        
+        self._send_json_response(proof)
+    
+    def _handle_get_transaction(self, tx_hash: str):
+        """Tra cứu giao dịch theo hash (O(1))"""
+        transaction = self.blockchain.get_transaction(tx_hash)
+        if transaction is None:
+            self._send_error(404, f"Transaction not found in chain: {tx_hash}")
+            return
+        self._send_json_response(transaction)
+    
+    def _handle_get_block_by_hash(self, block_hash: str):
+        """Tra cứu block theo hash (O(1))"""
+        block = self.blockchain.get_block_by_hash(block_hash)
+        if block is None:
+            self._send_error(404, f"Block not found: {block_hash}")
+            return
+        self._send_json_response(block.to_dict())
+    
+    def _handle_get_block_by_height(self, height: str):
+        """Tra cứu block theo chiều cao (O(1))"""
+        try:
+            block = self.blockchain.get_block_by_height(int(height))
+        except ValueError:
+            self._send_error(400, f"Invalid block height: {height}")
+            return
+        if block is None:
+            self._send_error(404, f"Block not found at height: {height}")
+            return
+        self._send_json_response(block.to_dict())
+    
     def _handle_get_peers(self):
         """Xử lý get peers endpoint"""
         peers = self.p2p_network.get_peer_list() if self.p2p_network else []
@@ -153,11 +241,10 @@ class BlockchainHTTPHandler(BaseHTTPRequestHandler):
     
     def _handle_mining_stats(self):
         """Xử lý mining stats endpoint"""
-        response = {
-            "blocks_mined": 0,
-            "hash_rate": 0,
-            "difficulty": self.blockchain.difficulty
-        }
+        response = self.blockchain.telemetry.get_stats()
+        response["difficulty"] = self.blockchain.current_difficulty
+        running = self.mining_jobs.get_running_job(self.blockchain)
+        response["current_job"] = running.get_progress() if running else None
         self._send_json_response(response)
     
     def _handle_create_transaction(self, data):
@@ -195,29 +282,70 @@ class BlockchainHTTPHandler(BaseHTTPRequestHandler):
             self._send_error(500, f"Failed to create transaction: {str(e)}")
     
     def _handle_mine_block(self, data):
-        """Xử lý mine block endpoint"""
+        """Xử lý mine block endpoint: tạo mining job chạy nền và trả về job_id ngay"""
         try:
-            if len(self.blockchain.pending_transactions) == 0:
+            if len(self.blockchain.mempool) == 0:
                 self._send_error(400, "No pending transactions to mine")
                 return
             
-            # This should be asynchronous in a real application
+            running = self.mining_jobs.get_running_job(self.blockchain)
+            if running:
+                self._send_json_response({
+                    "error": True,
+                    "status_code": 409,
+                    "message": "A mining job is already running",
+                    "job_id": running.job_id,
+                    "status_url": f"/mine/{running.job_id}"
+                }, 409)
+                return
+            
             miner_address = data.get("miner_address", "network_reward_address")
-            new_block = self.blockchain.mine_block(miner_address)
+            job = self.mining_jobs.submit(self.blockchain, miner_address, on_done=self._on_mining_job_done)
             
-            if self.p2p_network:
-                self.p2p_network.broadcast_block(new_block)
-
             response = {
                 "success": True,
-                "message": "New block mined",
-                "block": new_block.to_dict()
+                "message": "Mining job started",
+                "job_id": job.job_id,
+                "status_url": f"/mine/{job.job_id}"
             }
-            self._send_json_response(response)
+            self._send_json_response(response, 202)
             
         except Exception as e:
             self._send_error(500, f"Failed to start mining: {str(e)}")
     
+    def _on_mining_job_done(self, job):
+        """Broadcast block khi mining job hoàn tất (chạy trong thread của job)"""
+        if job.block is not None and self.p2p_network:
+            self.p2p_network.broadcast_block(job.block)
+    
+    def _handle_get_mining_job(self, job_id: str):
+        """Xử lý mining job progress endpoint"""
+        job = self.mining_jobs.get(job_id)
+        if not job:
+            self._send_error(404, f"Mining job not found: {job_id}")
+            return
+        
+        self._send_json_response(job.get_progress())
+    
+    def _handle_start_verification(self):
+        """Bắt đầu xác minh toàn chuỗi trong nền"""
+        if not self.chain_verification.trigger():
+            self._send_error(409, "A full chain verification is already running")
+            return
+        self._send_json_response({
+            "success": True,
+            "message": "Full chain verification started",
+            "status_url": "/verify"
+        }, 202)
+    
+    def _handle_get_verification(self):
+        """Lịch và kết quả xác minh toàn chuỗi"""
+        self._send_json_response(self.chain_verification.get_status())
+    
+    def _handle_get_block_template(self):
+        """Template block kế tiếp cho miner bên ngoài (được giữ lại giữa các lần hỏi)"""
+        self._send_json_response(self.blockchain.get_block_template().to_dict())
+    
     def _handle_connect_peer(self, data):
         """Xử lý connect peer endpoint"""
         if 'address' not in data or 'port' not in data:
@@ -291,26 +419,33 @@ class BlockchainHTTPServer:
     """
     Lớp wrapper cho HTTP server
     """
-    def __init__(self, server_address, blockchain, p2p_network):
+    def __init__(self, server_address, blockchain, p2p_network, verification_interval: float = 3600):
         self.server_address = server_address
         self.blockchain = blockchain
         self.p2p_network = p2p_network
+        self.mining_jobs = MiningJobManager()
+        self.chain_verification = ChainVerificationScheduler(blockchain, verification_interval)
         
         def handler(*args, **kwargs):
-            return BlockchainHTTPHandler(self.blockchain, self.p2p_network, *args, **kwargs)
+            return BlockchainHTTPHandler(
+                self.blockchain, self.p2p_network, self.mining_jobs, self.chain_verification, *args, **kwargs
+            )
             
-        self.http_server = HTTPServer(self.server_address, handler)
+        # Threading server: poll tiến độ mining job không bị chặn bởi request khác
+        self.http_server = ThreadingHTTPServer(self.server_address, handler)
         self.server_thread = None
         
     def serve_forever(self):
         """Bắt đầu HTTP server"""
         print(f"HTTP Server serving forever at {self.server_address}")
+        self.chain_verification.start()
         self.http_server.serve_forever()
 
     def shutdown(self):
         """Dừng HTTP server"""
         if self.http_server:
             print("Shutting down HTTP server...")
+            self.chain_verification.stop()
             self.http_server.shutdown()
             self.http_server.server_close()
             print("HTTP Server stopped.")
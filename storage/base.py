@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Storage Interface Module
+File: storage/base.py
+Purpose: Giao diện chung cho các backend lưu block (block log, SQLite, ...) và
+         factory chọn backend theo cấu hình
+Dependencies: core/blockchain.py (block_from_dict)
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+class BlockQueries(ABC):
+    """
+    Abstract base class cho backend có chỉ mục truy vấn
+
+    Trả lời số dư, lịch sử và tra cứu giao dịch mà không cần nạp chain vào bộ nhớ,
+    với cùng định dạng kết quả như các phương thức cùng tên của Blockchain. Các
+    tra cứu vị trí (locate_transaction, block_height, history_*) cho phép chain
+    trên backend dùng thẳng chỉ mục này thay cho chỉ mục trong bộ nhớ.
+    """
+
+    @abstractmethod
+    def get_account(self, address: str, mempool=None) -> Dict[str, Any]:
+        """
+        Trạng thái tài khoản, cùng các khóa như Blockchain.get_account (balance, nonce,
+        tx_count, pending_debit, pending_credit, spendable)
+
+        Args:
+            address: Địa chỉ ví
+            mempool: Mempool để tính khoản đang chờ (None = không có, các khoản chờ bằng 0)
+        """
+
+    def get_balance(self, address: str) -> float:
+        return self.get_account(address)['balance']
+
+    @abstractmethod
+    def get_transaction(self, transaction_hash: str) -> Optional[Dict[str, Any]]:
+        """Giao dịch đã xác nhận theo hash, None nếu không có"""
+
+    @abstractmethod
+    def get_transaction_history_page(self, address: str, limit: int = 100, cursor: Optional[int] = None,
+                                     descending: bool = False) -> Dict[str, Any]:
+        """Một trang lịch sử giao dịch của địa chỉ"""
+
+    @abstractmethod
+    def locate_transaction(self, transaction_hash: str) -> Optional[Tuple[int, int]]:
+        """(height, position) của giao dịch, None nếu không có trong chain"""
+
+    @abstractmethod
+    def block_height(self, block_hash: str) -> Optional[int]:
+        """Chiều cao của block, None nếu không có trong chain"""
+
+    @abstractmethod
+    def history_count(self, address: str) -> int:
+        """Số giao dịch liên quan đến địa chỉ"""
+
+    @abstractmethod
+    def history_postings(self, address: str, limit: int, cursor: Optional[int] = None,
+                         descending: bool = False) -> Tuple[List[Tuple[int, int]], Optional[int]]:
+        """Một trang posting (height, position), cùng quy ước với AddressHistoryIndex.page"""
+
+class BlockStore(ABC):
+    """
+    Abstract base class cho backend lưu block theo chiều cao
+
+    Backend chỉ cần ghi nối, cắt đuôi và đọc block; sync_chain() và load_blocks()
+    được dựng trên các thao tác đó. Watermark xác thực được lưu cùng block để lần
+    khởi động sau chỉ phải xác minh các block phía trên nó; tham số đồng thuận
+    riêng của chain (ví dụ chiều cao kích hoạt Ed25519 của chain chuyển từ JSON cũ)
+    cũng được lưu cùng block. Backend có chỉ mục truy vấn cài đặt thêm
+    BlockQueries (supports_queries = True).
+
+    Attributes:
+        fork_safe (bool): Process con tạo bằng fork có đọc tiếp được backend kế thừa
+    """
+
+    fork_safe = True
+
+    @property
+    def supports_queries(self) -> bool:
+        """Backend có phục vụ truy vấn số dư / lịch sử / giao dịch (cài đặt BlockQueries)"""
+        return isinstance(self, BlockQueries)
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Số block đã lưu"""
+
+    @abstractmethod
+    def append(self, block) -> int:
+        """
+        Nối một block (chưa bắt buộc bền vững cho tới sync())
+
+        Args:
+            block: Block (hoặc dictionary của block)
+
+        Returns:
+            int: Chiều cao của block
+        """
+
+    @abstractmethod
+    def truncate(self, length: int):
+        """Bỏ các block từ chiều cao length trở đi"""
+
+    @abstractmethod
+    def sync(self):
+        """Ghi bền vững các thay đổi chưa được ghi"""
+
+    @abstractmethod
+    def block_hash(self, height: int) -> str:
+        """Hash của block tại chiều cao"""
+
+    @abstractmethod
+    def read(self, height: int) -> Dict[str, Any]:
+        """Dictionary của block tại chiều cao"""
+
+    @abstractmethod
+    def iter_block_dicts(self) -> Iterator[Dict[str, Any]]:
+        """Duyệt dictionary các block theo chiều cao"""
+
+    @abstractmethod
+    def load_watermark(self) -> Optional[Tuple[int, str]]:
+        """Watermark xác thực đã lưu: (chiều cao, hash của block tại đó), None nếu chưa có"""
+
+    @abstractmethod
+    def save_watermark(self, height: int, tip_hash: Optional[str]):
+        """
+        Lưu bền vững watermark xác thực (chain[0..height] đã được xác minh)
+
+        Args:
+            height: Chiều cao cao nhất đã xác thực (-1 = xoá watermark)
+            tip_hash: Hash của block tại height
+        """
+
+    @abstractmethod
+    def load_chain_params(self) -> Dict[str, Any]:
+        """Tham số đồng thuận gắn với chain đã lưu (ví dụ ed25519_activation_height), {} nếu chưa có"""
+
+    @abstractmethod
+    def save_chain_params(self, params: Dict[str, Any]):
+        """Lưu bền vững tham số đồng thuận gắn với chain"""
+
+    @abstractmethod
+    def get_stats(self) -> Dict[str, Any]:
+        """Thông tin về backend"""
+
+    @abstractmethod
+    def close(self):
+        """Ghi phần còn lại và đóng backend"""
+
+    def sync_chain(self, chain: List) -> int:
+        """
+        Đưa store về đúng chain: cắt phần không còn khớp (đổi nhánh) rồi nối các
+        block mới và sync một lần. Chi phí O(block mới + độ sâu đổi nhánh), không O(chain).
+
+        Args:
+            chain: Danh sách block hiện tại (bắt đầu từ genesis), hoặc LazyChain
+                trên chính store này (khi đó chỉ ghi phần chain đã thay đổi)
+
+        Returns:
+            int: Số block đã nối
+        """
+        if getattr(chain, 'store', None) is self:
+            return chain.sync()
+        common = min(len(self), len(chain))
+        while common > 0 and self.block_hash(common - 1) != chain[common - 1].hash:
+            common -= 1
+        self.truncate(common)
+        for block in chain[common:]:
+            self.append(block)
+        self.sync()
+        return len(chain) - common
+
+    def load_blocks(self) -> List:
+        """Toàn bộ block (O(chain), dùng khi khởi động)"""
+        from core.blockchain import Blockchain
+        return [Blockchain.block_from_dict(data) for data in self.iter_block_dicts()]
+
+def create_block_store(backend: str, path: str, **kwargs) -> BlockStore:
+    """
+    Factory function tạo backend lưu block
+
+    Args:
+        backend: Tên backend ('log' hoặc 'sqlite')
+        path: Thư mục block log hoặc file database SQLite
+        **kwargs: Tham số cho backend
+
+    Returns:
+        BlockStore: Backend đã mở
+    """
+    if backend.lower() == 'log':
+        from .block_log import BlockLog
+        return BlockLog(path, **kwargs)
+    elif backend.lower() == 'sqlite':
+        from .sqlite_store import SQLiteBlockStore
+        return SQLiteBlockStore(path, **kwargs)
+    else:
+        raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,552 @@
+#!/usr/bin/env python3
+"""
+Block Log Storage Module
+File: storage/block_log.py
+Purpose: Lưu block dạng log chỉ ghi nối (append-only) chia thành các segment, kèm
+         file chỉ mục offset theo chiều cao; ghi một block mới tốn O(block), fsync
+         theo lô và tự cắt bản ghi ghi dở ở cuối log khi mở lại sau crash; đọc
+         block qua mmap của segment, chỉ mục giữ trong RAM dạng mảng gọn; chỉ
+         mục truy vấn (số dư, lịch sử, giao dịch theo hash) nằm trong file SQLite
+         cạnh log
+Dependencies: storage/base.py, storage/sqlite_index.py
+"""
+
+import os
+import json
+import mmap
+import struct
+import zlib
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from .base import BlockStore
+from .sqlite_index import IndexedQueries, SQLiteIndex
+
+# Bản ghi trong segment: magic, độ dài payload, CRC32 của payload, rồi payload (JSON)
+RECORD_MAGIC = b'BLK1'
+RECORD_HEADER = struct.Struct('<4sII')
+# Mục chỉ mục (kích thước cố định, vị trí = height * size): segment, offset, độ dài payload, hash block
+INDEX_ENTRY = struct.Struct('<IQI32s')
+
+INDEX_FILENAME = 'index.dat'
+WATERMARK_FILENAME = 'watermark.json'
+CHAIN_PARAMS_FILENAME = 'chain_params.json'
+QUERY_INDEX_FILENAME = 'index.sqlite'
+SEGMENT_PREFIX = 'blk'
+SEGMENT_SUFFIX = '.log'
+DEFAULT_SEGMENT_SIZE = 16 * 1024 * 1024
+HASH_SIZE = 32
+# Số segment được mmap cùng lúc (mỗi mmap giữ một file descriptor)
+MAX_MAPPED_SEGMENTS = 64
+
+class BlockLogError(Exception):
+    """Log block không đọc được (bản ghi hỏng không nằm ở cuối log)"""
+
+@dataclass(frozen=True)
+class IndexEntry:
+    """
+    Vị trí của một block trong log
+
+    Attributes:
+        segment (int): Số thứ tự segment
+        offset (int): Offset của header bản ghi trong segment
+        length (int): Độ dài payload (byte)
+        block_hash (bytes): Hash của block (32 byte)
+    """
+    segment: int
+    offset: int
+    length: int
+    block_hash: bytes
+
+    @property
+    def end(self) -> int:
+        """Offset ngay sau bản ghi"""
+        return self.offset + RECORD_HEADER.size + self.length
+
+def _hash_bytes(block_hash: str) -> bytes:
+    return bytes.fromhex(block_hash)
+
+class BlockLog(BlockStore, IndexedQueries):
+    """
+    Log block chỉ ghi nối, chia segment (backend 'log')
+
+    Mỗi block là một bản ghi (header có CRC32 + JSON của block) được nối vào segment
+    hiện tại; segment mới được mở khi segment hiện tại vượt segment_size. File
+    index.dat giữ một mục kích thước cố định cho mỗi chiều cao nên tra cứu block
+    theo chiều cao là O(1).
+
+    Ghi được đệm lại và chỉ fsync trong sync() (mỗi lượt lưu chain có block mới).
+    Khi mở, mục chỉ mục cuối được kiểm tra lại, các bản ghi đã ghi nhưng chưa vào
+    chỉ mục được bổ sung, và bản ghi ghi dở ở cuối log bị cắt bỏ.
+
+    Chỉ mục trong RAM là các mảng kiểu cố định (segment, offset, độ dài, hash),
+    khoảng 48 byte mỗi block. Bản ghi được đọc qua mmap chỉ đọc của segment (tối
+    đa MAX_MAPPED_SEGMENTS segment, đóng segment ít dùng nhất) nên trang dữ liệu
+    thuộc page cache của hệ điều hành, không phải bộ nhớ của process.
+
+    Chỉ mục truy vấn (posting list theo địa chỉ, số dư tài khoản, giao dịch và block
+    theo hash) nằm trong index.sqlite cạnh log, chỉ giữ vị trí chứ không giữ nội
+    dung giao dịch. Nó được ghi cùng mỗi block nối vào và commit sau khi log đã
+    fsync trong sync(); khi mở, phần chỉ mục lệch với log (crash giữa hai lần ghi,
+    hoặc log cũ chưa có chỉ mục) được cắt về đoạn chung rồi đánh chỉ mục lại từ log.
+    Process con tạo bằng fork chỉ đọc segment, không dùng kết nối SQLite này.
+
+    Attributes:
+        directory (str): Thư mục chứa segment và chỉ mục
+        segment_size (int): Kích thước tối đa mỗi segment (byte)
+        recovered (int): Số bản ghi được bổ sung vào chỉ mục khi mở
+        truncated_bytes (int): Số byte ghi dở bị cắt khi mở
+        reindexed (int): Số block được đánh chỉ mục truy vấn lại khi mở
+    """
+
+    def __init__(self, directory: str, segment_size: int = DEFAULT_SEGMENT_SIZE):
+        """
+        Mở (hoặc tạo) log trong thư mục và khôi phục nếu lần ghi trước bị ngắt
+
+        Args:
+            directory: Thư mục chứa segment và chỉ mục
+            segment_size: Kích thước tối đa mỗi segment (byte)
+        """
+        self.directory = directory
+        self.segment_size = max(1, segment_size)
+        self.recovered = 0
+        self.truncated_bytes = 0
+        # Chỉ mục theo chiều cao, dạng mảng gọn thay cho danh sách IndexEntry
+        self._segments = array('I')
+        self._offsets = array('Q')
+        self._lengths = array('I')
+        self._hashes = bytearray()
+        self._maps: 'OrderedDict[int, mmap.mmap]' = OrderedDict()
+        self._segment_file = None
+        self._segment_id = 0
+        self._segment_length = 0
+        self._index_file = None
+        self._dirty_segments = set()
+        self._lock = threading.RLock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+        self._open_for_append()
+        self.reindexed = 0
+        self._index = SQLiteIndex(os.path.join(directory, QUERY_INDEX_FILENAME), store_bodies=False)
+        self._catch_up_index()
+
+    # ------------------------------------------------------------------ paths
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{segment:05d}{SEGMENT_SUFFIX}")
+
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, INDEX_FILENAME)
+
+    def _watermark_path(self) -> str:
+        return os.path.join(self.directory, WATERMARK_FILENAME)
+
+    def _segment_ids(self) -> List[int]:
+        ids = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                number = name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]
+                if number.isdigit():
+                    ids.append(int(number))
+        return sorted(ids)
+
+    # ------------------------------------------------------------------ index
+
+    def _push_entry(self, entry: IndexEntry):
+        self._segments.append(entry.segment)
+        self._offsets.append(entry.offset)
+        self._lengths.append(entry.length)
+        self._hashes += entry.block_hash
+
+    def _entry(self, height: int) -> IndexEntry:
+        """Mục chỉ mục tại chiều cao (chấp nhận chỉ số âm như list)"""
+        height = range(len(self._offsets))[height]
+        start = height * HASH_SIZE
+        return IndexEntry(self._segments[height], self._offsets[height], self._lengths[height],
+                          bytes(self._hashes[start:start + HASH_SIZE]))
+
+    def _truncate_entries(self, length: int):
+        del self._segments[length:]
+        del self._offsets[length:]
+        del self._lengths[length:]
+        del self._hashes[length * HASH_SIZE:]
+
+    # --------------------------------------------------------------- recovery
+
+    def _recover(self):
+        """Đối chiếu chỉ mục với segment, bổ sung bản ghi thiếu và cắt đuôi ghi dở"""
+        index_path = self._index_path()
+        torn_index = False
+        if os.path.exists(index_path):
+            with open(index_path, 'rb') as f:
+                data = f.read()
+            usable = len(data) - len(data) % INDEX_ENTRY.size
+            torn_index = usable != len(data)
+            for fields in INDEX_ENTRY.iter_unpack(memoryview(data)[:usable]):
+                self._push_entry(IndexEntry(*fields))
+            del data
+        indexed = len(self)
+
+        # Chỉ đuôi chỉ mục có thể trỏ tới bản ghi ghi dở
+        while len(self) and self._read_record(self._entry(-1)) is None:
+            self._truncate_entries(len(self) - 1)
+
+        # Quét từ sau bản ghi đã có trong chỉ mục để tìm bản ghi chưa được đánh chỉ mục
+        segments = self._segment_ids()
+        if len(self):
+            last = self._entry(-1)
+            segment, offset = last.segment, last.end
+        else:
+            segment, offset = (segments[0] if segments else 0), 0
+        for segment_id in [s for s in segments if s >= segment]:
+            if segment_id != segment:
+                offset = 0
+            recovered, valid_end, size = self._scan_segment(segment_id, offset)
+            for entry in recovered:
+                self._push_entry(entry)
+            self.recovered += len(recovered)
+            if valid_end < size:
+                # Bản ghi ghi dở / hỏng: cắt segment và bỏ các segment sau nó
+                self.truncated_bytes += size - valid_end
+                self._unmap(segment_id)
+                with open(self._segment_path(segment_id), 'r+b') as f:
+                    f.truncate(valid_end)
+                    os.fsync(f.fileno())
+                for later in [s for s in segments if s > segment_id]:
+                    self.truncated_bytes += os.path.getsize(self._segment_path(later))
+                    os.remove(self._segment_path(later))
+                break
+
+        if torn_index or len(self) != indexed or self.recovered:
+            self._rewrite_index()
+
+    def _catch_up_index(self):
+        """Đưa chỉ mục truy vấn về đúng log: cắt phần không khớp rồi đánh chỉ mục các block còn thiếu"""
+        common = min(len(self), len(self._index))
+        while common > 0 and self._index.block_hash(common - 1) != self.block_hash(common - 1):
+            common -= 1
+        self._index.truncate(common)
+        for height in range(common, len(self)):
+            self._index.append(self.read(height))
+        self.reindexed = len(self) - common
+        self._index.commit()
+
+    def _scan_segment(self, segment: int, offset: int):
+        """Đọc tuần tự các bản ghi hợp lệ từ offset; trả về (mục mới, offset hợp lệ cuối, kích thước)"""
+        recovered = []
+        with open(self._segment_path(segment), 'rb') as f:
+            data = f.read()
+        while offset + RECORD_HEADER.size <= len(data):
+            magic, length, checksum = RECORD_HEADER.unpack_from(data, offset)
+            start = offset + RECORD_HEADER.size
+            payload = data[start:start + length]
+            if magic != RECORD_MAGIC or len(payload) != length or zlib.crc32(payload) != checksum:
+                break
+            try:
+                block_hash = _hash_bytes(json.loads(payload)['hash'])
+            except (ValueError, KeyError):
+                break
+            recovered.append(IndexEntry(segment, offset, length, block_hash))
+            offset = start + length
+        return recovered, offset, len(data)
+
+    def _rewrite_index(self):
+        path = self._index_path()
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as f:
+            for height in range(len(self)):
+                entry = self._entry(height)
+                f.write(INDEX_ENTRY.pack(entry.segment, entry.offset, entry.length, entry.block_hash))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+        self._sync_directory()
+
+    def _sync_directory(self):
+        """fsync thư mục để việc tạo / đổi tên file bền vững (bỏ qua nếu hệ điều hành không hỗ trợ)"""
+        try:
+            fd = os.open(self.directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    # ---------------------------------------------------------------- writing
+
+    def _open_for_append(self):
+        if len(self):
+            self._segment_id = self._segments[-1]
+        else:
+            segments = self._segment_ids()
+            self._segment_id = segments[-1] if segments else 0
+        path = self._segment_path(self._segment_id)
+        self._segment_file = open(path, 'ab')
+        self._segment_length = self._segment_file.tell()
+        self._index_file = open(self._index_path(), 'ab')
+
+    def _roll_segment(self):
+        """Chuyển sang segment mới (segment cũ được fsync ở lần sync() tiếp theo)"""
+        self._segment_file.flush()
+        self._dirty_segments.add(self._segment_file)
+        self._segment_id += 1
+        self._segment_file = open(self._segment_path(self._segment_id), 'ab')
+        self._segment_length = 0
+
+    def append(self, block) -> int:
+        """
+        Nối một block vào log (O(block)); chưa fsync cho tới sync()
+
+        Args:
+            block: Block (hoặc dictionary của block)
+
+        Returns:
+            int: Chiều cao của block trong log
+        """
+        block_data = block if isinstance(block, dict) else block.to_dict()
+        payload = json.dumps(block_data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        record = RECORD_HEADER.pack(RECORD_MAGIC, len(payload), zlib.crc32(payload)) + payload
+
+        with self._lock:
+            if self._segment_length and self._segment_length + len(record) > self.segment_size:
+                self._roll_segment()
+            entry = IndexEntry(self._segment_id, self._segment_length, len(payload),
+                               _hash_bytes(block_data['hash']))
+            self._segment_file.write(record)
+            self._segment_length += len(record)
+            self._index_file.write(INDEX_ENTRY.pack(entry.segment, entry.offset, entry.length, entry.block_hash))
+            self._push_entry(entry)
+            self._dirty_segments.add(self._segment_file)
+            self._index.append(block_data)
+            return len(self) - 1
+
+    def sync(self):
+        """
+        Ghi xuống đĩa: fsync các segment đã thay đổi rồi tới chỉ mục offset, sau đó
+        commit chỉ mục truy vấn (chỉ mục không bao giờ đi trước log đã bền vững)
+        """
+        with self._lock:
+            if self._dirty_segments:
+                for segment_file in self._dirty_segments:
+                    segment_file.flush()
+                    os.fsync(segment_file.fileno())
+                    if segment_file is not self._segment_file:
+                        segment_file.close()
+                self._dirty_segments.clear()
+                self._index_file.flush()
+                os.fsync(self._index_file.fileno())
+                self._sync_directory()
+            self._index.commit()
+
+    def truncate(self, length: int):
+        """
+        Bỏ các block từ chiều cao length trở đi (ví dụ khi chain chuyển nhánh)
+
+        Args:
+            length: Số block giữ lại
+        """
+        with self._lock:
+            if length >= len(self):
+                return
+            self.sync()
+            first_removed = self._entry(length)
+            # Truy cập mmap vượt quá cuối file đã cắt gây SIGBUS: bỏ map trước khi cắt
+            self._unmap(first_removed.segment)
+            self._segment_file.close()
+            self._index_file.close()
+
+            with open(self._segment_path(first_removed.segment), 'r+b') as f:
+                f.truncate(first_removed.offset)
+                os.fsync(f.fileno())
+            # Segment bị cắt về rỗng chỉ được giữ nếu không còn block nào trước nó
+            keep_empty = first_removed.offset > 0 or length == 0
+            for segment_id in self._segment_ids():
+                if segment_id > first_removed.segment or (segment_id == first_removed.segment and not keep_empty):
+                    os.remove(self._segment_path(segment_id))
+            with open(self._index_path(), 'r+b') as f:
+                f.truncate(length * INDEX_ENTRY.size)
+                os.fsync(f.fileno())
+            self._sync_directory()
+
+            self._truncate_entries(length)
+            self._open_for_append()
+            self._index.truncate(length)
+            self._index.commit()
+
+    # ---------------------------------------------------------------- reading
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def block_hash(self, height: int) -> str:
+        """Hash của block tại chiều cao (từ chỉ mục, không đọc segment)"""
+        return self._entry(height).block_hash.hex()
+
+    def _mapped(self, segment: int, end: int) -> Optional[mmap.mmap]:
+        """mmap chỉ đọc của segment, map lại nếu file đã dài thêm; None nếu file ngắn hơn end"""
+        mapped = self._maps.get(segment)
+        if mapped is not None and len(mapped) >= end:
+            self._maps.move_to_end(segment)
+            return mapped
+        if mapped is not None:
+            del self._maps[segment]
+            mapped.close()
+        if segment == self._segment_id and self._segment_file:
+            # Bản ghi vừa nối có thể còn trong buffer ghi
+            self._segment_file.flush()
+        try:
+            with open(self._segment_path(segment), 'rb') as f:
+                if os.fstat(f.fileno()).st_size < end:
+                    return None
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        self._maps[segment] = mapped
+        while len(self._maps) > MAX_MAPPED_SEGMENTS:
+            _, oldest = self._maps.popitem(last=False)
+            oldest.close()
+        return mapped
+
+    def _unmap(self, first_segment: int = 0):
+        """Đóng mmap của các segment từ first_segment trở đi"""
+        for segment in [s for s in self._maps if s >= first_segment]:
+            self._maps.pop(segment).close()
+
+    def _read_record(self, entry: IndexEntry) -> Optional[bytes]:
+        """Payload của bản ghi, None nếu thiếu hoặc hỏng"""
+        mapped = self._mapped(entry.segment, entry.end)
+        if mapped is None:
+            return None
+        magic, length, checksum = RECORD_HEADER.unpack_from(mapped, entry.offset)
+        start = entry.offset + RECORD_HEADER.size
+        payload = mapped[start:start + entry.length]
+        if magic != RECORD_MAGIC or length != entry.length or zlib.crc32(payload) != checksum:
+            return None
+        return payload
+
+    def read(self, height: int) -> Dict[str, Any]:
+        """
+        Dictionary của block tại chiều cao (O(1) tra chỉ mục + đọc một bản ghi qua mmap)
+
+        Raises:
+            IndexError: Nếu không có block ở chiều cao này
+            BlockLogError: Nếu bản ghi bị hỏng
+        """
+        with self._lock:
+            payload = self._read_record(self._entry(height))
+        if payload is None:
+            raise BlockLogError(f"Corrupt block record at height {height}")
+        return json.loads(payload)
+
+    def iter_block_dicts(self) -> Iterator[Dict[str, Any]]:
+        """
+        Duyệt dictionary các block theo chiều cao (các block có lúc bắt đầu duyệt);
+        trang của segment đã duyệt xong được trả lại để lượt duyệt toàn chuỗi không
+        làm RSS tăng theo kích thước log
+        """
+        previous_segment = None
+        for height in range(len(self)):
+            segment = self._segments[height]
+            if previous_segment is not None and segment != previous_segment:
+                self._release(previous_segment)
+            previous_segment = segment
+            yield self.read(height)
+        if previous_segment is not None:
+            self._release(previous_segment)
+
+    def _release(self, segment: int):
+        """Bỏ các trang đã đọc của segment khỏi bộ nhớ process (vẫn nằm trong page cache)"""
+        with self._lock:
+            mapped = self._maps.get(segment)
+            if mapped is not None and hasattr(mmap, 'MADV_DONTNEED'):
+                mapped.madvise(mmap.MADV_DONTNEED)
+
+    # ---------------------------------------------------------------- queries
+
+    def _transaction_dicts(self, rows: List[Tuple]) -> List[Dict[str, Any]]:
+        """Giao dịch được đọc từ log theo (height, position), mỗi block đọc một lần"""
+        blocks: Dict[int, Dict[str, Any]] = {}
+        transactions = []
+        for _, height, position in rows:
+            if height not in blocks:
+                blocks[height] = self.read(height)
+            transactions.append(dict(blocks[height]['transactions'][position]))
+        return transactions
+
+    # -------------------------------------------------------------- watermark
+
+    def load_watermark(self) -> Optional[Tuple[int, str]]:
+        """Watermark từ watermark.json, None nếu chưa có hoặc file hỏng"""
+        try:
+            with open(self._watermark_path(), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return int(data['height']), str(data['hash'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save_watermark(self, height: int, tip_hash: Optional[str]):
+        """Ghi watermark.json (file tạm, fsync rồi đổi tên)"""
+        path = self._watermark_path()
+        with self._lock:
+            if height < 0 or tip_hash is None:
+                if os.path.exists(path):
+                    os.remove(path)
+                    self._sync_directory()
+                return
+            self._write_json(path, {'height': height, 'hash': tip_hash})
+
+    def _write_json(self, path: str, data: Dict[str, Any]):
+        """Ghi file JSON bền vững (file tạm, fsync rồi đổi tên)"""
+        temporary = path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+        self._sync_directory()
+
+    def load_chain_params(self) -> Dict[str, Any]:
+        """Tham số đồng thuận từ chain_params.json, {} nếu chưa có hoặc file hỏng"""
+        try:
+            with open(os.path.join(self.directory, CHAIN_PARAMS_FILENAME), 'r', encoding='utf-8') as f:
+                params = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return params if isinstance(params, dict) else {}
+
+    def save_chain_params(self, params: Dict[str, Any]):
+        """Ghi chain_params.json"""
+        with self._lock:
+            self._write_json(os.path.join(self.directory, CHAIN_PARAMS_FILENAME), params)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'blocks': len(self),
+                'segments': self._segments[-1] + 1 if len(self) else 0,
+                'segment_size': self.segment_size,
+                'mapped_segments': len(self._maps),
+                'index_bytes': (self._segments.itemsize + self._offsets.itemsize
+                                + self._lengths.itemsize + HASH_SIZE) * len(self),
+                'recovered': self.recovered,
+                'truncated_bytes': self.truncated_bytes,
+                'reindexed': self.reindexed,
+                'accounts': self._index.get_stats()['accounts']
+            }
+
+    def close(self):
+        """fsync phần còn lại, bỏ các mmap và đóng file"""
+        with self._lock:
+            self.sync()
+            self._unmap()
+            if self._segment_file:
+                self._segment_file.close()
+            if self._index_file:
+                self._index_file.close()
+            self._index.close()
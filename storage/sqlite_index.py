@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+SQLite Index Module
+File: storage/sqlite_index.py
+Purpose: Chỉ mục truy vấn của chain trong SQLite (WAL) dùng chung cho các backend:
+         giao dịch theo hash, block theo hash, posting list theo địa chỉ và số dư
+         tài khoản; trả lời truy vấn số dư / lịch sử / giao dịch mà không nạp
+         chain vào bộ nhớ
+Dependencies: storage/base.py, sqlite3 (thư viện chuẩn)
+"""
+
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from .base import BlockQueries
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    height INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL UNIQUE,
+    timestamp REAL NOT NULL,
+    header TEXT
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    height INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    sender TEXT,
+    receiver TEXT NOT NULL,
+    amount REAL NOT NULL,
+    fee REAL NOT NULL,
+    data TEXT,
+    PRIMARY KEY (height, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_transactions_hash ON transactions (hash);
+CREATE TABLE IF NOT EXISTS postings (
+    address TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (address, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_postings_height ON postings (height);
+CREATE TABLE IF NOT EXISTS accounts (
+    address TEXT PRIMARY KEY,
+    balance REAL NOT NULL,
+    nonce INTEGER NOT NULL,
+    tx_count INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+UPSERT_ACCOUNT = """
+INSERT INTO accounts (address, balance, nonce, tx_count) VALUES (?, ?, ?, ?)
+ON CONFLICT (address) DO UPDATE SET
+    balance = balance + excluded.balance,
+    nonce = nonce + excluded.nonce,
+    tx_count = tx_count + excluded.tx_count
+"""
+
+# Số block đọc mỗi lần khi duyệt tuần tự (iter_block_dicts)
+ITER_BATCH_BLOCKS = 256
+
+# (chiều cao block, vị trí giao dịch trong block)
+Posting = Tuple[int, int]
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+
+class SQLiteIndex:
+    """
+    Chỉ mục truy vấn của chain trong một database SQLite
+
+    - blocks: hash, timestamp (và header nếu store_bodies) theo chiều cao
+    - transactions: giao dịch theo (height, position), chỉ mục theo hash; cột data
+      chứa giao dịch dạng JSON nếu store_bodies
+    - postings: posting list (address, seq) -> (height, position), seq là vị trí
+      trong lịch sử của địa chỉ nên dùng được làm cursor như AddressHistoryIndex
+    - accounts: số dư / nonce / số giao dịch, cùng quy tắc với StateIndex
+    - meta: giá trị đơn lẻ theo khoá (ví dụ watermark xác thực)
+
+    Các block nối liên tiếp được ghi trong một transaction SQLite và chỉ commit ở
+    commit(), nên lưu nhiều block chỉ tốn một lần ghi WAL xuống đĩa. Các truy vấn
+    trên cùng kết nối đã thấy block chưa commit.
+
+    Attributes:
+        path (str): Đường dẫn file database
+        store_bodies (bool): Lưu cả header và nội dung giao dịch (backend 'sqlite');
+            False khi nội dung block nằm ở nơi khác (block log)
+    """
+
+    def __init__(self, path: str, synchronous: str = "NORMAL", store_bodies: bool = True):
+        """
+        Mở (hoặc tạo) database
+
+        Args:
+            path: Đường dẫn file database
+            synchronous: PRAGMA synchronous (NORMAL là đủ an toàn với WAL)
+            store_bodies: Lưu cả header và nội dung giao dịch
+        """
+        self.path = path
+        self.store_bodies = store_bodies
+        self._lock = threading.RLock()
+        # Server HTTP đọc từ nhiều thread; mọi truy cập đi qua self._lock
+        self._connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(f"PRAGMA synchronous={synchronous}")
+        self._connection.executescript(SCHEMA)
+        self._length = self._connection.execute("SELECT COUNT(*) FROM blocks").fetchone()[0]
+        # address -> số posting (seq kế tiếp), nạp lười
+        self._posting_counts: Dict[str, int] = {}
+
+    def _begin(self):
+        if not self._connection.in_transaction:
+            self._connection.execute("BEGIN")
+
+    def __len__(self) -> int:
+        return self._length
+
+    # ---------------------------------------------------------------- writing
+
+    def _posting_count(self, address: str) -> int:
+        count = self._posting_counts.get(address)
+        if count is None:
+            count = self._connection.execute(
+                "SELECT COUNT(*) FROM postings WHERE address = ?", (address,)
+            ).fetchone()[0]
+            self._posting_counts[address] = count
+        return count
+
+    def append(self, block_data: Dict[str, Any]) -> int:
+        """
+        Đánh chỉ mục block (và lưu nội dung nếu store_bodies); commit ở commit()
+
+        Args:
+            block_data: Dictionary của block
+
+        Returns:
+            int: Chiều cao của block
+        """
+        transactions = block_data.get('transactions', [])
+        header = None
+        if self.store_bodies:
+            header = _dumps({key: value for key, value in block_data.items() if key != 'transactions'})
+
+        with self._lock:
+            height = self._length
+            self._begin()
+            self._connection.execute(
+                "INSERT INTO blocks (height, hash, timestamp, header) VALUES (?, ?, ?, ?)",
+                (height, block_data['hash'], block_data['timestamp'], header)
+            )
+            self._connection.executemany(
+                "INSERT INTO transactions (height, position, hash, sender, receiver, amount, fee, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(height, position, tx['transaction_hash'], tx.get('sender'), tx['receiver'],
+                  tx['amount'], tx.get('fee', 0), _dumps(tx) if self.store_bodies else None)
+                 for position, tx in enumerate(transactions)]
+            )
+
+            # Genesis không thuộc lịch sử giao dịch và không tính vào số dư
+            if height > 0:
+                postings = []
+                for position, tx in enumerate(transactions):
+                    for address in {tx.get('sender'), tx['receiver']}:
+                        if address is not None:
+                            seq = self._posting_count(address)
+                            postings.append((address, seq, height, position))
+                            self._posting_counts[address] = seq + 1
+                self._connection.executemany(
+                    "INSERT INTO postings (address, seq, height, position) VALUES (?, ?, ?, ?)", postings
+                )
+                deltas = self._account_deltas(
+                    (tx.get('sender'), tx['receiver'], tx['amount'], tx.get('fee', 0)) for tx in transactions
+                )
+                self._connection.executemany(UPSERT_ACCOUNT, deltas)
+
+            self._length += 1
+            return height
+
+    @staticmethod
+    def _account_deltas(rows, direction: int = 1) -> List[Tuple[str, float, int, int]]:
+        """Gộp thay đổi (số dư, nonce, số giao dịch) theo địa chỉ cho các giao dịch"""
+        deltas: Dict[str, List] = {}
+        for sender, receiver, amount, fee in rows:
+            if sender is not None:
+                delta = deltas.setdefault(sender, [0.0, 0, 0])
+                delta[0] -= (amount + fee) * direction
+                delta[1] += direction
+                delta[2] += direction
+            delta = deltas.setdefault(receiver, [0.0, 0, 0])
+            delta[0] += amount * direction
+            if receiver != sender:
+                delta[2] += direction
+        return [(address, *delta) for address, delta in deltas.items()]
+
+    def commit(self):
+        """Commit các thay đổi đang chờ (một lần fsync WAL)"""
+        with self._lock:
+            if self._connection.in_transaction:
+                self._connection.execute("COMMIT")
+
+    def truncate(self, length: int):
+        """Bỏ các block từ chiều cao length trở đi và hoàn tác số dư của chúng"""
+        with self._lock:
+            if length >= self._length:
+                return
+            self._begin()
+            rows = self._connection.execute(
+                "SELECT sender, receiver, amount, fee FROM transactions WHERE height >= ? AND height > 0",
+                (length,)
+            ).fetchall()
+            self._connection.executemany(UPSERT_ACCOUNT, self._account_deltas(rows, -1))
+            # Tài khoản không còn giao dịch nào: bỏ hẳn (tránh sai số float còn sót)
+            self._connection.execute("DELETE FROM accounts WHERE tx_count <= 0")
+            self._connection.execute("DELETE FROM postings WHERE height >= ?", (length,))
+            self._connection.execute("DELETE FROM transactions WHERE height >= ?", (length,))
+            self._connection.execute("DELETE FROM blocks WHERE height >= ?", (length,))
+            self._length = length
+            self._posting_counts.clear()
+
+    def load_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def save_meta(self, key: str, value: Optional[str]):
+        """Ghi (hoặc xoá nếu value là None) một giá trị trong bảng meta và commit"""
+        with self._lock:
+            self._begin()
+            if value is None:
+                self._connection.execute("DELETE FROM meta WHERE key = ?", (key,))
+            else:
+                self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+            self.commit()
+
+    # ---------------------------------------------------------------- reading
+
+    def block_hash(self, height: int) -> str:
+        with self._lock:
+            row = self._connection.execute("SELECT hash FROM blocks WHERE height = ?", (height,)).fetchone()
+        if row is None:
+            raise IndexError(f"No block at height {height}")
+        return row[0]
+
+    def block_height(self, block_hash: str) -> Optional[int]:
+        """Chiều cao của block theo hash (chỉ mục UNIQUE của cột hash)"""
+        with self._lock:
+            row = self._connection.execute("SELECT height FROM blocks WHERE hash = ?", (block_hash,)).fetchone()
+        return row[0] if row else None
+
+    def locate_transaction(self, transaction_hash: str) -> Optional[Posting]:
+        """(height, position) của giao dịch (lần xuất hiện cuối như ChainLookupIndex)"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT height, position FROM transactions WHERE hash = ? ORDER BY height DESC LIMIT 1",
+                (transaction_hash,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def read(self, height: int) -> Dict[str, Any]:
+        """Dictionary của block tại chiều cao (chỉ khi store_bodies)"""
+        with self._lock:
+            row = self._connection.execute("SELECT header FROM blocks WHERE height = ?", (height,)).fetchone()
+            if row is None:
+                raise IndexError(f"No block at height {height}")
+            block_data = json.loads(row[0])
+            block_data['transactions'] = [
+                json.loads(data) for (data,) in self._connection.execute(
+                    "SELECT data FROM transactions WHERE height = ? ORDER BY position", (height,)
+                )
+            ]
+        return block_data
+
+    def iter_block_dicts(self) -> Iterator[Dict[str, Any]]:
+        """
+        Duyệt block theo chiều cao (chỉ khi store_bodies), mỗi lần đọc header và giao
+        dịch của một đoạn ITER_BATCH_BLOCKS block (bộ nhớ O(đoạn), không O(chain);
+        lock được nhả giữa các đoạn)
+        """
+        start = 0
+        while True:
+            end = start + ITER_BATCH_BLOCKS
+            with self._lock:
+                headers = self._connection.execute(
+                    "SELECT height, header FROM blocks WHERE height >= ? AND height < ? ORDER BY height",
+                    (start, end)
+                ).fetchall()
+                transactions = self._connection.execute(
+                    "SELECT height, data FROM transactions WHERE height >= ? AND height < ? "
+                    "ORDER BY height, position",
+                    (start, end)
+                ).fetchall()
+            if not headers:
+                return
+            position = 0
+            for height, header in headers:
+                block_data = json.loads(header)
+                block_transactions = []
+                while position < len(transactions) and transactions[position][0] == height:
+                    block_transactions.append(json.loads(transactions[position][1]))
+                    position += 1
+                block_data['transactions'] = block_transactions
+                yield block_data
+            start = end
+
+    def account(self, address: str) -> Dict[str, Any]:
+        """Trạng thái tài khoản từ bảng accounts (một lần tra khoá chính)"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT balance, nonce, tx_count FROM accounts WHERE address = ?", (address,)
+            ).fetchone()
+        balance, nonce, tx_count = row if row else (0.0, 0, 0)
+        return {'address': address, 'balance': balance, 'nonce': nonce, 'tx_count': tx_count}
+
+    def transaction_row(self, transaction_hash: str) -> Optional[Tuple]:
+        """(data, height, position, hash block, timestamp block) của giao dịch theo hash"""
+        with self._lock:
+            return self._connection.execute(
+                "SELECT t.data, t.height, t.position, b.hash, b.timestamp "
+                "FROM transactions t JOIN blocks b ON b.height = t.height "
+                "WHERE t.hash = ? ORDER BY t.height DESC LIMIT 1",
+                (transaction_hash,)
+            ).fetchone()
+
+    def history_count(self, address: str) -> int:
+        """Số giao dịch liên quan đến địa chỉ"""
+        with self._lock:
+            return self._posting_count(address)
+
+    def _page_bounds(self, address: str, limit: int, cursor: Optional[int],
+                     descending: bool) -> Tuple[int, int, Optional[int], int]:
+        """(seq bắt đầu, seq kết thúc, cursor trang sau, tổng) với cùng quy ước như AddressHistoryIndex.page"""
+        limit = max(0, limit)
+        total = self._posting_count(address)
+        if descending:
+            end = total if cursor is None else max(0, min(cursor, total))
+            start = max(0, end - limit)
+            return start, end, (start if start > 0 else None), total
+        start = 0 if cursor is None else max(0, min(cursor, total))
+        end = min(total, start + limit)
+        return start, end, (end if end < total else None), total
+
+    def history_postings(self, address: str, limit: int, cursor: Optional[int] = None,
+                         descending: bool = False) -> Tuple[List[Posting], Optional[int]]:
+        """Một trang posting (O(limit) trên khoá chính), như AddressHistoryIndex.page"""
+        with self._lock:
+            start, end, next_cursor, _ = self._page_bounds(address, limit, cursor, descending)
+            rows = self._connection.execute(
+                "SELECT height, position FROM postings WHERE address = ? AND seq >= ? AND seq < ? "
+                f"ORDER BY seq {'DESC' if descending else 'ASC'}",
+                (address, start, end)
+            ).fetchall()
+        return [(height, position) for height, position in rows], next_cursor
+
+    def history_rows(self, address: str, limit: int, cursor: Optional[int] = None,
+                     descending: bool = False) -> Tuple[List[Tuple], Optional[int], int]:
+        """
+        Một trang lịch sử kèm nội dung giao dịch
+
+        Returns:
+            Tuple: ([(data, height, position, timestamp block)], cursor trang sau, tổng)
+        """
+        with self._lock:
+            start, end, next_cursor, total = self._page_bounds(address, limit, cursor, descending)
+            rows = self._connection.execute(
+                "SELECT t.data, t.height, t.position, b.timestamp FROM postings p "
+                "JOIN transactions t ON t.height = p.height AND t.position = p.position "
+                "JOIN blocks b ON b.height = p.height "
+                f"WHERE p.address = ? AND p.seq >= ? AND p.seq < ? ORDER BY p.seq {'DESC' if descending else 'ASC'}",
+                (address, start, end)
+            ).fetchall()
+        return rows, next_cursor, total
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            transactions = self._connection.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+            accounts = self._connection.execute("SELECT COUNT(*) FROM accounts").fetchone()[0]
+        return {'blocks': self._length, 'transactions': transactions, 'accounts': accounts, 'path': self.path}
+
+    def close(self):
+        """Commit phần còn lại và đóng kết nối"""
+        with self._lock:
+            self.commit()
+            self._connection.close()
+
+class IndexedQueries(BlockQueries):
+    """
+    BlockQueries trả lời từ SQLiteIndex của backend (self._index)
+
+    Kết quả có cùng định dạng như các phương thức cùng tên của Blockchain. Backend
+    không lưu nội dung giao dịch trong chỉ mục override _transaction_dicts.
+    """
+
+    _index: SQLiteIndex
+
+    def _transaction_dicts(self, rows: List[Tuple]) -> List[Dict[str, Any]]:
+        """
+        Dictionary của các giao dịch
+
+        Args:
+            rows: Các bộ (data, height, position) lấy từ chỉ mục
+        """
+        return [json.loads(data) for data, _, _ in rows]
+
+    def get_account(self, address: str, mempool=None) -> Dict[str, Any]:
+        """Trạng thái tài khoản từ bảng accounts, khoản đang chờ lấy từ mempool (nếu có)"""
+        account = self._index.account(address)
+        account['pending_debit'] = mempool.pending_debit(address) if mempool is not None else 0.0
+        account['pending_credit'] = mempool.pending_credit(address) if mempool is not None else 0.0
+        account['spendable'] = account['balance'] - account['pending_debit']
+        return account
+
+    def get_transaction(self, transaction_hash: str) -> Optional[Dict[str, Any]]:
+        """Giao dịch theo hash (chỉ mục idx_transactions_hash), cùng định dạng Blockchain.get_transaction"""
+        row = self._index.transaction_row(transaction_hash)
+        if row is None:
+            return None
+        data, height, position, block_hash, block_timestamp = row
+        tx_data = self._transaction_dicts([(data, height, position)])[0]
+        tx_data['block_index'] = height
+        tx_data['block_hash'] = block_hash
+        tx_data['block_timestamp'] = block_timestamp
+        tx_data['position'] = position
+        tx_data['confirmations'] = len(self._index) - height
+        return tx_data
+
+    def get_transaction_history_page(self, address: str, limit: int = 100, cursor: Optional[int] = None,
+                                     descending: bool = False) -> Dict[str, Any]:
+        """
+        Một trang lịch sử giao dịch từ bảng postings (O(limit) trên khoá chính),
+        cùng cursor và định dạng với Blockchain.get_transaction_history_page
+        """
+        rows, next_cursor, total = self._index.history_rows(address, limit, cursor, descending)
+        history = []
+        tx_dicts = self._transaction_dicts([(data, height, position) for data, height, position, _ in rows])
+        for tx_data, (_, height, _, block_timestamp) in zip(tx_dicts, rows):
+            tx_data['block_index'] = height
+            tx_data['block_timestamp'] = block_timestamp
+            history.append(tx_data)
+        return {'transactions': history, 'next_cursor': next_cursor, 'total': total}
+
+    def locate_transaction(self, transaction_hash: str) -> Optional[Posting]:
+        return self._index.locate_transaction(transaction_hash)
+
+    def block_height(self, block_hash: str) -> Optional[int]:
+        return self._index.block_height(block_hash)
+
+    def history_count(self, address: str) -> int:
+        return self._index.history_count(address)
+
+    def history_postings(self, address: str, limit: int, cursor: Optional[int] = None,
+                         descending: bool = False) -> Tuple[List[Posting], Optional[int]]:
+        return self._index.history_postings(address, limit, cursor, descending)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+SQLite Storage Module
+File: storage/sqlite_store.py
+Purpose: Backend lưu block bằng SQLite (WAL): block và giao dịch nằm ngay trong
+         các bảng có chỉ mục (storage/sqlite_index.py) nên truy vấn số dư / lịch
+         sử / giao dịch theo hash không cần nạp chain vào bộ nhớ
+Dependencies: storage/base.py, storage/sqlite_index.py
+"""
+
+import json
+from typing import Any, Dict, Iterator, Optional, Tuple
+from .base import BlockStore
+from .sqlite_index import IndexedQueries, SQLiteIndex, _dumps
+
+class SQLiteBlockStore(BlockStore, IndexedQueries):
+    """
+    Backend 'sqlite'
+
+    Header của block và nội dung giao dịch được lưu trong chính các bảng chỉ mục
+    của SQLiteIndex (store_bodies = True); watermark xác thực nằm trong bảng meta.
+    Các block nối liên tiếp được ghi trong một transaction SQLite và chỉ commit ở
+    sync(), nên lưu nhiều block chỉ tốn một lần ghi WAL xuống đĩa.
+
+    Kết nối SQLite không được dùng tiếp trong process con tạo bằng fork
+    (fork_safe = False).
+
+    Attributes:
+        path (str): Đường dẫn file database
+    """
+
+    fork_safe = False
+
+    def __init__(self, path: str, synchronous: str = "NORMAL"):
+        """
+        Mở (hoặc tạo) database
+
+        Args:
+            path: Đường dẫn file database
+            synchronous: PRAGMA synchronous (NORMAL là đủ an toàn với WAL)
+        """
+        self.path = path
+        self._index = SQLiteIndex(path, synchronous)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def append(self, block) -> int:
+        """Ghi block, giao dịch, posting và thay đổi số dư (commit ở sync())"""
+        return self._index.append(block if isinstance(block, dict) else block.to_dict())
+
+    def sync(self):
+        """Commit các block đã ghi (một lần fsync WAL)"""
+        self._index.commit()
+
+    def truncate(self, length: int):
+        """Bỏ các block từ chiều cao length trở đi và hoàn tác số dư của chúng"""
+        self._index.truncate(length)
+
+    def block_hash(self, height: int) -> str:
+        return self._index.block_hash(height)
+
+    def read(self, height: int) -> Dict[str, Any]:
+        return self._index.read(height)
+
+    def iter_block_dicts(self) -> Iterator[Dict[str, Any]]:
+        return self._index.iter_block_dicts()
+
+    # -------------------------------------------------------------- watermark
+
+    def load_watermark(self) -> Optional[Tuple[int, str]]:
+        """Watermark từ bảng meta, None nếu chưa có"""
+        value = self._index.load_meta('watermark')
+        if value is None:
+            return None
+        try:
+            data = json.loads(value)
+            return int(data['height']), str(data['hash'])
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def save_watermark(self, height: int, tip_hash: Optional[str]):
+        """Ghi watermark vào bảng meta và commit cùng các block đang chờ"""
+        if height < 0 or tip_hash is None:
+            self._index.save_meta('watermark', None)
+        else:
+            self._index.save_meta('watermark', _dumps({'height': height, 'hash': tip_hash}))
+
+    def load_chain_params(self) -> Dict[str, Any]:
+        """Tham số đồng thuận từ bảng meta, {} nếu chưa có"""
+        value = self._index.load_meta('chain_params')
+        try:
+            params = json.loads(value) if value is not None else {}
+        except ValueError:
+            return {}
+        return params if isinstance(params, dict) else {}
+
+    def save_chain_params(self, params: Dict[str, Any]):
+        """Ghi tham số đồng thuận vào bảng meta và commit"""
+        self._index.save_meta('chain_params', _dumps(params))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self._index.get_stats()
+
+    def close(self):
+        """Commit phần còn lại và đóng kết nối"""
+        self._index.close()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Ed25519 Micro-benchmark
+File: utils/bench_ed25519.py
+Purpose: Đo tốc độ sinh khóa, ký, xác minh đơn lẻ và xác minh theo lô của Ed25519
+         thuần Python trong utils/crypto.py
+Dependencies: utils/crypto.py
+
+Usage:
+    python -m utils.bench_ed25519 [-n 200] [--batch 64]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.crypto import Ed25519, _get_base_table
+
+def _rate(count: int, elapsed: float) -> float:
+    return count / elapsed if elapsed > 0 else float('inf')
+
+def run_benchmark(count: int = 200, batch_size: int = 64):
+    """
+    Chạy benchmark và in số thao tác mỗi giây
+
+    Args:
+        count: Số khóa / chữ ký dùng cho mỗi phép đo
+        batch_size: Kích thước lô khi đo verify_batch
+    """
+    start = time.perf_counter()
+    _get_base_table()
+    print(f"Base table precompute: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    seeds = [Ed25519.generate_private_key() for _ in range(count)]
+    messages = [os.urandom(32) for _ in range(count)]
+
+    start = time.perf_counter()
+    public_keys = [Ed25519.public_key(seed) for seed in seeds]
+    elapsed = time.perf_counter() - start
+    print(f"Key generation:   {_rate(count, elapsed):10.1f} keys/s")
+
+    start = time.perf_counter()
+    signatures = [Ed25519.sign(message, seed) for message, seed in zip(messages, seeds)]
+    elapsed = time.perf_counter() - start
+    print(f"Signing:          {_rate(count, elapsed):10.1f} signatures/s")
+
+    start = time.perf_counter()
+    for message, signature, public_key in zip(messages, signatures, public_keys):
+        assert Ed25519.verify(message, signature, public_key)
+    elapsed = time.perf_counter() - start
+    print(f"Verification:     {_rate(count, elapsed):10.1f} verifications/s")
+
+    items = list(zip(messages, signatures, public_keys))
+    start = time.perf_counter()
+    for i in range(0, count, batch_size):
+        assert Ed25519.verify_batch(items[i:i + batch_size])
+    elapsed = time.perf_counter() - start
+    print(f"Batch verify ({batch_size}): {_rate(count, elapsed):8.1f} verifications/s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Ed25519 micro-benchmark")
+    parser.add_argument('-n', '--count', type=int, default=200, help='Số chữ ký mỗi phép đo')
+    parser.add_argument('--batch', type=int, default=64, help='Kích thước lô cho verify_batch')
+    args = parser.parse_args()
+    run_benchmark(args.count, args.batch)
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,15 @@
 Cryptographic Utilities Module
 File: utils/crypto.py
 Purpose: Các hàm mã hóa và bảo mật cho blockchain
-Dependencies: hashlib, ecdsa
+Dependencies: hashlib, secrets, utils/merkle.py
 """
 
 import hashlib
 import secrets
 import base64
-from typing import Tuple, Dict, Any, Optional
+from functools import lru_cache
+from typing import Tuple, Dict, Any, List, Optional
+from utils import merkle
 
 class CryptoUtils:
     """
@@ -64,8 +66,20 @@ class CryptoUtils:
         Returns:
             str: Địa chỉ ví
         """
-        # Simplified address generation (thực tế phức tạp hơn)
-        hash_object = hashlib.sha256(private_key.encode())
+        return CryptoUtils.address_from_public_key(Ed25519.public_key(private_key))
+    
+    @staticmethod
+    def address_from_public_key(public_key: str) -> str:
+        """
+        Tạo địa chỉ ví từ Ed25519 public key
+        
+        Args:
+            public_key: Public key dạng hex
+            
+        Returns:
+            str: Địa chỉ ví ("1" + 32 ký tự hex đầu của SHA-256(public key))
+        """
+        hash_object = hashlib.sha256(public_key.encode())
         return f"1{hash_object.hexdigest()[:32]}"
     
     @staticmethod
@@ -73,28 +87,19 @@ class CryptoUtils:
         """
         Tính Merkle root từ danh sách hashes
         
+        Dùng chung bộ máy Merkle của utils/merkle.py với Merkle root của block, nên
+        kết quả luôn trùng với core/merkle.py.
+        
         Args:
-            hashes: Danh sách các hash
+            hashes: Danh sách các hash SHA-256 dạng hex (không bị thay đổi)
             
         Returns:
             str: Merkle root
+            
+        Raises:
+            ValueError: Nếu có hash không phải hex
         """
-        if not hashes:
-            return CryptoUtils.sha256_hash("")
-        
-        if len(hashes) == 1:
-            return hashes[0]
-        
-        # Duplicate last hash if odd number
-        if len(hashes) % 2 != 0:
-            hashes.append(hashes[-1])
-        
-        next_level = []
-        for i in range(0, len(hashes), 2):
-            combined = hashes[i] + hashes[i + 1]
-            next_level.append(CryptoUtils.sha256_hash(combined))
-        
-        return CryptoUtils.merkle_root(next_level)
+        return merkle.merkle_root(hashes)
     
     @staticmethod
     def proof_of_work(data: str, difficulty: int) -> Tuple[int, str]:
@@ -137,9 +142,288 @@ class CryptoUtils:
         calculated_hash = CryptoUtils.sha256_hash(hash_input)
         return calculated_hash == expected_hash
 
+# ---------------------------------------------------------------------------
+# Ed25519 (RFC 8032) - chỉ dùng thư viện chuẩn
+#
+# Điểm được biểu diễn bằng tọa độ extended (X, Y, Z, T) với x = X/Z, y = Y/Z,
+# x*y = T/Z. Nhân với điểm gốc B dùng bảng tính sẵn j * 16^i * B (64 x 16 điểm,
+# dạng affine "niels") nên chỉ cần 64 phép cộng, không có phép nhân đôi. Nhân với
+# điểm bất kỳ dùng cửa sổ 4 bit.
+# ---------------------------------------------------------------------------
+
+_P = 2 ** 255 - 19
+_L = 2 ** 252 + 27742317777372353535851937790883648493
+_D = -121665 * pow(121666, _P - 2, _P) % _P
+_D2 = 2 * _D % _P
+_SQRT_M1 = pow(2, (_P - 1) // 4, _P)
+
+_IDENTITY = (0, 1, 1, 0)
+
+def _point_add(p1: Tuple[int, int, int, int], p2: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+    """Cộng hai điểm (add-2008-hwcd-3, công thức đầy đủ)"""
+    X1, Y1, Z1, T1 = p1
+    X2, Y2, Z2, T2 = p2
+    A = (Y1 - X1) * (Y2 - X2) % _P
+    B = (Y1 + X1) * (Y2 + X2) % _P
+    C = T1 * _D2 * T2 % _P
+    D = 2 * Z1 * Z2 % _P
+    E, F, G, H = B - A, D - C, D + C, B + A
+    return (E * F % _P, G * H % _P, F * G % _P, E * H % _P)
+
+def _point_double(p: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+    """Nhân đôi một điểm (dbl-2008-hwcd)"""
+    X1, Y1, Z1, _ = p
+    A = X1 * X1 % _P
+    B = Y1 * Y1 % _P
+    C = 2 * Z1 * Z1 % _P
+    H = A + B
+    E = H - (X1 + Y1) * (X1 + Y1)
+    G = A - B
+    F = C + G
+    return (E * F % _P, G * H % _P, F * G % _P, E * H % _P)
+
+def _point_neg(p: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+    X, Y, Z, T = p
+    return (-X % _P, Y, Z, -T % _P)
+
+def _is_identity(p: Tuple[int, int, int, int]) -> bool:
+    X, Y, Z, _ = p
+    return X % _P == 0 and (Y - Z) % _P == 0
+
+def _recover_x(y: int, sign: int) -> Optional[int]:
+    """Tính x từ y và bit dấu (None nếu không có điểm tương ứng)"""
+    if y >= _P:
+        return None
+    x2 = (y * y - 1) * pow(_D * y * y + 1, -1, _P) % _P
+    if x2 == 0:
+        return None if sign else 0
+    x = pow(x2, (_P + 3) // 8, _P)
+    if (x * x - x2) % _P:
+        x = x * _SQRT_M1 % _P
+    if (x * x - x2) % _P:
+        return None
+    if (x & 1) != sign:
+        x = _P - x
+    return x
+
+def _encode_point(p: Tuple[int, int, int, int]) -> bytes:
+    X, Y, Z, _ = p
+    z_inv = pow(Z, -1, _P)
+    x = X * z_inv % _P
+    y = Y * z_inv % _P
+    return (y | ((x & 1) << 255)).to_bytes(32, 'little')
+
+@lru_cache(maxsize=4096)
+def _decode_point(data: bytes) -> Optional[Tuple[int, int, int, int]]:
+    """Giải mã điểm 32 byte (được cache vì cùng một public key xuất hiện nhiều lần)"""
+    if len(data) != 32:
+        return None
+    y = int.from_bytes(data, 'little')
+    sign = y >> 255
+    y &= (1 << 255) - 1
+    x = _recover_x(y, sign)
+    if x is None:
+        return None
+    return (x, y, 1, x * y % _P)
+
+_BASE_Y = 4 * pow(5, -1, _P) % _P
+_BASE = (_recover_x(_BASE_Y, 0), _BASE_Y, 1, _recover_x(_BASE_Y, 0) * _BASE_Y % _P)
+
+_base_table: Optional[List[List[Tuple[int, int, int]]]] = None
+
+def _get_base_table() -> List[List[Tuple[int, int, int]]]:
+    """
+    Bảng tính sẵn cho điểm gốc: table[i][j] = j * 16^i * B ở dạng (y+x, y-x, 2d*x*y)
+
+    Được dựng một lần (~1000 phép cộng) ở lần dùng đầu tiên.
+    """
+    global _base_table
+    if _base_table is None:
+        table = []
+        power = _BASE
+        for _ in range(64):
+            row = [(1, 1, 0)]
+            point = _IDENTITY
+            for _ in range(15):
+                point = _point_add(point, power)
+                X, Y, Z, _ = point
+                z_inv = pow(Z, -1, _P)
+                x = X * z_inv % _P
+                y = Y * z_inv % _P
+                row.append(((y + x) % _P, (y - x) % _P, x * y % _P * _D2 % _P))
+            table.append(row)
+            power = _point_add(point, power)  # 16 * power
+        _base_table = table
+    return _base_table
+
+def _scalarmult_base(k: int) -> Tuple[int, int, int, int]:
+    """k * B bằng bảng tính sẵn (64 phép cộng hỗn hợp, không nhân đôi)"""
+    table = _get_base_table()
+    X, Y, Z, T = _IDENTITY
+    for i in range(64):
+        j = (k >> (4 * i)) & 15
+        if j:
+            ypx, ymx, xy2d = table[i][j]
+            A = (Y - X) * ymx % _P
+            B = (Y + X) * ypx % _P
+            C = T * xy2d % _P
+            D = 2 * Z
+            E, F, G, H = B - A, D - C, D + C, B + A
+            X, Y, Z, T = E * F % _P, G * H % _P, F * G % _P, E * H % _P
+    return (X, Y, Z, T)
+
+def _window_table(p: Tuple[int, int, int, int]) -> List[Tuple[int, int, int, int]]:
+    """Các bội 0..15 của một điểm cho nhân cửa sổ 4 bit"""
+    table = [_IDENTITY, p]
+    for _ in range(14):
+        table.append(_point_add(table[-1], p))
+    return table
+
+def _multi_scalarmult(pairs: List[Tuple[int, Tuple[int, int, int, int]]]) -> Tuple[int, int, int, int]:
+    """
+    Tính tổng k_i * P_i (Straus, cửa sổ 4 bit): các phép nhân đôi được dùng chung
+    cho mọi điểm nên xác minh theo lô rẻ hơn xác minh từng chữ ký
+    """
+    tables = [(k, _window_table(p)) for k, p in pairs]
+    windows = max((k.bit_length() + 3) // 4 for k, _ in pairs) if pairs else 0
+    result = _IDENTITY
+    for i in reversed(range(windows)):
+        result = _point_double(_point_double(_point_double(_point_double(result))))
+        shift = 4 * i
+        for k, table in tables:
+            j = (k >> shift) & 15
+            if j:
+                result = _point_add(result, table[j])
+    return result
+
+def _sha512_int(*parts: bytes) -> int:
+    return int.from_bytes(hashlib.sha512(b"".join(parts)).digest(), 'little')
+
+@lru_cache(maxsize=1024)
+def _expand_private_key(seed: bytes) -> Tuple[int, bytes, bytes]:
+    """(scalar a, prefix, public key) từ seed 32 byte"""
+    h = hashlib.sha512(seed).digest()
+    a = int.from_bytes(h[:32], 'little')
+    a &= (1 << 254) - 8
+    a |= 1 << 254
+    return a, h[32:], _encode_point(_scalarmult_base(a))
+
+def _parse_signature(message: bytes, signature: bytes, public_key: bytes):
+    """Giải mã (A, R, S, k) của một chữ ký; None nếu sai định dạng"""
+    if len(signature) != 64 or len(public_key) != 32:
+        return None
+    A = _decode_point(public_key)
+    R = _decode_point(signature[:32])
+    S = int.from_bytes(signature[32:], 'little')
+    if A is None or R is None or S >= _L:
+        return None
+    k = _sha512_int(signature[:32], public_key, message) % _L
+    return A, R, S, k
+
+class Ed25519:
+    """
+    Chữ ký Ed25519 (RFC 8032) thuần Python
+
+    Khóa và chữ ký được truyền dưới dạng hex: private key = seed 32 byte,
+    public key 32 byte, chữ ký 64 byte. Kiểm tra chữ ký dùng phương trình có nhân
+    cofactor ([8][S]B = [8]R + [8][k]A) để xác minh đơn lẻ và theo lô luôn cho cùng
+    kết quả.
+    """
+
+    @staticmethod
+    def generate_private_key() -> str:
+        """Seed 32 byte ngẫu nhiên (hex)"""
+        return secrets.token_hex(32)
+
+    @staticmethod
+    def public_key(private_key: str) -> str:
+        """
+        Public key tương ứng với private key
+
+        Args:
+            private_key: Seed 32 byte dạng hex
+
+        Returns:
+            str: Public key dạng hex (64 ký tự)
+        """
+        return _expand_private_key(bytes.fromhex(private_key))[2].hex()
+
+    @staticmethod
+    def sign(message: bytes, private_key: str) -> str:
+        """
+        Ký message
+
+        Args:
+            message: Dữ liệu cần ký
+            private_key: Seed 32 byte dạng hex
+
+        Returns:
+            str: Chữ ký 64 byte dạng hex
+        """
+        a, prefix, public_key = _expand_private_key(bytes.fromhex(private_key))
+        r = _sha512_int(prefix, message) % _L
+        R = _encode_point(_scalarmult_base(r))
+        k = _sha512_int(R, public_key, message) % _L
+        S = (r + k * a) % _L
+        return (R + S.to_bytes(32, 'little')).hex()
+
+    @staticmethod
+    def verify(message: bytes, signature: str, public_key: str) -> bool:
+        """
+        Xác minh một chữ ký
+
+        Args:
+            message: Dữ liệu đã ký
+            signature: Chữ ký dạng hex
+            public_key: Public key dạng hex
+
+        Returns:
+            bool: True nếu chữ ký hợp lệ
+        """
+        try:
+            parsed = _parse_signature(message, bytes.fromhex(signature), bytes.fromhex(public_key))
+        except (TypeError, ValueError):
+            return False
+        if parsed is None:
+            return False
+        A, R, S, k = parsed
+        # [S]B - R - [k]A phải thuộc nhóm con cofactor
+        check = _point_add(_scalarmult_base(S), _point_neg(_point_add(R, _multi_scalarmult([(k, A)]))))
+        return _is_identity(_point_double(_point_double(_point_double(check))))
+
+    @staticmethod
+    def verify_batch(items: List[Tuple[bytes, str, str]]) -> bool:
+        """
+        Xác minh cả lô chữ ký một lần (tổ hợp tuyến tính với hệ số ngẫu nhiên 128 bit)
+
+        Args:
+            items: Các bộ (message, signature hex, public key hex)
+
+        Returns:
+            bool: True nếu mọi chữ ký đều hợp lệ; False nếu có ít nhất một chữ ký
+                sai (dùng verify để tìm chữ ký sai)
+        """
+        s_sum = 0
+        pairs = []
+        for message, signature, public_key in items:
+            try:
+                parsed = _parse_signature(message, bytes.fromhex(signature), bytes.fromhex(public_key))
+            except (TypeError, ValueError):
+                return False
+            if parsed is None:
+                return False
+            A, R, S, k = parsed
+            z = secrets.randbits(128) | 1
+            s_sum = (s_sum + z * S) % _L
+            pairs.append((z, R))
+            pairs.append((z * k % _L, A))
+
+        check = _point_add(_scalarmult_base(s_sum), _point_neg(_multi_scalarmult(pairs)))
+        return _is_identity(_point_double(_point_double(_point_double(check))))
+
 class DigitalSignature:
     """
-    Lớp cho digital signature (simplified implementation)
+    Lớp cho digital signature (Ed25519)
     """
     
     @staticmethod
@@ -150,14 +434,13 @@ class DigitalSignature:
         Returns:
             Tuple[str, str]: (private_key, public_key)
         """
-        private_key = CryptoUtils.generate_private_key()
-        public_key = CryptoUtils.sha256_hash(private_key)[:64]
-        return private_key, public_key
+        private_key = Ed25519.generate_private_key()
+        return private_key, Ed25519.public_key(private_key)
     
     @staticmethod
     def sign_message(message: str, private_key: str) -> str:
         """
-        Ký message bằng private key (simplified)
+        Ký message bằng private key
         
         Args:
             message: Message cần ký
@@ -166,13 +449,12 @@ class DigitalSignature:
         Returns:
             str: Digital signature
         """
-        combined = f"{message}{private_key}"
-        return CryptoUtils.sha256_hash(combined)
+        return Ed25519.sign(message.encode('utf-8'), private_key)
     
     @staticmethod
     def verify_signature(message: str, signature: str, public_key: str) -> bool:
         """
-        Xác thực digital signature (simplified)
+        Xác thực digital signature
         
         Args:
             message: Message gốc
@@ -182,9 +464,7 @@ class DigitalSignature:
         Returns:
             bool: True nếu signature hợp lệ
         """
-        # Simplified verification (trong thực tế phức tạp hơn)
-        expected_hash = CryptoUtils.sha256_hash(f"{message}{public_key}")
-        return len(signature) == 64  # Basic validation
+        return Ed25519.verify(message.encode('utf-8'), signature, public_key)
 
 class WalletManager:
     """
@@ -205,7 +485,7 @@ class WalletManager:
             Dict: Thông tin ví (address, private_key, public_key)
         """
         private_key, public_key = DigitalSignature.generate_keypair()
-        address = CryptoUtils.generate_address(private_key)
+        address = CryptoUtils.address_from_public_key(public_key)
         
         wallet_info = {
             'address': address,
@@ -216,6 +496,49 @@ class WalletManager:
         self.wallets[wallet_name] = wallet_info
         return wallet_info
     
+    def load_wallets(self, wallets: Dict[str, Dict[str, str]]) -> List[str]:
+        """
+        Nạp ví đã lưu (wallets.json)
+        
+        Ví tạo trước khi chuyển sang Ed25519 có địa chỉ và public key không sinh ra
+        từ private key nên không ký được giao dịch hợp lệ; chúng được dựng lại từ
+        private key, địa chỉ cũ được giữ trong 'legacy_address' (số dư ở địa chỉ cũ
+        không chi tiêu được bằng chữ ký Ed25519).
+        
+        Args:
+            wallets: Mapping từ tên ví đến thông tin ví
+            
+        Returns:
+            List[str]: Tên các ví đã được dựng lại
+            
+        Raises:
+            ValueError: Nếu có ví mà private key không phải seed Ed25519 32 byte (hex)
+        """
+        loaded = {}
+        migrated = []
+        for name, info in wallets.items():
+            private_key = info.get('private_key')
+            try:
+                usable = len(bytes.fromhex(private_key)) == 32
+            except (TypeError, ValueError):
+                usable = False
+            if not usable:
+                raise ValueError(f"Wallet '{name}' has no usable Ed25519 private key (expected 64 hex characters)")
+            
+            public_key = Ed25519.public_key(private_key)
+            address = CryptoUtils.address_from_public_key(public_key)
+            info = dict(info)
+            if info.get('address') != address or info.get('public_key') != public_key:
+                if info.get('address') and info['address'] != address:
+                    info['legacy_address'] = info['address']
+                info['address'] = address
+                info['public_key'] = public_key
+                migrated.append(name)
+            loaded[name] = info
+        
+        self.wallets = loaded
+        return migrated
+    
     def get_wallet(self, wallet_name: str) -> Optional[Dict[str, str]]:
         """
         Lấy thông tin ví
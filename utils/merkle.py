@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Merkle Engine Module
+File: utils/merkle.py
+Purpose: Bộ máy Merkle duy nhất của dự án, làm việc trên digest 32 byte: hash nút
+         cha, hash cả một tầng và tính Merkle root; dùng chung cho Merkle tree của
+         block (core/merkle.py) và CryptoUtils.merkle_root
+Dependencies: hashlib, binascii
+"""
+
+import hashlib
+from binascii import hexlify
+from typing import List, Optional
+
+EMPTY_ROOT = hashlib.sha256("".encode()).hexdigest()
+
+# Quy tắc đồng thuận hiện tại: nút cha = SHA-256 của chuỗi hex ASCII (64 + 64 ký tự)
+# của hai nút con. Các tầng được lưu dưới dạng digest 32 byte; hexlify chạy trên
+# bytes ở mức C nên không còn tạo/encode lại chuỗi str ở mỗi tầng.
+
+def hash_pair(left: bytes, right: bytes) -> bytes:
+    """Digest của một nút cha từ hai digest con"""
+    return hashlib.sha256(hexlify(left) + hexlify(right)).digest()
+
+def hash_level(level: List[bytes]) -> List[bytes]:
+    """
+    Tính cả một tầng cha trong một lượt (batch)
+
+    Args:
+        level: Các digest của tầng hiện tại (không rỗng)
+
+    Returns:
+        List[bytes]: Tầng cha; nút lẻ cuối tầng được ghép với chính nó
+    """
+    sha256 = hashlib.sha256
+    hexes = [hexlify(node) for node in level]
+    if len(hexes) % 2:
+        hexes.append(hexes[-1])
+    return [sha256(left + right).digest() for left, right in zip(hexes[0::2], hexes[1::2])]
+
+def merkle_root_from_digests(digests: List[bytes]) -> Optional[bytes]:
+    """
+    Tính Merkle root dạng digest bằng vòng lặp theo tầng (không đổi danh sách đầu vào)
+
+    Returns:
+        Optional[bytes]: Digest của root, None nếu danh sách rỗng
+    """
+    if not digests:
+        return None
+    level = digests
+    while len(level) > 1:
+        level = hash_level(level)
+    return level[0]
+
+def merkle_root(hashes: List[str]) -> str:
+    """
+    Tính Merkle root từ danh sách hash hex (điểm vào dùng chung cho Block và CryptoUtils)
+
+    Args:
+        hashes: Danh sách hash SHA-256 dạng hex
+
+    Returns:
+        str: Merkle root dạng hex
+
+    Raises:
+        ValueError: Nếu có hash không phải hex
+    """
+    root = merkle_root_from_digests([bytes.fromhex(h) for h in hashes])
+    return root.hex() if root is not None else EMPTY_ROOT
@@ -92,9 +92,40 @@ class BlockchainAnalyzer:
         print("📊 BLOCKCHAIN STATUS / TRẠNG THÁI CHUỖI KHỐI")
         print("="*60)
         print(f"  - Total Blocks / Tổng số khối:         {len(blockchain.chain)}")
-        print(f"  - Current Difficulty / Độ khó hiện tại:   {blockchain.difficulty}")
-        print(f"  - Pending Transactions / Giao dịch chờ: {len(blockchain.pending_transactions)}")
-        print(f"  - Chain valid / Chuỗi hợp lệ:          {blockchain.is_chain_valid()}")
+        print(f"  - Current Difficulty / Độ khó hiện tại:   {blockchain.current_difficulty:.2f}")
+        print(f"  - Pending Transactions / Giao dịch chờ: {len(blockchain.mempool)}")
+        print(f"  - Chain valid / Chuỗi hợp lệ:          {blockchain.is_chain_validated()}")
+        print(f"  - Validated height / Đã xác thực đến:  {blockchain.validated_height}")
+        print("="*60)
+
+    @staticmethod
+    def print_mining_stats(stats: Dict[str, Any]) -> None:
+        """
+        In ra thống kê khai thác (từ MiningTelemetry.get_stats)
+        
+        Args:
+            stats: Dictionary thống kê khai thác
+        """
+        print("\n" + "="*60)
+        print("⛏️  MINING STATS / THỐNG KÊ KHAI THÁC")
+        print("="*60)
+        print(f"  - Blocks mined / Số khối đã đào:       {stats['blocks_mined']}")
+        print(f"  - Total attempts / Tổng số lần thử:    {stats['total_attempts']}")
+        print(f"  - Avg solve time / Thời gian TB:       {stats['average_mining_time']:.2f}s")
+        
+        for name, window in stats['windows'].items():
+            print(f"  - [{name:>3}] {window['blocks']} blocks, {window['hash_rate']:,.0f} H/s")
+            for worker_id, rate in window['worker_hash_rates'].items():
+                print(f"          worker {worker_id}: {rate:,.0f} H/s")
+        
+        histogram = stats['solve_time_histogram']
+        percentiles = ", ".join(
+            f"{name}={value:.2f}s" for name, value in histogram['percentiles'].items() if value is not None
+        )
+        print(f"  - Solve time percentiles / Phân vị:    {percentiles or 'n/a'}")
+        for label, count in histogram['buckets'].items():
+            if count:
+                print(f"      {label:>8}: {'#' * min(count, 40)} {count}")
         print("="*60)
 
 class PerformanceMonitor: